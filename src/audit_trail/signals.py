@@ -8,9 +8,27 @@ activity_log = Signal(
 
 @receiver(activity_log, dispatch_uid="activity_log_uid")
 def activity_handler(verb, action_object=None, target=None, **kwargs):
-    from .models import Activity, get_repr
-
     kwargs.pop("signal", None)
+    activity = build_activity(
+        verb, action_object=action_object, target=target, **kwargs
+    )
+    activity.save()
+
+
+def bulk_activity_log(verb, targets, actor, **kwargs):
+    """Log the same activity on several targets with a single query."""
+    from .models import Activity
+
+    activities = [
+        build_activity(verb, target=target, actor=actor, **kwargs)
+        for target in targets
+    ]
+    Activity.objects.bulk_create(activities)
+
+
+def build_activity(verb, action_object=None, target=None, **kwargs):
+    """Return an unsaved `Activity` instance."""
+    from .models import Activity, get_repr
 
     if verb not in list(zip(*Activity.VERB_CHOICES))[0]:
         raise ValueError("Verb must belong to Activity verbs")
@@ -41,4 +59,4 @@ def activity_handler(verb, action_object=None, target=None, **kwargs):
     activity.action_object_str = kwargs.get("action_object_str", None) or get_repr(
         action_object
     )
-    activity.save()
+    return activity
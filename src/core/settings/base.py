@@ -442,6 +442,13 @@ PIPELINE = {
             ),
             "output_filename": "js/transmittal-list.js",
         },
+        "export_list": {
+            "source_filenames": (
+                "js/exports/views.js",
+                "js/exports/app.js",
+            ),
+            "output_filename": "js/export-list.js",
+        },
         "reporting": {
             "source_filenames": (
                 "js/vendor/d3.min.js",
@@ -479,6 +486,8 @@ ELASTIC_HOSTS = [{"host": "localhost", "port": 9200}]
 ELASTIC_INDEX = "documents"
 ELASTIC_BULK_SIZE = 150
 ELASTIC_AUTOINDEX = True
+ELASTIC_INDEX_QUEUE_DELAY = 5  # seconds
+ELASTIC_PIT_KEEP_ALIVE = "5m"  # Lifetime of search cursors
 
 # ######### CUSTOM CONFIGURATION
 PAGINATE_BY = 50  # Document list pagination
@@ -489,6 +498,8 @@ LOGIN_URL = "login"
 CRISPY_TEMPLATE_PACK = "bootstrap3"
 CRISPY_FAIL_SILENTLY = False
 REVIEW_DURATION = 13
+REVIEWS_CACHE_TIMEOUT = 60 * 60 * 24  # Distribution lists cache, in seconds
+REPORTING_CACHE_TIMEOUT = 60 * 60  # Reporting page cache, in seconds
 DISPLAY_NOTIFICATION_COUNT = 5
 ALERT_ELEMENTS = 10
 
@@ -515,6 +526,10 @@ EXPORTS_TO_KEEP = 20
 # Where to look for files to import?
 IMPORT_ROOT = SITE_ROOT.child("import")
 
+# Number of transmittals validated concurrently during imports
+TRS_IMPORTS_WORKERS = 4
+TRS_PROCESS_CHUNK_SIZE = 100  # Transmittal lines saved at once
+
 # ######### END CUSTOM CONFIGURATION
 
 ALLOWED_HOSTS = ["phase"]
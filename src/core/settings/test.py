@@ -87,6 +87,9 @@ TRS_IMPORTS_CONFIG = {
     }
 }
 
+# Other threads cannot see data created in test transactions
+TRS_IMPORTS_WORKERS = 1
+
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 
 
@@ -1,13 +1,16 @@
 import re
 
+from django.core.cache import cache
 from django.db import models, transaction
+from django.db.models import Count
 from django.utils import timezone
 from django.utils.translation import ugettext, ugettext_lazy as _
 from django.conf import settings
 
 from accounts.models import User
 from documents.models import Document
-from notifications.models import notify
+from notifications.models import Notification, notify
+from discussion.utils import get_cache_key
 
 
 mentions_re = re.compile(r"@([\w\-_]+)", re.IGNORECASE)
@@ -50,10 +53,64 @@ class Note(models.Model):
         self.body = message
         self.deleted_on = timezone.now()
 
+    @classmethod
+    @transaction.atomic
+    def bulk_post(cls, author, revisions, body):
+        """Post the same remark on several revisions at once.
+
+        Notes are inserted with a single query, so no `post_save` signal is
+        sent. Discussion length cache and mention notifications are
+        updated here instead.
+
+        """
+        notes = cls.objects.bulk_create(
+            [
+                cls(
+                    author=author,
+                    document=revision.document,
+                    revision=revision.revision,
+                    body=body,
+                )
+                for revision in revisions
+            ]
+        )
+        if not notes:
+            return notes
+
+        documents = {note.document_id: note.document for note in notes}
+        lengths = (
+            cls.objects.filter(document_id__in=documents.keys())
+            .values_list("document_id", "revision")
+            .annotate(length=Count("id"))
+        )
+        cache.set_many(
+            {
+                get_cache_key(documents[document_id], revision): length
+                for document_id, revision, length in lengths
+            },
+            None,
+        )
+
+        users = notes[0].parse_mentions()
+        Notification.objects.bulk_create(
+            [
+                Notification(user=user, body=note.get_mention_message())
+                for note in notes
+                for user in users
+            ]
+        )
+        return notes
+
     @transaction.atomic
     def notify_mentionned_users(self):
         """Parse @mentions and create according notifications."""
-        message = _(
+        message = self.get_mention_message()
+        users = self.parse_mentions()
+        for user in users:
+            notify(user, message)
+
+    def get_mention_message(self):
+        return _(
             "%(user)s mentionned you on document "
             '<a href="%(url)s">%(doc)s</a> (revision %(revision)02d)'
         ) % {
@@ -62,9 +119,6 @@ class Note(models.Model):
             "doc": self.document.document_key,
             "revision": int(self.revision),
         }
-        users = self.parse_mentions()
-        for user in users:
-            notify(user, message)
 
     def parse_mentions(self):
         """Get the list of all users mentionned in the message."""
@@ -1,3 +1,4 @@
+import datetime
 import os
 from io import BytesIO
 
@@ -16,6 +17,7 @@ from distriblists.utils import (
 )
 from distriblists.factories import DistributionListFactory
 from distriblists.models import DistributionList
+from reviews.models import Review
 
 
 class DistributionListsExportTests(TestCase):
@@ -272,3 +274,69 @@ class ReviewMembersImportTests(ContractorDeliverableTestCase):
         self.assertEqual(self.docs[0].latest_revision.leader, self.users[0])
         self.assertEqual(self.docs[0].latest_revision.approver, self.users[1])
         self.assertEqual(self.docs[0].latest_revision.reviewers.all().count(), 3)
+
+    def start_review(self, doc, reviewer):
+        revision = doc.latest_revision
+        revision.leader = self.users[0]
+        revision.received_date = datetime.date.today()
+        revision.save()
+        revision.reviewers.add(reviewer)
+        revision.start_review()
+        return revision
+
+    def import_file(self):
+        xls_file = os.path.join(
+            os.path.dirname(__file__), "fixtures", "valid_review_members.xlsx"
+        )
+        return import_review_members(xls_file, self.category)
+
+    def test_import_syncs_documents_under_review(self):
+        self.start_review(self.docs[0], self.users[4])
+        results = self.import_file()
+        self.assertTrue(results[0]["success"])
+
+        reviews = Review.objects.filter(document=self.docs[0])
+        self.assertEqual(
+            sorted(reviews.values_list("role", "reviewer_id")),
+            sorted(
+                [
+                    ("leader", self.users[0].id),
+                    ("approver", self.users[1].id),
+                    ("reviewer", self.users[2].id),
+                    ("reviewer", self.users[3].id),
+                    ("reviewer", self.users[4].id),
+                ]
+            ),
+        )
+
+    def test_reviewers_who_commented_cannot_be_removed(self):
+        revision = self.start_review(self.docs[1], self.users[4])
+        revision.get_review(self.users[4]).post_review(comments=None)
+
+        results = self.import_file()
+        self.assertFalse(results[1]["success"])
+        self.assertTrue(results[0]["success"])
+
+        reviews = Review.objects.filter(document=self.docs[1])
+        self.assertEqual(
+            sorted(reviews.values_list("role", "reviewer_id")),
+            sorted([("leader", self.users[0].id), ("reviewer", self.users[4].id)]),
+        )
+
+    def test_reviewers_cannot_change_at_the_leader_step(self):
+        revision = self.start_review(self.docs[0], self.users[4])
+        revision.end_reviewers_step()
+
+        results = self.import_file()
+        self.assertFalse(results[0]["success"])
+
+        revision.refresh_from_db()
+        self.assertEqual(list(revision.reviewers.all()), [self.users[4]])
+        reviews = Review.objects.filter(document=self.docs[0])
+        self.assertEqual(
+            sorted(reviews.values_list("role", "reviewer_id", "status")),
+            [
+                ("leader", self.users[0].id, "progress"),
+                ("reviewer", self.users[4].id, "not_reviewed"),
+            ],
+        )
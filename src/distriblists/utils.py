@@ -2,11 +2,13 @@ import openpyxl
 from openpyxl.writer.excel import save_virtual_workbook
 from openpyxl.styles import Alignment, Border, Side
 
+from django.db import transaction
 from django.utils.translation import ugettext_lazy as _
 
 from accounts.models import User
 from distriblists.models import DistributionList
 from distriblists.forms import DistributionListForm
+from reviews.models import Review
 
 
 header_alignment = Alignment(
@@ -25,7 +27,12 @@ cell_border = Border(
 
 
 def import_review_members(filepath, category):
-    """Import review members from an excel file."""
+    """Import review members from an excel file.
+
+    Reviews of documents under review are synchronized with the imported
+    distribution lists all at once.
+
+    """
     wb = openpyxl.load_workbook(filepath)
     ws = wb.active
 
@@ -35,16 +42,27 @@ def import_review_members(filepath, category):
     max_col = len(user_ids) + 1  # Don't use ws.max_column, it's not reliable
     rows = ws.iter_rows(min_row=2, max_row=ws.max_row, max_col=max_col)
     results = []
-    for idx, row in enumerate(rows):
-        result = _import_review_members(row, emails, user_ids, category)
-        result["line"] = idx + 2
-        results.append(result)
+    under_review = []
+    with transaction.atomic():
+        for idx, row in enumerate(rows):
+            result = _import_review_members(
+                row, emails, user_ids, category, under_review
+            )
+            result["line"] = idx + 2
+            results.append(result)
+
+        category.revision_class().bulk_sync_reviews(under_review)
 
     return results
 
 
-def _import_review_members(row, emails, user_ids, category):
-    """Saves a review member list for a single row."""
+def _import_review_members(row, emails, user_ids, category, under_review):
+    """Saves a review member list for a single row.
+
+    Revisions under review are appended to `under_review`, so their reviews
+    can be synchronized in a single batch.
+
+    """
     errors = []
 
     key = row[0].value
@@ -59,9 +77,6 @@ def _import_review_members(row, emails, user_ids, category):
         instance = None
         errors.append(_("Document {} does not exist").format(key))
 
-    if instance.latest_revision.is_under_review():
-        errors.append(_("This document is under review"))
-
     # Extract user roles from xls
     reviewers = []
     leader = None
@@ -84,6 +99,11 @@ def _import_review_members(row, emails, user_ids, category):
 
     if instance and not errors:
         rev = instance.latest_revision
+        is_under_review = rev.is_under_review()
+        if is_under_review:
+            errors += _check_ongoing_review(rev, leader, approver, reviewers)
+
+    if instance and not errors:
         if leader:
             rev.leader_id = leader
 
@@ -92,6 +112,8 @@ def _import_review_members(row, emails, user_ids, category):
         rev.reviewers.clear()
         rev.reviewers.add(*reviewers)
         rev.save()
+        if is_under_review:
+            under_review.append(rev)
 
     return {
         "document_key": key,
@@ -100,6 +122,43 @@ def _import_review_members(row, emails, user_ids, category):
     }
 
 
+def _check_ongoing_review(revision, leader, approver, reviewers):
+    """Check the review members of a revision under review can be changed.
+
+    Those are the same rules as in the revision form, see
+    `reviews.forms.ReviewFormMixin`.
+
+    """
+    errors = []
+
+    old_reviewers = set(revision.reviewers.values_list("id", flat=True))
+    if set(reviewers) != old_reviewers:
+        if revision.reviewers_step_closed:
+            errors.append(
+                _("Reviewers step is over, you cannot modify reviewers anymore")
+            )
+
+        for review in revision.get_reviewers_reviews():
+            removed = review.reviewer_id not in reviewers
+            if removed and review.status != Review.STATUSES.progress:
+                errors.append(
+                    _(
+                        "{} already submitted a review, and cannot be removed "
+                        "from the distribution list."
+                    ).format(review.reviewer)
+                )
+
+    leader_changed = leader and leader != revision.leader_id
+    if leader_changed and revision.leader_step_closed:
+        errors.append(_("Leader stop is over, you cannot modify leader anymore."))
+
+    approver_changed = approver and approver != revision.approver_id
+    if approver_changed and revision.review_end_date:
+        errors.append(_("Approver stop is over, you cannot modify approver anymore."))
+
+    return errors
+
+
 def export_review_members(category):
     """Export members of the review for all documents in the category."""
     documents = (
@@ -12,6 +12,7 @@ class BaseDocumentFilterForm(forms.Form):
         widget=forms.HiddenInput(), required=False, initial=settings.PAGINATE_BY
     )
     start = forms.IntegerField(widget=forms.HiddenInput(), required=False, initial=0)
+    cursor = forms.CharField(widget=forms.HiddenInput(), required=False)
     search_terms = forms.CharField(label="Search all columns", required=False)
 
 
@@ -115,6 +116,6 @@ def filterform_factory(model):
         # We have to add them to the `base_fields` by appending them to the
         # `filter_fields_order` list manually.
         # TODO Find a better way to do this.
-        fields_order = ["size", "start"] + filter_fields_order
+        fields_order = ["size", "start", "cursor"] + filter_fields_order
         form.base_fields = OrderedDict((k, form.base_fields[k]) for k in fields_order)
     return form
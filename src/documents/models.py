@@ -17,7 +17,6 @@ from accounts.models import User
 from documents.fields import RevisionFileField
 from categories.models import Category
 from documents.templatetags.documents import MenuItem, DividerMenuItem
-import collections
 
 logger = logging.getLogger(__name__)
 
@@ -485,67 +484,21 @@ class MetadataRevisionBase(models.Model):
 
         Suitable for indexing in ES, for example.
 
-        The first element of the list is the linkified document number.
+        See `search.serializers.IndexSerializer`.
+        """
+        from search.serializers import get_index_serializer
+
+        return get_index_serializer(type(self)).serialize(self)
+
+    @classmethod
+    def get_index_prefetch_related(cls):
+        """Related fields to prefetch when revisions are indexed in bulk.
+
+        Override this if some indexed values are computed from
+        many-to-many relations.
 
-        If a value is a Model instance (e.g a foreign key), we return both it's
-        unicode and id values.
         """
-        fields = tuple()
-        metadata = self.metadata
-        document = metadata.document
-
-        def add_to_fields(key):
-            # Search the value of `key` in the revision, metadata and document,
-            # in that order. If not found, raise an exception.
-            # Note that the value can be "None" so careful with have to
-            # explicitely catch the AttributeError exception
-            try:
-                value = getattr(self, key)
-            except AttributeError:
-                try:
-                    value = getattr(metadata, key)
-                except AttributeError:
-                    try:
-                        value = getattr(document, key)
-                    except AttributeError:
-                        error = "Cannot find field {} in doc {} ({})".format(
-                            key, document.document_key, document.document_type()
-                        )
-                        raise RuntimeError(error)
-
-            if isinstance(value, collections.Callable):
-                value = value()
-
-            if isinstance(value, models.Model):
-                field = ((str(key), value.__str__()), ("%s_id" % key, value.pk))
-            else:
-                field = ((str(key), value),)
-
-            return field
-
-        config = document.category.document_class().PhaseConfig
-        filter_fields = list(config.filter_fields)
-        column_fields = list(dict(config.column_fields).values())
-        indexable_fields = getattr(config, "indexable_fields", [])
-        fields_to_index = set(filter_fields + column_fields + indexable_fields)
-
-        for field in fields_to_index:
-            fields += add_to_fields(field)
-
-        fields_infos = dict(fields)
-        fields_infos.update(
-            {
-                "url": document.get_absolute_url(),
-                "document_key": document.document_key,
-                "document_number": document.document_number,
-                "document_pk": document.pk,
-                "metadata_pk": metadata.pk,
-                "pk": self.pk,
-                "revision": self.revision,
-                "is_latest_revision": document.current_revision == self.revision,
-            }
-        )
-        return fields_infos
+        return []
 
     def get_initial_ignored_fields(self):
         """New revision initial data that must stay default."""
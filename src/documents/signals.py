@@ -7,3 +7,6 @@ document_form_saved = Signal(
 document_created = Signal(providing_args=["document", "metadata", "revision"])
 document_revised = Signal(providing_args=["document", "metadata", "revision"])
 revision_edited = Signal(providing_args=["document", "metadata", "revision"])
+
+# Sent when several documents were updated without saving them one by one
+documents_batch_updated = Signal(providing_args=["document_ids"])
@@ -631,7 +631,7 @@ class FilterFormTest(TestCase):
         # We make alist from field ordered dict keys and get rid of the first
         # fields which are hidden and not defined in filter_fields_order
         # attribute
-        form_fields = list(form.fields.keys())[2:]
+        form_fields = list(form.fields.keys())[3:]
 
         # Checking fields are in the right order
         self.assertEqual(form_fields, fields_order)
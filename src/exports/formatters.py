@@ -1,9 +1,13 @@
 import datetime as dt
+from decimal import Decimal
+from operator import attrgetter
 
-from documents.models import MetadataRevisionBase
-from transmittals.utils import FieldWrapper
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import CharField, TextField
+from django.utils import timezone
+
+from documents.models import Document, MetadataRevisionBase
 from documents.utils import stringify_value as stringify
-import collections
 
 # Only used in this module, it makes no sense to put it elsewhere for now
 FR_DATE_FORMAT = "%d-%m-%Y"
@@ -43,17 +47,80 @@ class BaseFormatter(object):
 
 
 class CSVFormatter(BaseFormatter):
-    """Converts a queryset into csv data."""
+    """Converts a queryset into csv data.
+
+    Where each exported field lives (revision, metadata or document) and how
+    its value must be converted is computed once per revision class, so
+    formatting a row is a simple loop over precompiled accessors.
+
+    """
+
+    def __init__(self, fields):
+        super(CSVFormatter, self).__init__(fields)
+        self._plans = {}
 
     def prepare_data(self, doc):
         if isinstance(doc, list):
             data = doc
         elif isinstance(doc, MetadataRevisionBase):
-            doc = FieldWrapper((doc, doc.metadata, doc.metadata.document))
-            fields = list(self.fields.values())
-            data = [self.get_field(doc, field) for field in fields]
+            metadata = doc.metadata
+            objects = (doc, metadata, metadata.document)
+            plan = self.get_plan(type(doc))
+            data = [convert(get(objects)) for get, convert in plan]
         return data
 
+    def get_plan(self, revision_class):
+        """Return the list of (getter, converter) for the exported fields."""
+        if revision_class not in self._plans:
+            metadata_class = revision_class._meta.get_field(
+                "metadata"
+            ).remote_field.model
+            models = (revision_class, metadata_class, Document)
+            self._plans[revision_class] = [
+                self.compile_field(models, field)
+                for field in list(self.fields.values())
+            ]
+        return self._plans[revision_class]
+
+    def compile_field(self, models, field):
+        """Return the accessor and converter for a single field."""
+        for index, model in enumerate(models):
+            if hasattr(model, field):
+                break
+        else:
+            # The attribute may only exist on instances
+            return self.get_dynamic_getter(field), self.format_value
+
+        attr = getattr(model, field)
+        if callable(attr):
+            method = attrgetter(field)
+            getter = lambda objects: method(objects[index])()  # noqa
+        else:
+            value = attrgetter(field)
+            getter = lambda objects: value(objects[index])  # noqa
+
+        try:
+            model_field = model._meta.get_field(field)
+        except FieldDoesNotExist:
+            model_field = None
+        return getter, self.get_converter(model_field)
+
+    def get_dynamic_getter(self, field):
+        def getter(objects):
+            for obj in objects:
+                if hasattr(obj, field):
+                    data = getattr(obj, field)
+                    return data() if callable(data) else data
+            return ""
+
+        return getter
+
+    def get_converter(self, model_field):
+        """Return the fastest function to convert the field values."""
+        if isinstance(model_field, (CharField, TextField)):
+            return lambda data: "" if data is None else data  # noqa
+        return self.format_value
+
     def format_doc(self, doc):
         data = self.prepare_data(doc)
 
@@ -63,12 +130,7 @@ class CSVFormatter(BaseFormatter):
         csv_data = "{}\n".format(csv_data)
         return csv_data.encode("utf-8")
 
-    def get_field(self, doc, field):
-        data = getattr(doc, field, "")
-        # Attributes and method can be passed
-        if isinstance(data, collections.Callable):
-            data = data()
-
+    def format_value(self, data):
         # We want dd-mm-yyy format for exports whereas
         if type(data) == dt.date:
             data = data.strftime(FR_DATE_FORMAT)
@@ -80,6 +142,25 @@ class CSVFormatter(BaseFormatter):
 
 
 class XLSXFormatter(CSVFormatter):
+    """Converts a queryset into rows of cell values.
+
+    Dates and numbers are left untouched so they are written as typed
+    cells instead of text.
+
+    """
+
+    TYPED_VALUES = (dt.date, int, float, Decimal)
+
+    def format_value(self, data):
+        # Excel does not support timezones
+        if isinstance(data, dt.datetime) and timezone.is_aware(data):
+            data = timezone.make_naive(data)
+
+        if isinstance(data, self.TYPED_VALUES) and not isinstance(data, bool):
+            return data
+
+        return stringify(data, none_val="")
+
     def format_doc(self, doc):
         return self.prepare_data(doc)
 
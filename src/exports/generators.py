@@ -1,3 +1,5 @@
+from itertools import islice
+
 from django.conf import settings
 
 from accounts.models import Entity
@@ -10,25 +12,44 @@ class ExportGenerator(object):
     Use Elasticsearch and the db to efficiently (as far as possible) fetch data
     from a certain category filtered by the given filters.
 
-    Yields data in chunks.
+    Yields data in chunks. Search results are streamed from Elasticsearch
+    and fetched from the db chunk by chunk, so the memory usage does not
+    depend on the number of exported documents.
+
+    Documents are exported by increasing pk, so an interrupted export can be
+    resumed by passing the last exported pk and the number of exported rows.
+    The header is not yielded again in this case.
 
     """
 
     def __init__(
-        self, category, filters, fields, owner=None, export_all_revisions=False
+        self,
+        category,
+        filters,
+        fields,
+        owner=None,
+        export_all_revisions=False,
+        last_pk=None,
+        offset=0,
     ):
         self.category = category
         self.fields = fields
         self.export_all_revisions = export_all_revisions
+        self.chunk_size = settings.EXPORTS_CHUNK_SIZE
         self.filters = filters
-        self.filters.update({"start": 0, "size": 60000})
+
+        # With the scroll api, `size` is the number of hits per scroll page
+        self.filters["start"] = 0
+        self.filters["size"] = self.chunk_size
 
         self.owner = owner
+        self.last_pk = last_pk
+        self.offset = offset
 
     def __iter__(self):
-        self.pks, self.total = self.get_es_results()
-        self.start = -1
-        self.chunk_size = settings.EXPORTS_CHUNK_SIZE
+        pks, self.total = self.get_es_results()
+        self.pks = iter(pks)
+        self.start = -1 if self.last_pk is None else self.offset
         return self
 
     def get_entities(self):
@@ -46,6 +67,8 @@ class ExportGenerator(object):
 
         Only return document ids, since the actual data export will use db.
 
+        Ids are lazily pulled from ES while the export is being written.
+
         """
 
         # For contractor accessing phase, we have to filter
@@ -54,11 +77,16 @@ class ExportGenerator(object):
         builder = SearchBuilder(
             self.category, self.filters, filter_on_entities=entities
         )
-        result = builder.scan_results(
+        search = builder.build_query(
             ["pk"], only_latest_revisions=not self.export_all_revisions
         )
-        pks = [doc["pk"] for doc in result]
-        total = len(pks)
+        total = search.count()
+
+        search = search.sort("pk").params(preserve_order=True)
+        if self.last_pk is not None:
+            search = search.filter("range", pk={"gt": self.last_pk})
+
+        pks = (doc["pk"] for doc in search.scan())
         return pks, total
 
     def __next__(self):
@@ -75,21 +103,22 @@ class ExportGenerator(object):
             self.start = 0
             return self.data_header()
 
-        if self.start >= self.total:
+        pks = list(islice(self.pks, self.chunk_size))
+        if not pks:
             raise StopIteration()
 
-        chunk = self.get_chunk()
-        self.start += self.chunk_size
+        chunk = self.get_chunk(pks)
+        self.start += len(pks)
+        self.last_pk = pks[-1]
         return chunk
 
     def data_header(self):
         return
 
-    def get_chunk(self):
+    def get_chunk(self, pks):
         """Get a single piece of data."""
         Model = self.category.revision_class()
-        pks = self.pks[self.start : self.start + self.chunk_size]
-        qs = Model.objects.filter(pk__in=pks).select_related()
+        qs = Model.objects.filter(pk__in=pks).select_related().order_by("pk")
         return qs
 
 
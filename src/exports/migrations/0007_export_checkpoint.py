@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exports', '0006_export_export_all_revisions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='export',
+            name='exported_rows',
+            field=models.PositiveIntegerField(default=0, verbose_name='Exported rows'),
+        ),
+        migrations.AddField(
+            model_name='export',
+            name='last_exported_pk',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Last exported pk'),
+        ),
+        migrations.AddField(
+            model_name='export',
+            name='task_id',
+            field=models.CharField(blank=True, default='', help_text='The id of the celery task writing the export file', max_length=50, verbose_name='Task id'),
+        ),
+        migrations.AddField(
+            model_name='export',
+            name='total_rows',
+            field=models.PositiveIntegerField(default=0, verbose_name='Total rows'),
+        ),
+        migrations.AddField(
+            model_name='export',
+            name='written_bytes',
+            field=models.BigIntegerField(default=0, verbose_name='Written bytes'),
+        ),
+    ]
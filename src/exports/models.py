@@ -55,6 +55,24 @@ class Export(models.Model):
         help_text=_("If False, only last revisions are included."),
     )
     created_on = models.DateTimeField(_("Created on"), default=timezone.now)
+    task_id = models.CharField(
+        _("Task id"),
+        max_length=50,
+        blank=True,
+        default="",
+        help_text=_("The id of the celery task writing the export file"),
+    )
+
+    # Checkpoint of the export, saved after each written chunk
+    total_rows = models.PositiveIntegerField(_("Total rows"), default=0)
+    exported_rows = models.PositiveIntegerField(_("Exported rows"), default=0)
+    last_exported_pk = models.PositiveIntegerField(
+        _("Last exported pk"), null=True, blank=True
+    )
+    written_bytes = models.BigIntegerField(_("Written bytes"), default=0)
+
+    # Only formats that can be appended to can resume from a checkpoint
+    RESUMABLE_FORMATS = (FORMATS.csv,)
 
     class Meta:
         app_label = "exports"
@@ -67,6 +85,17 @@ class Export(models.Model):
     def is_ready(self):
         return self.status == self.STATUSES.done
 
+    def get_progress(self):
+        """Return the percentage of exported rows."""
+        if self.is_ready():
+            return 100.0
+        if not self.total_rows:
+            return 0.0
+        return float(self.exported_rows) / self.total_rows * 100
+
+    def get_poll_url(self):
+        return reverse("task_poll", args=[self.task_id]) if self.task_id else ""
+
     def get_filters(self):
         """Parse querystring and returns a dict."""
         return QueryDict(self.querystring, mutable=True)
@@ -109,41 +138,113 @@ class Export(models.Model):
     def start_export(self, user_pk=None):
         """Asynchronously starts the export"""
         logger.info("Starting export {}".format(self.id))
-        process_export.delay(str(self.pk), user_pk=user_pk)
 
-    def csv_file_writer(self, data_generator, formatter):
-        with self.open_file() as the_file:
+        # The task id is known beforehand, so the progress can be polled
+        # as soon as the export is created
+        self.task_id = str(uuid.uuid4())
+        self.save(update_fields=["task_id"])
+        process_export.apply_async(
+            (str(self.pk),), {"user_pk": user_pk}, task_id=self.task_id
+        )
+
+    def csv_file_writer(self, data_generator, formatter, progress_callback=None):
+        with self.open_file(resume=self.can_resume()) as the_file:
             for data_chunk in data_generator:
                 the_file.write(formatter.format(data_chunk))
+                the_file.flush()
+                self.save_checkpoint(data_generator, the_file.tell(), progress_callback)
 
-    def xlsx_file_writer(self, data_generator, formatter):
-        wb = Workbook()
-        ws = wb.active
+    def xlsx_file_writer(self, data_generator, formatter, progress_callback=None):
+        # In write only mode, rows are flushed to a temporary file as they
+        # are appended instead of being kept in memory
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
         for data_chunk in data_generator:
-            formatted = formatter.format(data_chunk)
-            for el in formatted:
-                ws.append(el)
-        wb.save(self.get_filepath())
+            for row in formatter.format(data_chunk):
+                ws.append(row)
+            self.save_checkpoint(data_generator, 0, progress_callback)
+
+        with self.open_file() as the_file:
+            wb.save(the_file)
+
+    def write_file(self, progress_callback=None):
+        """Generates and write the file.
+
+        If a previous run was interrupted, the export is resumed from the
+        last checkpoint when the format allows it.
+
+        `progress_callback` is called with the progress percentage after
+        each written chunk.
+
+        """
+        if not self.can_resume():
+            self.reset_checkpoint()
 
-    def write_file(self):
-        """Generates and write the file."""
         data_generator = self.get_data_generator()
         formatter = self.get_data_formatter()
 
         file_writer_name = "{}_file_writer".format(self.format)
         file_writer = getattr(self, file_writer_name)
-        file_writer(data_generator, formatter)
+        file_writer(data_generator, formatter, progress_callback)
         logger.info("Import {} done".format(self.id))
 
-    def open_file(self):
-        """Opens the file in which data should be dumped."""
+    def can_resume(self):
+        """Can the file be completed from the last checkpoint?"""
+        if self.format not in self.RESUMABLE_FORMATS:
+            return False
+
+        if self.last_exported_pk is None:
+            return False
+
+        # Data not synced to disk before a crash would be lost
+        filepath = self.get_filepath()
+        return (
+            os.path.exists(filepath)
+            and os.path.getsize(filepath) >= self.written_bytes
+        )
+
+    def reset_checkpoint(self):
+        self.exported_rows = 0
+        self.last_exported_pk = None
+        self.written_bytes = 0
+        self.save(update_fields=["exported_rows", "last_exported_pk", "written_bytes"])
+
+    def save_checkpoint(self, data_generator, written_bytes, progress_callback=None):
+        """Save how far the export went after a chunk was written."""
+        self.total_rows = data_generator.total
+        self.exported_rows = data_generator.start
+        self.last_exported_pk = data_generator.last_pk
+        self.written_bytes = written_bytes
+        self.save(
+            update_fields=[
+                "total_rows",
+                "exported_rows",
+                "last_exported_pk",
+                "written_bytes",
+            ]
+        )
+        if progress_callback:
+            progress_callback(self.get_progress())
+
+    def open_file(self, resume=False):
+        """Opens the file in which data should be dumped.
+
+        When resuming, data written after the last checkpoint is discarded.
+
+        """
 
         # Create the export dir if it does not exist
         export_dir = self.get_filedir()
         if not os.path.exists(export_dir):
             os.makedirs(export_dir)
 
-        return open(self.get_filepath(), "wb")
+        if not resume:
+            return open(self.get_filepath(), "wb")
+
+        the_file = open(self.get_filepath(), "r+b")
+        the_file.seek(self.written_bytes)
+        the_file.truncate()
+        return the_file
 
     def get_data_generator(self):
         """Returns a generator that yields chunks of data to export."""
@@ -155,6 +256,8 @@ class Export(models.Model):
             self.get_fields(),
             owner=self.owner,
             export_all_revisions=self.export_all_revisions,
+            last_pk=self.last_exported_pk,
+            offset=self.exported_rows,
         )
         return generator
 
@@ -1,4 +1,5 @@
 from django.conf import settings
+from celery import current_task
 
 from core.celery import app
 
@@ -7,11 +8,19 @@ from audit_trail.models import Activity
 from audit_trail.signals import activity_log
 
 
-@app.task
+def report_progress(progress):
+    current_task.update_state(state="PROGRESS", meta={"progress": progress})
+
+
+# Since the export is checkpointed, a task interrupted by a worker crash
+# is redelivered and resumes where it stopped
+@app.task(acks_late=True, reject_on_worker_lost=True)
 def process_export(export_id, user_pk=None):
     from exports.models import Export
 
     export = Export.objects.select_related().get(id=export_id)
+    if export.is_ready():
+        return
 
     # Cleanup oldest export when there are too many
     owner = export.owner
@@ -26,7 +35,7 @@ def process_export(export_id, user_pk=None):
     user = User.objects.get(pk=user_pk)
     export.status = "processing"
     export.save()
-    export.write_file()
+    export.write_file(progress_callback=report_progress)
     export.status = "done"
     export.save()
     activity_log.send(
@@ -3,6 +3,8 @@ from collections import OrderedDict
 from django.test import TestCase
 from django.contrib.contenttypes.models import ContentType
 
+from mock import patch
+
 from accounts.factories import UserFactory
 from documents.factories import DocumentFactory
 from categories.factories import CategoryFactory
@@ -11,7 +13,8 @@ from default_documents.factories import (
     ContractorDeliverableRevisionFactory,
 )
 from default_documents.models import ContractorDeliverable
-from exports.formatters import CSVFormatter
+from exports.formatters import CSVFormatter, XLSXFormatter
+from transmittals.utils import FieldWrapper
 
 
 class FormatterTests(TestCase):
@@ -60,3 +63,72 @@ class FormatterTests(TestCase):
         csv = formatter.format([revision])
         expected_csv = "{};Grand Schtroumpf\n".format(metadata.document_key).encode()
         self.assertEqual(csv, expected_csv)
+
+    def test_xlsx_formatter_keeps_typed_values(self):
+        fields = OrderedDict(
+            (
+                ("Document Number", "document_key"),
+                ("Created on", "created_on"),
+                ("Leader", "leader"),
+            )
+        )
+        formatter = XLSXFormatter(fields)
+        revision = self.revisions[0]
+        rows = formatter.format([revision])
+        self.assertEqual(
+            rows,
+            [
+                [
+                    self.docs[0].document_key,
+                    revision.created_on,
+                    "",
+                ]
+            ],
+        )
+
+
+class LegacyCSVFormatter(CSVFormatter):
+    """Former implementation, wrapping each revision in a `FieldWrapper`."""
+
+    def prepare_data(self, doc):
+        if isinstance(doc, list):
+            return doc
+        doc = FieldWrapper((doc, doc.metadata, doc.metadata.document))
+        return [self.get_field(doc, field) for field in self.fields.values()]
+
+    def get_field(self, doc, field):
+        data = getattr(doc, field, "")
+        if callable(data):
+            data = data()
+        return self.format_value(data)
+
+
+class PrecompiledAccessorsTests(TestCase):
+    def setUp(self):
+        Model = ContentType.objects.get_for_model(ContractorDeliverable)
+        self.category = CategoryFactory(category_template__metadata_model=Model)
+        self.revisions = [
+            DocumentFactory(
+                metadata_factory_class=ContractorDeliverableFactory,
+                revision_factory_class=ContractorDeliverableRevisionFactory,
+                category=self.category,
+            ).get_latest_revision()
+            for i in range(0, 20)
+        ]
+        self.fields = ContractorDeliverable.PhaseConfig.export_fields
+
+    def test_precompiled_accessors_output(self):
+        formatter = CSVFormatter(self.fields)
+        legacy_formatter = LegacyCSVFormatter(self.fields)
+        self.assertEqual(
+            formatter.format(self.revisions), legacy_formatter.format(self.revisions)
+        )
+
+    def test_accessors_are_compiled_once_per_class(self):
+        formatter = CSVFormatter(self.fields)
+        with patch.object(
+            formatter, "compile_field", wraps=formatter.compile_field
+        ) as compile_mock:
+            formatter.format(self.revisions)
+            formatter.format(self.revisions)
+        self.assertEqual(compile_mock.call_count, len(self.fields))
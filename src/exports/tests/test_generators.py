@@ -54,6 +54,32 @@ class ExportGeneratorTests(TestCase):
         with self.assertRaises(StopIteration):
             chunk = next(iterator)
 
+    @override_settings(EXPORTS_CHUNK_SIZE=5)
+    def test_generator_consumes_search_results_lazily(self):
+        pks, _ = self.es_mock.return_value
+        consumed = []
+
+        def lazy_pks():
+            for pk in pks:
+                consumed.append(pk)
+                yield pk
+
+        generator = ExportGenerator(self.category, {}, {})
+        generator.get_es_results = MagicMock(return_value=(lazy_pks(), len(pks)))
+        iterator = iter(generator)
+        next(iterator)  # header
+        self.assertEqual(len(consumed), 0)
+
+        chunk = next(iterator)
+        self.assertEqual(chunk.count(), 5)
+        self.assertEqual(len(consumed), 5)
+
+    @override_settings(EXPORTS_CHUNK_SIZE=5)
+    def test_generator_does_not_cap_results(self):
+        filters = {"size": 10}
+        ExportGenerator(self.category, filters, {})
+        self.assertEqual(filters["size"], 5)
+
     def test_csv_generator_header(self):
         fields = OrderedDict((("Title", "title"), ("Document number", "document_key")))
         generator = CSVGenerator(self.category, {}, fields)
@@ -1,14 +1,26 @@
 import datetime
+import shutil
+import tempfile
 from uuid import UUID
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.contrib.contenttypes.models import ContentType
+from mock import patch
 from django.utils.timezone import utc
 
 from categories.factories import CategoryFactory
 from accounts.factories import UserFactory
+from documents.factories import DocumentFactory
+from default_documents.factories import (
+    ContractorDeliverableFactory,
+    ContractorDeliverableRevisionFactory,
+)
+from default_documents.models import ContractorDeliverable
 from exports.factories import ExportFactory
 from exports.generators import ExportGenerator
-from exports.formatters import CSVFormatter
+from exports.formatters import CSVFormatter, XLSXFormatter
+from openpyxl import Workbook, load_workbook
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
 
 
 class ExportTests(TestCase):
@@ -53,3 +65,172 @@ class ExportTests(TestCase):
         self.assertEqual(filters["toto"], "riri")
         self.assertEqual(filters["tata"], "fifi")
         self.assertEqual(filters["tutu"], "loulou")
+
+
+class RowsGenerator(object):
+    """Yields chunks of fake rows, the same way `ExportGenerator` does."""
+
+    def __init__(self, nb_rows, chunk_size=150):
+        self.total = nb_rows
+        self.chunk_size = chunk_size
+        self.start = 0
+        self.last_pk = None
+
+    def __iter__(self):
+        yield [["Document Number", "Title", "Created on", "Revision"]]
+        for start in range(0, self.total, self.chunk_size):
+            end = min(start + self.chunk_size, self.total)
+            self.start = end
+            self.last_pk = end
+            yield [
+                [
+                    "DOC-{:06}".format(i),
+                    "Some document title {}".format(i),
+                    datetime.date(2015, 1, 1),
+                    i,
+                ]
+                for i in range(start, end)
+            ]
+
+
+class XLSXFileWriterTests(TestCase):
+    def setUp(self):
+        self.private_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.private_root)
+        category = CategoryFactory()
+        self.export = ExportFactory(
+            owner=UserFactory(category=category), category=category, format="xlsx"
+        )
+        self.formatter = XLSXFormatter({})
+
+    def write_file(self, nb_rows):
+        with override_settings(PRIVATE_ROOT=self.private_root):
+            self.export.xlsx_file_writer(RowsGenerator(nb_rows), self.formatter)
+            return self.export.get_filepath()
+
+    def test_cells_are_typed(self):
+        filepath = self.write_file(3)
+        ws = load_workbook(filepath, read_only=True).active
+        rows = list(ws.values)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0][0], "Document Number")
+        self.assertEqual(rows[1][0], "DOC-000000")
+        self.assertEqual(rows[2][2], datetime.datetime(2015, 1, 1))
+        self.assertEqual(rows[3][3], 2)
+
+    @patch("exports.models.Workbook", wraps=Workbook)
+    def test_rows_are_streamed_to_a_write_only_workbook(self, workbook_mock):
+        append = WriteOnlyWorksheet.append
+        appended_rows = []
+
+        def track_append(worksheet, row):
+            appended_rows.append(row)
+            append(worksheet, row)
+
+        class TrackingRowsGenerator(RowsGenerator):
+            """Record the number of written rows when each chunk is built."""
+
+            written_rows = []
+
+            def __iter__(self):
+                for chunk in super(TrackingRowsGenerator, self).__iter__():
+                    self.written_rows.append(len(appended_rows))
+                    yield chunk
+
+        data_generator = TrackingRowsGenerator(5, chunk_size=2)
+        with patch.object(
+            WriteOnlyWorksheet, "append", autospec=True, side_effect=track_append
+        ), override_settings(PRIVATE_ROOT=self.private_root):
+            self.export.xlsx_file_writer(data_generator, self.formatter)
+
+        workbook_mock.assert_called_once_with(write_only=True)
+        # Every chunk is written before the next one is built
+        self.assertEqual(data_generator.written_rows, [0, 1, 3, 5])
+        self.assertEqual(len(appended_rows), 6)
+
+
+class ExportInterrupted(Exception):
+    pass
+
+
+@override_settings(EXPORTS_CHUNK_SIZE=2)
+class ResumableExportTests(TestCase):
+    def setUp(self):
+        self.private_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.private_root)
+        settings_override = override_settings(PRIVATE_ROOT=self.private_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        Model = ContentType.objects.get_for_model(ContractorDeliverable)
+        category = CategoryFactory(category_template__metadata_model=Model)
+        self.docs = [
+            DocumentFactory(
+                metadata_factory_class=ContractorDeliverableFactory,
+                revision_factory_class=ContractorDeliverableRevisionFactory,
+                category=category,
+            )
+            for i in range(0, 5)
+        ]
+        self.pks = sorted(doc.latest_revision.pk for doc in self.docs)
+        self.export = ExportFactory(
+            owner=UserFactory(category=category), category=category, format="csv"
+        )
+
+        es_patcher = patch.object(
+            ExportGenerator,
+            "get_es_results",
+            autospec=True,
+            side_effect=self.get_es_results,
+        )
+        es_patcher.start()
+        self.addCleanup(es_patcher.stop)
+
+    def get_es_results(self, generator):
+        last_pk = generator.last_pk
+        pks = [pk for pk in self.pks if last_pk is None or pk > last_pk]
+        return pks, len(self.pks)
+
+    def read_file(self):
+        with open(self.export.get_filepath(), "rb") as the_file:
+            return the_file.read()
+
+    def test_progress(self):
+        progress = []
+        self.export.write_file(progress_callback=progress.append)
+        self.assertEqual(progress, [0.0, 40.0, 80.0, 100.0])
+        self.assertEqual(self.export.exported_rows, 5)
+        self.assertEqual(self.export.last_exported_pk, self.pks[-1])
+        self.assertEqual(self.export.written_bytes, len(self.read_file()))
+
+    def test_resume_interrupted_export(self):
+        self.export.write_file()
+        expected = self.read_file()
+
+        def interrupt(progress):
+            if progress > 50:
+                raise ExportInterrupted()
+
+        self.export.reset_checkpoint()
+        with self.assertRaises(ExportInterrupted):
+            self.export.write_file(progress_callback=interrupt)
+
+        # Simulate data that was written after the last checkpoint
+        with open(self.export.get_filepath(), "ab") as the_file:
+            the_file.write(b"garbage")
+
+        self.export.refresh_from_db()
+        self.assertEqual(self.export.exported_rows, 4)
+        self.assertTrue(self.export.can_resume())
+
+        self.export.write_file()
+        self.assertEqual(self.read_file(), expected)
+
+    def test_xlsx_exports_are_not_resumed(self):
+        self.export.format = "xlsx"
+        self.export.exported_rows = 4
+        self.export.last_exported_pk = self.pks[3]
+        self.assertFalse(self.export.can_resume())
+
+        self.export.write_file()
+        self.assertEqual(self.export.exported_rows, 5)
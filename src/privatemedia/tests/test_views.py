@@ -1,8 +1,13 @@
-from django.test import TestCase, override_settings
+import io
+import os
+import zipfile
+
+from django.test import RequestFactory, TestCase, override_settings
 from django.http import Http404, HttpResponse
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
 
-from privatemedia.views import serve_model_file_field
+from privatemedia.views import serve_model_file_field, StreamingZipView
 from accounts.factories import UserFactory
 from categories.factories import CategoryFactory
 from documents.factories import DocumentFactory
@@ -40,3 +45,73 @@ class PrivateMediaViewTests(TestCase):
         res = serve_model_file_field(self.rev, "pdf_file")
         self.assertTrue(isinstance(res, HttpResponse))
         self.assertTrue("X-Accel-Redirect" in res)
+
+
+class TrackedFile(ContentFile):
+    """A file which records when it's opened."""
+
+    def __init__(self, content, name, opened):
+        super(TrackedFile, self).__init__(content, name=name)
+        self.opened = opened
+
+    def open(self, mode=None):
+        self.opened.append(self.name)
+        return super(TrackedFile, self).open(mode)
+
+
+class StreamingZipViewTests(TestCase):
+    def setUp(self):
+        self.opened = []
+        self.text = b"Lorem ipsum dolor sit amet. " * 10000
+        self.pdf = os.urandom(300 * 1024)
+        self.files = [
+            TrackedFile(self.text, "comments/review.txt", self.opened),
+            TrackedFile(self.pdf, "comments/review.pdf", self.opened),
+        ]
+
+    def get_view(self, files):
+        class ZipView(StreamingZipView):
+            zipfile_name = "comments.zip"
+            chunk_size = 16 * 1024
+
+            def get_files(self):
+                return files
+
+        return ZipView.as_view()
+
+    def test_archive_content(self):
+        request = RequestFactory().get("/")
+        response = self.get_view(self.files)(request)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        self.assertEqual(
+            response["Content-Disposition"], "attachment; filename=comments.zip"
+        )
+
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(
+            archive.namelist(), ["comments/review.txt", "comments/review.pdf"]
+        )
+        self.assertEqual(archive.read("comments/review.txt"), self.text)
+        self.assertEqual(archive.read("comments/review.pdf"), self.pdf)
+
+        text_info = archive.getinfo("comments/review.txt")
+        self.assertEqual(text_info.compress_type, zipfile.ZIP_DEFLATED)
+        self.assertLess(text_info.compress_size, text_info.file_size)
+        pdf_info = archive.getinfo("comments/review.pdf")
+        self.assertEqual(pdf_info.compress_type, zipfile.ZIP_STORED)
+
+    def test_archive_is_streamed(self):
+        chunks = StreamingZipView(chunk_size=16 * 1024).iter_archive(self.files)
+
+        # First bytes are sent before reading the whole first file
+        first_chunk = next(chunks)
+        self.assertTrue(first_chunk.startswith(b"PK"))
+        self.assertEqual(self.opened, ["comments/review.txt"])
+
+        # Memory usage is bounded by the chunk size
+        sizes = [len(chunk) for chunk in chunks]
+        self.assertEqual(self.opened, ["comments/review.txt", "comments/review.pdf"])
+        self.assertGreater(len(sizes), 300 / 16)
+        self.assertLess(max(sizes), 17 * 1024)
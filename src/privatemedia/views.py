@@ -1,12 +1,14 @@
 import os
-from os.path import basename, join
+import time
+import zipfile
+from os.path import basename, join, splitext
 
 try:
     from urllib.parse import unquote
 except ImportError:
     from urllib.parse import unquote
 
-from django.http import Http404, HttpResponse
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.http.request import HttpRequest
 from django.core.exceptions import ImproperlyConfigured
 from django.views.static import serve
@@ -85,3 +87,93 @@ class ProtectedDownload(LoginRequiredMixin, View):
             return response
         else:
             return serve(request, full_path, document_root=settings.PROTECTED_ROOT)
+
+
+class ZipStream:
+    """A write only file object for `ZipFile`.
+
+    Written data is buffered until it's consumed with `pop`. Since the
+    stream is not seekable, `ZipFile` uses data descriptors to write entry
+    sizes and checksums after the entry data.
+
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class StreamingZipView(View):
+    """Zip several files, and send the archive while it's being built.
+
+    Files are read in chunks and sent as soon as they are compressed, so
+    memory usage does not depend on the archive size.
+
+    Already compressed files (see `stored_extensions`) are stored in the
+    archive without compression.
+
+    """
+
+    http_method_names = ["get"]
+    zipfile_name = "download.zip"
+    chunk_size = 64 * 1024
+    stored_extensions = (".pdf", ".zip", ".jpg", ".jpeg", ".png")
+
+    def get_files(self):
+        """Must return a list of django's `File` (or `FieldFile`) objects."""
+        raise NotImplementedError()
+
+    def get_archive_name(self, request):
+        return self.zipfile_name
+
+    def get_compress_type(self, file_):
+        extension = splitext(file_.name)[1].lower()
+        if extension in self.stored_extensions:
+            return zipfile.ZIP_STORED
+        return zipfile.ZIP_DEFLATED
+
+    def get_zip_info(self, file_):
+        zip_info = zipfile.ZipInfo(file_.name, time.localtime()[:6])
+        zip_info.compress_type = self.get_compress_type(file_)
+        # Large files need zip64 extensions, and ZipFile cannot know the
+        # file size beforehand
+        zip_info.file_size = file_.size
+        return zip_info
+
+    def iter_archive(self, files):
+        """Yield the archive data, chunk by chunk."""
+        stream = ZipStream()
+        with zipfile.ZipFile(stream, mode="w") as zip_file:
+            for file_ in files:
+                with file_.open("rb"):
+                    with zip_file.open(self.get_zip_info(file_), mode="w") as entry:
+                        for chunk in file_.chunks(self.chunk_size):
+                            entry.write(chunk)
+                            data = stream.pop()
+                            if data:
+                                yield data
+                yield stream.pop()
+
+        # Central directory
+        yield stream.pop()
+
+    def get(self, request, *args, **kwargs):
+        files = self.get_files()
+        response = StreamingHttpResponse(
+            self.iter_archive(files), content_type="application/zip"
+        )
+        response["Content-Disposition"] = "attachment; filename=%s" % (
+            self.get_archive_name(request)
+        )
+        return response
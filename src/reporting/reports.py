@@ -0,0 +1,145 @@
+"""Data of the category reporting page.
+
+Every chart of the page is computed at once and cached per category, until
+one of the category's documents is updated.
+
+"""
+import datetime
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldError
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+from reporting.workload import get_workload_cache_key
+
+
+def get_report_cache_key(category_id):
+    return "category_report_{}".format(category_id)
+
+
+def delete_report_cache(category_ids):
+    """Invalidate the cached reports of the given categories.
+
+    As for distribution lists, the cache is cleared again once the current
+    transaction is committed.
+
+    """
+    cache_keys = []
+    for category_id in set(category_ids):
+        cache_keys += [
+            get_report_cache_key(category_id),
+            get_workload_cache_key(category_id),
+        ]
+    cache.delete_many(cache_keys)
+    transaction.on_commit(lambda: cache.delete_many(cache_keys))
+
+
+def get_category_report(category):
+    """Return the (cached) reporting data of the category."""
+    cache_key = get_report_cache_key(category.id)
+    report = cache.get(cache_key)
+    if report is None:
+        report = compute_category_report(category)
+        cache.set(cache_key, report, settings.REPORTING_CACHE_TIMEOUT)
+    return report
+
+
+def compute_category_report(category):
+    metadata_class = category.document_class()
+    revision_class = category.revision_class()
+    documents = metadata_class.objects.filter(document__category=category)
+    revisions = revision_class.objects.filter(metadata__document__category=category)
+
+    report = get_documents_stats(documents, revision_class)
+    report.update(
+        {
+            "by_month": get_monthly_series(revisions, "received_date"),
+            "by_ended_reviews": get_monthly_series(revisions, "review_end_date"),
+        }
+    )
+    return report
+
+
+def get_documents_stats(documents, revision_class):
+    """Count documents by status, return code and number of revisions.
+
+    Everything is fetched with a single query returning one row per document.
+
+    """
+    related_name = revision_class.__name__.lower()
+    fields = ["latest_revision__status", "latest_revision__return_code"]
+    try:
+        rows = list(
+            documents.values_list("pk", *fields)
+            .annotate(nb_rev=Count(related_name))
+            .order_by()
+        )
+        has_return_codes = True
+    except FieldError:
+        # Not all document types have return codes
+        rows = [
+            (pk, status, None, nb_rev)
+            for pk, status, nb_rev in documents.values_list("pk", fields[0])
+            .annotate(nb_rev=Count(related_name))
+            .order_by()
+        ]
+        has_return_codes = False
+
+    by_status = Counter(row[1] for row in rows)
+    by_rc = Counter(row[2] for row in rows)
+    by_revs = Counter(row[3] for row in rows)
+    return {
+        "by_status": build_list(by_status),
+        "by_rc": build_list(by_rc) if has_return_codes else [],
+        "by_revs": build_list(by_revs),
+    }
+
+
+def get_monthly_series(revisions, date_field):
+    """Count revisions by month of the given date field."""
+    try:
+        counts = (
+            revisions.exclude(**{date_field: None})
+            .annotate(month=TruncMonth(date_field))
+            .values_list("month")
+            .annotate(Count("pk"))
+            .order_by()
+        )
+        counts = dict(counts)
+    except FieldError:
+        return []
+    return build_monthly_series(counts)
+
+
+def build_list(values):
+    """Convert a Counter to the format expected by charts."""
+    return [
+        {"value": key or "None", "count": count}
+        for key, count in sorted(
+            values.items(), key=lambda item: (item[0] is None, item[0])
+        )
+    ]
+
+
+def build_monthly_series(counts):
+    """Convert a {month: count} dict to a continuous monthly series.
+
+    Missing months between the first and the last one are filled with 0.
+
+    """
+    if not counts:
+        return []
+
+    first_month = min(counts)
+    last_month = max(counts)
+    year, month = first_month.year, first_month.month
+    series = []
+    while (year, month) <= (last_month.year, last_month.month):
+        value = counts.get(datetime.date(year, month, 1), 0)
+        series.append({"month": month, "year": year, "value": value})
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return series
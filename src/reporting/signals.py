@@ -0,0 +1,32 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from documents.models import Document
+from documents.signals import documents_batch_updated
+from reporting.reports import delete_report_cache
+
+
+def delete_document_report_cache(sender, instance, **kwargs):
+    delete_report_cache([instance.category_id])
+
+
+post_save.connect(
+    delete_document_report_cache,
+    sender=Document,
+    dispatch_uid="delete_report_cache_on_save",
+)
+post_delete.connect(
+    delete_document_report_cache,
+    sender=Document,
+    dispatch_uid="delete_report_cache_on_delete",
+)
+
+
+@receiver(documents_batch_updated, dispatch_uid="delete_batch_report_cache")
+def delete_batch_report_cache(sender, document_ids, **kwargs):
+    category_ids = (
+        Document.objects.filter(pk__in=document_ids)
+        .values_list("category_id", flat=True)
+        .distinct()
+    )
+    delete_report_cache(category_ids)
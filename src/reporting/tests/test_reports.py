@@ -0,0 +1,104 @@
+import datetime
+import json
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.factories import UserFactory
+from categories.factories import CategoryFactory
+from documents.factories import DocumentFactory
+from reporting.reports import (
+    build_monthly_series,
+    compute_category_report,
+    get_category_report,
+)
+
+
+class MonthlySeriesTests(TestCase):
+    def test_empty_series(self):
+        self.assertEqual(build_monthly_series({}), [])
+
+    def test_missing_months_are_filled(self):
+        series = build_monthly_series(
+            {datetime.date(2019, 11, 1): 3, datetime.date(2020, 2, 1): 1}
+        )
+        self.assertEqual(
+            series,
+            [
+                {"month": 11, "year": 2019, "value": 3},
+                {"month": 12, "year": 2019, "value": 0},
+                {"month": 1, "year": 2020, "value": 0},
+                {"month": 2, "year": 2020, "value": 1},
+            ],
+        )
+
+
+class CategoryReportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = CategoryFactory()
+        self.category.category_template.display_reporting = True
+        self.category.category_template.save()
+        self.user = UserFactory(password="pass", category=self.category)
+
+    def create_document(self, received_date, status="STD", **kwargs):
+        return DocumentFactory(
+            category=self.category,
+            revision={"received_date": received_date, "status": status},
+            **kwargs
+        )
+
+    def test_report(self):
+        self.create_document(datetime.date(2020, 1, 10))
+        self.create_document(datetime.date(2020, 1, 20), status="IFA")
+        self.create_document(datetime.date(2020, 3, 1), status="IFA")
+
+        report = compute_category_report(self.category)
+        self.assertEqual(
+            report["by_status"],
+            [{"value": "IFA", "count": 2}, {"value": "STD", "count": 1}],
+        )
+        self.assertEqual(report["by_revs"], [{"value": 1, "count": 3}])
+        self.assertEqual(
+            [month["value"] for month in report["by_month"]], [2, 0, 1]
+        )
+        self.assertEqual(report["by_ended_reviews"], [])
+
+    def test_queries_do_not_depend_on_documents(self):
+        for i in range(5):
+            self.create_document(datetime.date(2020, i + 1, 1))
+
+        with self.assertNumQueries(3):
+            compute_category_report(self.category)
+
+    def test_report_is_cached(self):
+        self.create_document(datetime.date(2020, 1, 10))
+        get_category_report(self.category)
+
+        with self.assertNumQueries(0):
+            report = get_category_report(self.category)
+        self.assertEqual(report["by_status"], [{"value": "STD", "count": 1}])
+
+    def test_cache_is_cleared_on_document_updates(self):
+        document = self.create_document(datetime.date(2020, 1, 10))
+        get_category_report(self.category)
+
+        revision = document.latest_revision
+        revision.status = "IFA"
+        revision.save()
+        document.save()
+        report = get_category_report(self.category)
+        self.assertEqual(report["by_status"], [{"value": "IFA", "count": 1}])
+
+    def test_report_data_view(self):
+        self.create_document(datetime.date(2020, 1, 10))
+        self.client.login(username=self.user.email, password="pass")
+        url = reverse(
+            "category_report_data",
+            args=[self.category.organisation.slug, self.category.slug],
+        )
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        report = json.loads(res.content)
+        self.assertEqual(report["by_month"], [{"month": 1, "year": 2020, "value": 1}])
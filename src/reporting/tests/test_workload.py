@@ -0,0 +1,129 @@
+import datetime
+import json
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.factories import UserFactory
+from categories.factories import CategoryFactory
+from documents.factories import DocumentFactory
+from reporting.workload import compute_reviewer_workload, get_reviewer_workload
+
+
+class ReviewerWorkloadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = CategoryFactory()
+        self.category.category_template.display_reporting = True
+        self.category.category_template.save()
+        self.reviewer = UserFactory(
+            name="Reviewer", password="pass", category=self.category
+        )
+        self.other_reviewer = UserFactory(name="Other", category=self.category)
+        self.leader = UserFactory(name="Leader", category=self.category)
+        self.approver = UserFactory(name="Approver", category=self.category)
+        self.url = reverse(
+            "category_workload",
+            args=[self.category.organisation.slug, self.category.slug],
+        )
+
+    def create_revision(self, start_review=True, **kwargs):
+        revision = {
+            "reviewers": [self.reviewer, self.other_reviewer],
+            "leader": self.leader,
+            "approver": self.approver,
+            "received_date": datetime.date.today(),
+        }
+        revision.update(kwargs)
+        doc = DocumentFactory(category=self.category, revision=revision)
+        if start_review:
+            doc.latest_revision.start_review()
+        return doc.latest_revision
+
+    def get_user_workload(self, workload, user):
+        return next(item for item in workload if item["id"] == user.id)
+
+    def test_workload(self):
+        self.create_revision()
+        self.create_revision(approver=None)
+        overdue = self.create_revision(reviewers=[self.reviewer])
+        overdue.__class__.objects.filter(pk=overdue.pk).update(
+            review_due_date=datetime.date.today() - datetime.timedelta(days=1)
+        )
+
+        # Not under review
+        self.create_revision(start_review=False)
+        ended = self.create_revision()
+        ended.end_review()
+
+        workload = compute_reviewer_workload(self.category)
+        self.assertEqual(
+            [item["name"] for item in workload],
+            ["Approver", "Leader", "Other", "Reviewer"],
+        )
+
+        reviewer = self.get_user_workload(workload, self.reviewer)
+        self.assertEqual(reviewer["under_review"], 3)
+        self.assertEqual(reviewer["overdue"], 1)
+        self.assertEqual(reviewer["roles"]["reviewer"]["under_review"], 3)
+        self.assertEqual(reviewer["roles"]["leader"]["under_review"], 0)
+
+        leader = self.get_user_workload(workload, self.leader)
+        self.assertEqual(leader["under_review"], 3)
+        self.assertEqual(leader["roles"]["leader"]["overdue"], 1)
+
+        approver = self.get_user_workload(workload, self.approver)
+        self.assertEqual(approver["under_review"], 2)
+
+        other_reviewer = self.get_user_workload(workload, self.other_reviewer)
+        self.assertEqual(other_reviewer["under_review"], 2)
+        self.assertEqual(other_reviewer["overdue"], 0)
+
+    def test_revisions_are_counted_once_per_user(self):
+        revision = self.create_revision()
+        overdue = self.create_revision()
+        overdue.__class__.objects.filter(pk=overdue.pk).update(
+            review_due_date=datetime.date.today() - datetime.timedelta(days=1)
+        )
+        # The leader is also the approver of both revisions
+        revision.__class__.objects.update(approver=self.leader)
+
+        workload = compute_reviewer_workload(self.category)
+        leader = self.get_user_workload(workload, self.leader)
+        self.assertEqual(leader["under_review"], 2)
+        self.assertEqual(leader["overdue"], 1)
+        self.assertEqual(leader["roles"]["leader"]["under_review"], 2)
+        self.assertEqual(leader["roles"]["approver"]["under_review"], 2)
+        self.assertEqual(leader["roles"]["approver"]["overdue"], 1)
+
+    def test_queries_do_not_depend_on_users(self):
+        for i in range(3):
+            self.create_revision()
+
+        with self.assertNumQueries(2):
+            compute_reviewer_workload(self.category)
+
+    def test_workload_is_cached(self):
+        self.create_revision()
+        get_reviewer_workload(self.category)
+
+        with self.assertNumQueries(0):
+            workload = get_reviewer_workload(self.category)
+        self.assertEqual(len(workload), 4)
+
+    def test_workload_view(self):
+        self.create_revision()
+        self.client.login(username=self.reviewer.email, password="pass")
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        workload = json.loads(res.content)
+        leader = self.get_user_workload(workload, self.leader)
+        self.assertEqual(leader["under_review"], 1)
+
+    def test_workload_view_with_disabled_display_reporting(self):
+        self.category.category_template.display_reporting = False
+        self.category.category_template.save()
+        self.client.login(username=self.reviewer.email, password="pass")
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 404)
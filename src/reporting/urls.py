@@ -1,10 +1,20 @@
 from django.urls import path
 
-from .views import Report
+from .views import Report, ReportData, ReviewerWorkload
 
 urlpatterns = [
     # Reports page
     path(
         "<slug:organisation>/<slug:category>/", Report.as_view(), name="category_report"
     ),
+    path(
+        "<slug:organisation>/<slug:category>/data/",
+        ReportData.as_view(),
+        name="category_report_data",
+    ),
+    path(
+        "<slug:organisation>/<slug:category>/workload/",
+        ReviewerWorkload.as_view(),
+        name="category_workload",
+    ),
 ]
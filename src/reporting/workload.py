@@ -0,0 +1,119 @@
+"""Review workload of a category's users.
+
+Counts by role are computed with a single grouped query, and totals with
+a second one, instead of counting revisions for every single user.
+
+"""
+import datetime
+import functools
+import operator
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldError
+from django.db.models import CharField, Count, OuterRef, Q, Subquery, Value
+
+ROLES = ("reviewer", "leader", "approver")
+
+# Revision field holding the users of each role
+ROLE_FIELDS = {
+    "reviewer": "reviewers",
+    "leader": "leader",
+    "approver": "approver",
+}
+
+
+def get_workload_cache_key(category_id):
+    return "reviewer_workload_{}".format(category_id)
+
+
+def get_reviewer_workload(category):
+    """Return the (cached) review workload of the category's users."""
+    cache_key = get_workload_cache_key(category.id)
+    workload = cache.get(cache_key)
+    if workload is None:
+        workload = compute_reviewer_workload(category)
+        cache.set(cache_key, workload, settings.REPORTING_CACHE_TIMEOUT)
+    return workload
+
+
+def compute_reviewer_workload(category, at_date=None):
+    """Count revisions under review for each user of the category.
+
+    Return a list of dicts, one per user with at least one revision under
+    review, with the number of revisions under review and overdue, in total
+    and by role in the distribution list.
+
+    """
+    today = at_date or datetime.date.today()
+    try:
+        revisions = (
+            category.revision_class()
+            .objects.filter(metadata__document__category=category)
+            .filter(review_start_date__isnull=False)
+            .filter(review_end_date=None)
+        )
+    except FieldError:
+        # Documents of this category cannot be reviewed
+        return []
+
+    # One "GROUP BY user" query per role, sent as a single union
+    role_counts = [
+        revisions.filter(**{"{}__isnull".format(field): False})
+        .values_list(field)
+        .annotate(
+            role=Value(role, output_field=CharField()),
+            under_review=Count("pk"),
+            overdue=Count("pk", filter=Q(review_due_date__lt=today)),
+        )
+        .order_by()
+        for role, field in ROLE_FIELDS.items()
+    ]
+    rows = role_counts[0].union(*role_counts[1:], all=True)
+
+    # A user can hold several roles on the same revision, so totals cannot be
+    # summed from the counts by role, and distinct revisions are counted
+    in_distribution_list = functools.reduce(
+        operator.or_,
+        (Q(**{field: OuterRef("pk")}) for field in ROLE_FIELDS.values()),
+    )
+    user_revisions = (
+        revisions.filter(in_distribution_list)
+        .values("metadata__document__category")
+        .order_by()
+    )
+    under_review = user_revisions.annotate(total=Count("pk", distinct=True))
+    overdue = user_revisions.annotate(
+        total=Count("pk", distinct=True, filter=Q(review_due_date__lt=today))
+    )
+    users = {
+        user_id: (name, under_review, overdue)
+        for user_id, name, under_review, overdue in category.users.annotate(
+            under_review=Subquery(under_review.values("total")),
+            overdue=Subquery(overdue.values("total")),
+        ).values_list("id", "name", "under_review", "overdue")
+    }
+
+    workload = {}
+    for user_id, role, under_review, overdue in rows:
+        if user_id not in users:
+            continue
+
+        if user_id not in workload:
+            name, total_under_review, total_overdue = users[user_id]
+            workload[user_id] = {
+                "id": user_id,
+                "name": name,
+                "under_review": total_under_review or 0,
+                "overdue": total_overdue or 0,
+                "roles": {
+                    role: {"under_review": 0, "overdue": 0} for role in ROLES
+                },
+            }
+        user_workload = workload[user_id]
+        user_workload["roles"][role] = {
+            "under_review": under_review,
+            "overdue": overdue,
+        }
+
+    return sorted(workload.values(), key=lambda user: user["name"])
@@ -139,8 +139,8 @@ class ReviewFormMixin(DistributionListValidationMixin, forms.ModelForm):
             # Is the current user a member of the distribution list?
             self.can_discuss = False
             if self.request:
-                reviewers = [review.reviewer for review in self.reviews]
-                self.can_discuss = self.request.user in reviewers
+                reviewers = [review.reviewer_id for review in self.reviews]
+                self.can_discuss = self.request.user.id in reviewers
 
         super(ReviewFormMixin, self).prepare_form(*args, **kwargs)
 
@@ -11,11 +11,9 @@ class ReviewsLayout(LayoutObject):
         revision = form.instance
         reviews = form.reviews
         # We need to have the list sorted by role and by insertion order
-        # for reviewsers. We sort the review list in two steps, (python lists
-        # retains their original order). First we sort items according to their
-        #  pk, then according to the role name in order to get Reviewers,
-        # then the Leader and finally The Approver (R, L, A)
-        reviews.sort(key=operator.attrgetter("created_on"))
+        # for reviewsers. Cached reviews are already sorted by pk, and python
+        # sort is stable, so we only sort according to the role name in order
+        # to get Reviewers, then the Leader and finally The Approver (R, L, A)
         reviews.sort(key=operator.attrgetter("role"), reverse=True)
         nb_comments = form.nb_comments
         can_discuss = form.can_discuss
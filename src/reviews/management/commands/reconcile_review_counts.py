@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import User
+from reviews.models import ReviewInboxCount
+
+
+class Command(BaseCommand):
+    help = "Recompute the review inbox counts of all users"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            dest="chunk_size",
+            default=500,
+            help="Number of users to refresh in a single transaction.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        user_ids = list(User.objects.order_by("pk").values_list("pk", flat=True))
+        for start in range(0, len(user_ids), chunk_size):
+            ReviewInboxCount.refresh(user_ids[start : start + chunk_size])
+
+        self.stdout.write("Refreshed counts of {} users".format(len(user_ids)))
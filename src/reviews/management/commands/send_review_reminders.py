@@ -1,9 +1,7 @@
 #!/usr/bin/python
 
-from itertools import groupby
-
 from notifications.management.commands.base import EmailCommand
-from reviews.models import Review
+from reviews.utils import get_pending_reviews, iter_reviews_by_reviewer
 
 
 class Command(EmailCommand):
@@ -11,17 +9,22 @@ class Command(EmailCommand):
     text_template = "reviews/pending_reviews_reminder_email.txt"
     html_template = "reviews/pending_reviews_reminder_email.html"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            dest="chunk_size",
+            default=500,
+            help="Number of users which reviews are loaded at once.",
+        )
+
     def handle(self, *args, **options):
-        pending_reviews = (
-            Review.objects.filter(status="progress")
-            .select_related("document", "reviewer")
-            .order_by("reviewer", "role")
+        pending_reviews = get_pending_reviews().filter(
+            reviewer__send_pending_reviews_mails=True
         )
-        users = groupby(pending_reviews, lambda rev: rev.reviewer)
+        users = iter_reviews_by_reviewer(pending_reviews, options["chunk_size"])
         for user, reviews in users:
-            if not user.send_pending_reviews_mails:
-                continue
-            self.send_notification(user=user, reviews=list(reviews))
+            self.send_notification(user=user, reviews=reviews)
 
     def get_subject(self, **kwargs):
         return "Phase - Pending reviews"
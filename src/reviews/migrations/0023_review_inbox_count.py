@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reviews', '0022_alter_review_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewInboxCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('step', models.CharField(choices=[('reviewer', 'Reviewer'), ('leader', 'Leader'), ('approver', 'Approver'), ('priorities', 'Priorities')], max_length=16, verbose_name='Step')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Count')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Review inbox count',
+                'verbose_name_plural': 'Review inbox counts',
+                'unique_together': {('user', 'step')},
+            },
+        ),
+    ]
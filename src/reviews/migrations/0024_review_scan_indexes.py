@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0023_review_inbox_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['status', 'reviewer', 'due_date'], name='reviews_rev_status_4364c2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['closed_on', 'due_date'], name='reviews_rev_closed__0690e4_idx'),
+        ),
+    ]
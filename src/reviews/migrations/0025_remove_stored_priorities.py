@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:27
+
+from django.db import migrations, models
+
+
+def delete_priorities(apps, schema_editor):
+    ReviewInboxCount = apps.get_model('reviews', 'ReviewInboxCount')
+    ReviewInboxCount.objects.filter(step='priorities').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0024_review_scan_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_priorities, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='reviewinboxcount',
+            name='step',
+            field=models.CharField(choices=[('reviewer', 'Reviewer'), ('leader', 'Leader'), ('approver', 'Approver')], max_length=16, verbose_name='Step'),
+        ),
+    ]
@@ -1,9 +1,14 @@
 import datetime
+import functools
+import logging
+import operator
+from collections import defaultdict
 
 from django.conf import settings
-from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from django.db import models, transaction
+from django.db.models import Case, Count, F, Q, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
@@ -12,11 +17,14 @@ from model_utils import Choices
 
 from accounts.models import User
 from documents.models import Document
+from documents.signals import documents_batch_updated
 from documents.templatetags.documents import MenuItem
 from metadata.fields import ConfigurableChoiceField
 from privatemedia.fields import PrivateFileField
 from reviews.fileutils import review_comments_file_path
 
+logger = logging.getLogger(__name__)
+
 CLASSES = (
     (1, "1"),
     (2, "2"),
@@ -90,12 +98,21 @@ class Review(models.Model):
         verbose_name_plural = _("Reviews")
         index_together = (("reviewer", "document", "revision", "role"),)
         unique_together = ("reviewer", "document", "revision")
+        indexes = [
+            # Pending reviews of a user, e.g for reminders
+            models.Index(fields=["status", "reviewer", "due_date"]),
+            # Ongoing reviews which are overdue
+            models.Index(fields=["closed_on", "due_date"]),
+        ]
         app_label = "reviews"
 
-    def save(self, *args, **kwargs):
-        cache_key = "all_reviews_{}".format(self.document_id)
-        cache.delete(cache_key)
-        super(Review, self).save(*args, **kwargs)
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(Review, cls).from_db(db, field_names, values)
+        # Keep track of the loaded reviewer, so the inbox counts of both
+        # users are refreshed when the review is reassigned
+        instance._loaded_reviewer_id = instance.__dict__.get("reviewer_id")
+        return instance
 
     @property
     def revision_name(self):
@@ -153,6 +170,179 @@ class Review(models.Model):
         )
 
 
+class ReviewInboxCount(models.Model):
+    """Number of ongoing reviews of a user, for every review step.
+
+    Counts are refreshed every time reviews are created, closed or deleted,
+    so review menus can be displayed without scanning the review table.
+
+    Priorities depend on the current date, so they are not stored but
+    computed when counts are read.
+
+    """
+
+    STEPS = Choices(
+        ("reviewer", _("Reviewer")),
+        ("leader", _("Leader")),
+        ("approver", _("Approver")),
+    )
+
+    # Priorities are leader and approver reviews of class <= 2 with a due
+    # date in less than PRIORITY_DAYS days.
+    PRIORITY_DAYS = 5
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name=_("User"))
+    step = models.CharField(_("Step"), max_length=16, choices=STEPS)
+    count = models.PositiveIntegerField(_("Count"), default=0)
+
+    class Meta:
+        verbose_name = _("Review inbox count")
+        verbose_name_plural = _("Review inbox counts")
+        unique_together = ("user", "step")
+        app_label = "reviews"
+
+    @classmethod
+    def get_counts(cls, user):
+        """Return the ongoing reviews count of each step for a single user."""
+        counts = dict(cls.objects.filter(user=user).values_list("step", "count"))
+        if not counts:
+            counts = cls.refresh([user.id])[user.id]
+
+        counts["priorities"] = 0
+        if counts.get(cls.STEPS.leader) or counts.get(cls.STEPS.approver):
+            counts["priorities"] = cls.count_priorities(user)
+        return counts
+
+    @classmethod
+    def count_priorities(cls, user):
+        """Count the high priority reviews of a user at the current date."""
+        priority_date = datetime.date.today() + datetime.timedelta(
+            days=cls.PRIORITY_DAYS
+        )
+        return (
+            Review.objects.filter(reviewer=user)
+            .filter(closed_on=None)
+            .filter(role__in=(Review.ROLES.leader, Review.ROLES.approver))
+            .filter(due_date__lte=priority_date)
+            .filter(docclass__lte=2)
+            .count()
+        )
+
+    @classmethod
+    @transaction.atomic
+    def refresh(cls, user_ids):
+        """Compute the counts of the given users from the review table."""
+        user_ids = set(user_ids)
+        counts = {
+            user_id: dict.fromkeys(cls.STEPS._db_values, 0) for user_id in user_ids
+        }
+        if not user_ids:
+            return counts
+
+        # Lock the users so concurrent refreshes are serialized. Otherwise, a
+        # refresh could delete the rows another one just inserted and write
+        # counts computed before the other transaction was committed.
+        # Users are locked in a consistent order to prevent deadlocks.
+        list(
+            User.objects.select_for_update()
+            .filter(pk__in=user_ids)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+        rows = (
+            Review.objects.filter(reviewer_id__in=user_ids)
+            .filter(closed_on=None)
+            .values_list("reviewer_id", "role")
+            .annotate(total=Count("id"))
+            .order_by()
+        )
+        for user_id, role, total in rows:
+            counts[user_id][role] = total
+
+        cls.objects.filter(user_id__in=user_ids).delete()
+        cls.objects.bulk_create(
+            [
+                cls(user_id=user_id, step=step, count=count)
+                for user_id, user_counts in counts.items()
+                for step, count in user_counts.items()
+            ]
+        )
+        return counts
+
+    @classmethod
+    def refresh_reviewers(cls, reviews):
+        """Refresh the counts of all users with a review in `reviews`.
+
+        `reviews` can be a list or a queryset.
+
+        """
+        if isinstance(reviews, models.QuerySet):
+            user_ids = reviews.values_list("reviewer_id", flat=True).distinct()
+        else:
+            user_ids = [review.reviewer_id for review in reviews]
+        return cls.refresh(user_ids)
+
+
+def to_date(value):
+    """Convert the value to a date, as a `DateField` would."""
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.date()
+    return value
+
+
+# Revision fields defining the current review step
+REVIEW_STEP_FIELDS = (
+    "review_start_date",
+    "reviewers_step_closed",
+    "leader_step_closed",
+    "review_end_date",
+)
+
+
+def get_step_filter(step):
+    """Return a filter matching revisions at the given review step.
+
+    See `ReviewMixin.current_review_step`.
+
+    """
+    started = Q(review_start_date__isnull=False)
+    filters = {
+        Review.STEPS.pending: Q(review_start_date=None),
+        Review.STEPS.reviewer: started & Q(reviewers_step_closed=None),
+        Review.STEPS.leader: started
+        & Q(reviewers_step_closed__isnull=False, leader_step_closed=None),
+        Review.STEPS.approver: started
+        & Q(
+            reviewers_step_closed__isnull=False,
+            leader_step_closed__isnull=False,
+            review_end_date=None,
+        ),
+        Review.STEPS.closed: started
+        & Q(
+            reviewers_step_closed__isnull=False,
+            leader_step_closed__isnull=False,
+            review_end_date__isnull=False,
+        ),
+    }
+    return filters[step]
+
+
+# Review steps each transition can start from
+REVIEW_TRANSITIONS = {
+    "end_reviewers_step": (Review.STEPS.reviewer,),
+    "end_leader_step": (Review.STEPS.reviewer, Review.STEPS.leader),
+    "send_back_to_leader_step": (Review.STEPS.approver,),
+    "end_review": (
+        Review.STEPS.reviewer,
+        Review.STEPS.leader,
+        Review.STEPS.approver,
+    ),
+}
+
+
 class ReviewMixin(models.Model):
     """A Mixin to use to define reviewable document types.
     The review duration is configurable via a tuple matching the CLASSES tuple.
@@ -206,8 +396,9 @@ class ReviewMixin(models.Model):
         abstract = True
 
     def save(self, *args, **kwargs):
-        cache_key = "all_reviews_{}".format(self.metadata.document_id)
-        cache.delete(cache_key)
+        from reviews.utils import delete_reviews_cache
+
+        delete_reviews_cache([self.metadata.document_id])
         super(ReviewMixin, self).save(*args, **kwargs)
 
     @cached_property
@@ -232,6 +423,48 @@ class ReviewMixin(models.Model):
 
         """
         start_date = at_date or timezone.now()
+        for review in self.prepare_review(start_date, due_date):
+            review.save()
+
+        self.reload_reviews()
+        self.save(update_document=True)
+
+    @classmethod
+    @transaction.atomic
+    def bulk_start_review(cls, revisions, at_date=None):
+        """Starts the review process for several revisions at once.
+
+        Same as calling `start_review` on every revision, except that all
+        reviews are inserted with a single query and revisions and documents
+        are updated in bulk. Instead of individual `save` signals, a single
+        `documents_batch_updated` signal is sent, so documents are reindexed
+        in a single batch.
+
+        The revisions' reviewers should be prefetched.
+
+        Return the list of created reviews.
+
+        """
+        start_date = at_date or timezone.now()
+        reviews = []
+        for revision in revisions:
+            reviews += revision.prepare_review(start_date)
+            revision.reload_reviews()
+
+        Review.objects.bulk_create(reviews)
+        cls.objects.bulk_update(
+            revisions,
+            ["review_start_date", "review_due_date", "reviewers_step_closed"],
+        )
+        document_ids = [revision.metadata.document_id for revision in revisions]
+        Document.objects.filter(pk__in=document_ids).update(updated_on=timezone.now())
+
+        ReviewInboxCount.refresh_reviewers(reviews)
+        documents_batch_updated.send(sender=cls, document_ids=document_ids)
+        return reviews
+
+    def prepare_review(self, start_date, due_date=None):
+        """Set the review dates and return the (unsaved) reviews to create."""
         self.review_start_date = start_date
 
         duration = self.get_review_duration()
@@ -239,18 +472,21 @@ class ReviewMixin(models.Model):
             days=duration
         )
 
+        reviews = []
         reviewers = self.reviewers.all()
         for reviewer in reviewers:
-            Review.objects.create(
-                reviewer=reviewer,
-                document=self.document,
-                revision=self.revision,
-                received_date=self.received_date,
-                start_date=start_date,
-                due_date=self.review_due_date,
-                docclass=self.docclass,
-                status="progress",
-                revision_status=self.status,
+            reviews.append(
+                Review(
+                    reviewer=reviewer,
+                    document=self.document,
+                    revision=self.revision,
+                    received_date=self.received_date,
+                    start_date=start_date,
+                    due_date=self.review_due_date,
+                    docclass=self.docclass,
+                    status="progress",
+                    revision_status=self.status,
+                )
             )
 
         # If no reviewers, close reviewers step immediatly
@@ -261,24 +497,10 @@ class ReviewMixin(models.Model):
             leader_review_status = "pending"
 
         # Leader is mandatory, no need to test it
-        Review.objects.create(
-            reviewer_id=self.leader_id,
-            role=Review.ROLES.leader,
-            document=self.document,
-            revision=self.revision,
-            received_date=self.received_date,
-            start_date=start_date,
-            due_date=self.review_due_date,
-            status=leader_review_status,
-            docclass=self.docclass,
-            revision_status=self.status,
-        )
-
-        # Approver is not mandatory
-        if self.approver_id:
-            Review.objects.create(
-                reviewer_id=self.approver_id,
-                role=Review.ROLES.approver,
+        reviews.append(
+            Review(
+                reviewer_id=self.leader_id,
+                role=Review.ROLES.leader,
                 document=self.document,
                 revision=self.revision,
                 received_date=self.received_date,
@@ -288,9 +510,26 @@ class ReviewMixin(models.Model):
                 docclass=self.docclass,
                 revision_status=self.status,
             )
+        )
 
-        self.reload_reviews()
-        self.save(update_document=True)
+        # Approver is not mandatory
+        if self.approver_id:
+            reviews.append(
+                Review(
+                    reviewer_id=self.approver_id,
+                    role=Review.ROLES.approver,
+                    document=self.document,
+                    revision=self.revision,
+                    received_date=self.received_date,
+                    start_date=start_date,
+                    due_date=self.review_due_date,
+                    status=leader_review_status,
+                    docclass=self.docclass,
+                    revision_status=self.status,
+                )
+            )
+
+        return reviews
 
     @transaction.atomic
     def cancel_review(self):
@@ -318,69 +557,177 @@ class ReviewMixin(models.Model):
 
         review_canceled.send(sender=self.__class__, instance=self)
 
-    @transaction.atomic
-    def end_reviewers_step(self, at_date=None, save=True):
-        """Ends the first step of the review."""
-        end_date = at_date or timezone.now()
-        self.reviewers_step_closed = end_date
-
-        Review.objects.filter(document=self.document).filter(
+    def get_revision_reviews(self):
+        """Return a queryset of the revision's reviews."""
+        return Review.objects.filter(document_id=self.metadata.document_id).filter(
             revision=self.revision
-        ).filter(role=Review.ROLES.reviewer).filter(closed_on=None).update(
-            closed_on=end_date, status="not_reviewed"
         )
 
-        Review.objects.filter(document=self.document).filter(
-            revision=self.revision
-        ).filter(role=Review.ROLES.leader).update(status="progress")
+    def transition(self, name, **values):
+        """Move the revision to another review step.
+
+        Revision fields are updated with a single conditional query, so the
+        transition only happens if the revision is still at one of the steps
+        allowed by `REVIEW_TRANSITIONS`. Concurrent requests cannot both
+        perform the same transition.
+
+        Return True if the transition happened.
+
+        """
+        step_filter = functools.reduce(
+            operator.or_,
+            (get_step_filter(step) for step in REVIEW_TRANSITIONS[name]),
+        )
+        revisions = self.__class__.objects.filter(pk=self.pk).filter(step_filter)
+        updated = revisions.update(**values)
+        if updated:
+            self.refresh_from_db(fields=REVIEW_STEP_FIELDS)
+        return bool(updated)
+
+    def post_transition(self, save=True):
+        """Update everything that depends on the revision's review step.
+
+        If `save` is False, the caller is responsible for updating the
+        document, e.g with `post_review_update`.
 
+        """
+        self.post_reviews_update()
         self.reload_reviews()
         if save:
-            self.save(update_document=True)
+            self.post_review_update()
 
-    @transaction.atomic
-    def end_leader_step(self, at_date=None, save=True):
-        """Ends the second step of the review.
+    def post_review_update(self):
+        """Mark the document as updated.
 
-        Also ends the first step if it wasn't already done.
+        The document is reindexed once the current transaction is committed.
 
         """
-        if self.reviewers_step_closed is None:
-            self.end_reviewers_step(save=False, at_date=at_date)
+        document_id = self.metadata.document_id
+        Document.objects.filter(pk=document_id).update(updated_on=timezone.now())
+        documents_batch_updated.send(sender=self.__class__, document_ids=[document_id])
+
+    @transaction.atomic
+    def end_reviewers_step(self, at_date=None, save=True):
+        """Ends the first step of the review.
+
+        Return False if the revision was not at the reviewers step.
 
+        """
         end_date = at_date or timezone.now()
+        if not self.transition("end_reviewers_step", reviewers_step_closed=end_date):
+            return False
 
-        self.leader_step_closed = end_date
+        reviews = self.get_revision_reviews()
+        reviews.filter(role=Review.ROLES.reviewer).filter(closed_on=None).update(
+            closed_on=end_date, status="not_reviewed"
+        )
+        reviews.filter(role=Review.ROLES.leader).update(status="progress")
 
-        Review.objects.filter(document=self.document).filter(
-            revision=self.revision
-        ).filter(role=Review.ROLES.leader).filter(closed_on=None).update(
+        self.post_transition(save)
+        return True
+
+    @classmethod
+    @transaction.atomic
+    def bulk_end_reviewers_step(cls, revisions, at_date=None):
+        """Ends the first step of the review for several revisions at once.
+
+        Same as calling `end_reviewers_step` on every revision, with a
+        constant number of queries. As in `bulk_start_review`, a single
+        `documents_batch_updated` signal is sent.
+
+        Revisions which are not at the reviewers step anymore are ignored.
+        Return the list of revisions which step was ended.
+
+        """
+        end_date = at_date or timezone.now()
+        if not revisions:
+            return []
+
+        # Lock revisions to find which ones can be moved to the next step
+        ended_ids = set(
+            cls.objects.select_for_update()
+            .filter(pk__in=[revision.pk for revision in revisions])
+            .filter(get_step_filter(Review.STEPS.reviewer))
+            .values_list("pk", flat=True)
+        )
+        revisions = [revision for revision in revisions if revision.pk in ended_ids]
+        if not revisions:
+            return []
+
+        cls.objects.filter(pk__in=ended_ids).update(reviewers_step_closed=end_date)
+
+        revisions_q = functools.reduce(
+            operator.or_,
+            (
+                Q(document_id=revision.metadata.document_id, revision=revision.revision)
+                for revision in revisions
+            ),
+        )
+        reviews = Review.objects.filter(revisions_q)
+        reviews.filter(role=Review.ROLES.reviewer).filter(closed_on=None).update(
             closed_on=end_date, status="not_reviewed"
         )
+        reviews.filter(role=Review.ROLES.leader).update(status="progress")
+        ReviewInboxCount.refresh_reviewers(reviews)
 
-        Review.objects.filter(document=self.document).filter(
-            revision=self.revision
-        ).filter(role=Review.ROLES.approver).update(status="progress")
+        for revision in revisions:
+            revision.reviewers_step_closed = to_date(end_date)
+            revision.reload_reviews()
 
-        if not self.approver_id:
-            self.review_end_date = end_date
+        document_ids = [revision.metadata.document_id for revision in revisions]
+        Document.objects.filter(pk__in=document_ids).update(updated_on=timezone.now())
+        documents_batch_updated.send(sender=cls, document_ids=document_ids)
+        return revisions
 
-        self.reload_reviews()
-        if save:
-            self.save(update_document=True)
+    @transaction.atomic
+    def end_leader_step(self, at_date=None, save=True):
+        """Ends the second step of the review.
+
+        Also ends the first step if it wasn't already done, and the whole
+        review if there is no approver.
+
+        Return False if the revision was not at the reviewers or leader step.
+
+        """
+        end_date = at_date or timezone.now()
+        end_day = Value(to_date(end_date), output_field=models.DateField())
+        ended = self.transition(
+            "end_leader_step",
+            reviewers_step_closed=Coalesce("reviewers_step_closed", end_day),
+            leader_step_closed=end_date,
+            review_end_date=Case(
+                When(approver=None, then=end_day),
+                default=F("review_end_date"),
+            ),
+        )
+        if not ended:
+            return False
+
+        reviews = self.get_revision_reviews()
+        reviews.filter(role__in=(Review.ROLES.reviewer, Review.ROLES.leader)).filter(
+            closed_on=None
+        ).update(closed_on=end_date, status="not_reviewed")
+        reviews.filter(role=Review.ROLES.approver).update(status="progress")
+
+        self.post_transition(save)
+        return True
 
     @transaction.atomic
     def send_back_to_leader_step(self, save=True):
-        """Send the review back to the leader step."""
-        self.leader_step_closed = None
+        """Send the review back to the leader step.
 
-        Review.objects.filter(document=self.document).filter(
-            revision=self.revision
-        ).filter(role=Review.ROLES.leader).update(closed_on=None, status="progress")
+        Return False if the revision was not at the approver step.
 
-        self.reload_reviews()
-        if save:
-            self.save(update_document=True)
+        """
+        if not self.transition("send_back_to_leader_step", leader_step_closed=None):
+            return False
+
+        self.get_revision_reviews().filter(role=Review.ROLES.leader).update(
+            closed_on=None, status="progress"
+        )
+
+        self.post_transition(save)
+        return True
 
     @transaction.atomic
     def end_review(self, at_date=None, save=True):
@@ -388,24 +735,39 @@ class ReviewMixin(models.Model):
 
         Also ends the steps before.
 
-        """
-        if self.leader_step_closed is None:
-            self.end_leader_step(save=False, at_date=at_date)
+        Return False if the review was not ongoing.
 
+        """
         end_date = at_date or timezone.now()
-        self.review_end_date = end_date
+        end_day = Value(to_date(end_date), output_field=models.DateField())
+        ended = self.transition(
+            "end_review",
+            reviewers_step_closed=Coalesce("reviewers_step_closed", end_day),
+            leader_step_closed=Coalesce("leader_step_closed", end_day),
+            review_end_date=end_date,
+        )
+        if not ended:
+            return False
 
-        Review.objects.filter(document=self.document).filter(
-            revision=self.revision
-        ).filter(role=Review.ROLES.approver).filter(closed_on=None).update(
+        self.get_revision_reviews().filter(closed_on=None).update(
             closed_on=end_date, status="not_reviewed"
         )
 
-        self.reload_reviews()
-        if save:
-            self.save(update_document=True)
+        self.post_transition(save)
+        return True
+
+    def post_reviews_update(self):
+        """Refresh data depending on the revision's reviews.
+
+        Must be called after updating the revision's reviews without saving
+        them (e.g with `update`), since no signal is sent in this case.
+
+        """
+        from reviews.utils import delete_reviews_cache
+
+        ReviewInboxCount.refresh_reviewers(self.get_revision_reviews())
+        delete_reviews_cache([self.metadata.document_id])
 
-    @transaction.atomic
     def sync_reviews(self):
         """Update Review objects so it's coherent with current object state.
 
@@ -414,86 +776,179 @@ class ReviewMixin(models.Model):
         deleted to stay in sync.
 
         """
+        self.bulk_sync_reviews([self])
+
+    @classmethod
+    @transaction.atomic
+    def bulk_sync_reviews(cls, revisions):
+        """Same as `sync_reviews` for several revisions at once.
+
+        Reviews of all revisions are loaded with a single query, then
+        modified and created with one query each.
+
+        A `RuntimeError` is raised if a reviewer who already posted a review
+        was removed from a distribution list.
+
+        """
+        if not revisions:
+            return
+
+        models.prefetch_related_objects(revisions, "reviewers")
+        revisions_q = functools.reduce(
+            operator.or_,
+            (
+                Q(document_id=revision.metadata.document_id, revision=revision.revision)
+                for revision in revisions
+            ),
+        )
+        reviews_by_revision = defaultdict(list)
+        for review in Review.objects.filter(revisions_q).order_by("id"):
+            reviews_by_revision[(review.document_id, review.revision)].append(review)
+
+        updated_reviews = []
+        created_reviews = []
+        deleted_reviews = []
+        ended_reviewers_step = []
+        ended_reviews = []
+        for revision in revisions:
+            document_id = revision.metadata.document_id
+            reviews = reviews_by_revision[(document_id, revision.revision)]
+            diff = revision.get_reviews_diff(reviews)
+            updated_reviews += diff["updated"]
+            created_reviews += diff["created"]
+            deleted_reviews += diff["deleted"]
+
+            # If we were at the last review step, end the review completely
+            approver_deleted = any(
+                review.role == Review.ROLES.approver for review in diff["deleted"]
+            )
+            if approver_deleted and revision.is_at_review_step(Review.STEPS.approver):
+                ended_reviews.append(revision)
+
+            # Should we end the reviewers step?
+            reviewer_deleted = any(
+                review.role == Review.ROLES.reviewer for review in diff["deleted"]
+            )
+            waiting_reviews = [
+                review
+                for review in reviews + diff["created"]
+                if review.role == Review.ROLES.reviewer
+                and review.status == Review.STATUSES.progress
+                and review not in diff["deleted"]
+            ]
+            if reviewer_deleted and not waiting_reviews:
+                ended_reviewers_step.append(revision)
+
+        user_ids = set(review.reviewer_id for review in created_reviews)
+        user_ids.update(review.reviewer_id for review in updated_reviews)
+        user_ids.update(review._loaded_reviewer_id for review in updated_reviews)
+        user_ids.update(review.reviewer_id for review in deleted_reviews)
+
+        if updated_reviews:
+            Review.objects.bulk_update(updated_reviews, ["reviewer"])
+        if deleted_reviews:
+            # Signals are sent for every deleted review, which is fine since
+            # reviewers are seldom removed from a distribution list
+            deleted_ids = [review.id for review in deleted_reviews]
+            Review.objects.filter(id__in=deleted_ids).delete()
+        Review.objects.bulk_create(created_reviews)
+        ReviewInboxCount.refresh(user_ids)
+
+        for revision in ended_reviews:
+            revision.end_review()
+        cls.bulk_end_reviewers_step(ended_reviewers_step)
+
+        for revision in revisions:
+            revision.reload_reviews()
+
+        if updated_reviews or deleted_reviews or created_reviews:
+            documents_batch_updated.send(
+                sender=cls,
+                document_ids=[revision.metadata.document_id for revision in revisions],
+            )
+
+    def get_reviews_diff(self, reviews):
+        """Compare existing reviews with the current distribution list.
+
+        Return a dict of the reviews to update, create and delete.
+
+        """
+        updated = []
+        created = []
+        deleted = []
+        reviews_by_role = defaultdict(list)
+        for review in reviews:
+            reviews_by_role[review.role].append(review)
+
         # Sync leader
-        leader_review = self.get_leader_review()
-        if leader_review.reviewer_id != self.leader_id:
-            leader_review.reviewer = self.leader
-            leader_review.save()
+        for leader_review in reviews_by_role[Review.ROLES.leader]:
+            if leader_review.reviewer_id != self.leader_id:
+                leader_review.reviewer_id = self.leader_id
+                updated.append(leader_review)
 
         # Sync approver
         # Several cases here
         #  * an existing approver review was deleted
         #  * an existing approver review was modified
         #  * an approver review was created
-        approver_review = self.get_approver_review()
-        if approver_review:
+        approver_reviews = reviews_by_role[Review.ROLES.approver]
+        for approver_review in approver_reviews:
             if approver_review.reviewer_id != self.approver_id:
                 # A new approver was submitted
-                if self.approver:
-                    approver_review.reviewer = self.approver
-                    approver_review.save()
+                if self.approver_id:
+                    approver_review.reviewer_id = self.approver_id
+                    updated.append(approver_review)
                 # The approver was deleted
                 else:
-                    approver_review.delete()
-                    # If we were at the last review step, end the review completely
-                    if self.is_at_review_step(Review.STEPS.approver):
-                        self.end_review()
-        else:
-            if self.approver:
-                Review.objects.create(
-                    reviewer=self.approver,
-                    role=Review.ROLES.approver,
-                    document=self.document,
-                    revision=self.revision,
-                    received_date=self.received_date,
-                    start_date=self.review_start_date,
-                    due_date=self.review_due_date,
-                    docclass=self.docclass,
-                    status="pending",
-                    revision_status=self.status,
+                    deleted.append(approver_review)
+
+        if not approver_reviews and self.approver_id:
+            created.append(
+                self.build_review(
+                    self.approver_id, Review.ROLES.approver, Review.STATUSES.pending
                 )
+            )
 
         # Sync reviewers
-        old_reviews = self.get_reviewers_reviews()
-        old_reviewers = set(review.reviewer for review in old_reviews)
-        current_reviewers = set(self.reviewers.all())
+        old_reviews = {
+            review.reviewer_id: review
+            for review in reviews_by_role[Review.ROLES.reviewer]
+        }
+        current_reviewers = set(reviewer.id for reviewer in self.reviewers.all())
 
         # Create Review objects for new reviewers
-        new_reviewers = current_reviewers - old_reviewers
-        for reviewer in new_reviewers:
-            Review.objects.create(
-                reviewer=reviewer,
-                document=self.document,
-                revision=self.revision,
-                received_date=self.received_date,
-                start_date=self.review_start_date,
-                due_date=self.review_due_date,
-                docclass=self.docclass,
-                status="progress",
-                revision_status=self.status,
+        for reviewer_id in sorted(current_reviewers - set(old_reviews)):
+            created.append(
+                self.build_review(
+                    reviewer_id, Review.ROLES.reviewer, Review.STATUSES.progress
+                )
             )
 
         # Remove Review objects for deleted reviewers
-        deleted_reviewers = old_reviewers - current_reviewers
-        if len(deleted_reviewers) > 0:
-            for reviewer in deleted_reviewers:
-                review = self.get_review(reviewer)
-                # Check that we only delete review with no comments
-                # This condition is enforced in the ReviewMixinForm anyway
-                if review.status != "progress":
-                    raise RuntimeError("Cannot delete a review with comments")
-                review.delete()
-
-            # Should we end the reviewers step?
-            waiting_reviews = self.get_filtered_reviews(
-                lambda rev: rev.id
-                and rev.role == "reviewer"
-                and rev.status == "progress"
-            )
-            if len(waiting_reviews) == 0:
-                self.end_reviewers_step()
-
-        self.reload_reviews()
+        for reviewer_id in set(old_reviews) - current_reviewers:
+            review = old_reviews[reviewer_id]
+            # Check that we only delete review with no comments
+            # This condition is enforced in the ReviewMixinForm anyway
+            if review.status != Review.STATUSES.progress:
+                raise RuntimeError("Cannot delete a review with comments")
+            deleted.append(review)
+
+        return {"updated": updated, "created": created, "deleted": deleted}
+
+    def build_review(self, reviewer_id, role, status):
+        """Return an unsaved review of the ongoing review process."""
+        return Review(
+            reviewer_id=reviewer_id,
+            role=role,
+            document_id=self.metadata.document_id,
+            revision=self.revision,
+            received_date=self.received_date,
+            start_date=self.review_start_date,
+            due_date=self.review_due_date,
+            docclass=self.docclass,
+            status=status,
+            revision_status=self.status,
+        )
 
     def is_under_review(self):
         """It's under review only if review has started but not ended."""
@@ -646,20 +1101,40 @@ class ReviewMixin(models.Model):
         if trs_revision.review_approver:
             self.approver = user_qs.get(name=trs_revision.review_approver)
 
-        # Was the review started?
-        if trs_revision.review_start_date:
-            self.start_review(
-                at_date=trs_revision.review_start_date,
-                due_date=trs_revision.review_due_date,
-            )
+        leader_comment_date = trs_revision.leader_comment_date
+        approver_comment_date = None
+        if self.approver_id:
+            approver_comment_date = trs_revision.approver_comment_date
+
+        # Was the review started? Comments can only be submitted during a
+        # review, so start it on the first comment date if no start date is
+        # given.
+        comment_dates = [
+            date for date in (leader_comment_date, approver_comment_date) if date
+        ]
+        start_date = trs_revision.review_start_date or min(comment_dates, default=None)
+        if start_date and not self.review_start_date:
+            self.start_review(at_date=start_date, due_date=trs_revision.review_due_date)
 
         # Did the leader already submit a comment?
-        if trs_revision.leader_comment_date:
-            self.end_leader_step(at_date=trs_revision.leader_comment_date, save=False)
+        if leader_comment_date:
+            ended = self.end_leader_step(at_date=leader_comment_date, save=False)
+            if not ended:
+                logger.warning(
+                    "Leader comment date of %s was ignored, since the revision "
+                    "was not at the leader step",
+                    self,
+                )
 
         # Is there an approver and did he submit a comment?
-        if self.approver_id and trs_revision.approver_comment_date:
-            self.end_review(at_date=trs_revision.approver_comment_date, save=False)
+        if approver_comment_date:
+            ended = self.end_review(at_date=approver_comment_date, save=False)
+            if not ended:
+                logger.warning(
+                    "Approver comment date of %s was ignored, since the revision "
+                    "was not under review",
+                    self,
+                )
 
         self.save()
 
@@ -1,9 +1,10 @@
 from django.dispatch import Signal, receiver
-from django.db.models.signals import post_save, post_delete
-from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete, m2m_changed
 
-from reviews.models import Review
+from reviews.models import Review, ReviewMixin, ReviewInboxCount
+from reviews.utils import delete_reviews_cache
 from documents.models import Document
+from documents.signals import documents_batch_updated
 
 
 review_canceled = Signal()
@@ -12,42 +13,63 @@ post_batch_review = Signal(providing_args=["user_id"])
 batch_item_indexed = Signal(providing_args=["document_type, document_id, json"])
 
 
-def delete_review_count_cache(sender, instance, **kwargs):
-    cache_key = "review_step_count_%d_%s" % (instance.reviewer_id, instance.role)
-    cache.delete(cache_key)
-
-    cache_key = "review_step_count_%d_priorities" % instance.reviewer_id
-    cache.delete(cache_key)
+def refresh_review_inbox_count(sender, instance, **kwargs):
+    user_ids = {instance.reviewer_id, getattr(instance, "_loaded_reviewer_id", None)}
+    user_ids.discard(None)
+    ReviewInboxCount.refresh(user_ids)
+    instance._loaded_reviewer_id = instance.reviewer_id
 
 
 post_save.connect(
-    delete_review_count_cache,
+    refresh_review_inbox_count,
     sender=Review,
-    dispatch_uid="update_review_cache_count_on_save",
+    dispatch_uid="update_review_inbox_count_on_save",
 )
 post_delete.connect(
-    delete_review_count_cache,
+    refresh_review_inbox_count,
     sender=Review,
-    dispatch_uid="update_review_cache_count_on_delete",
+    dispatch_uid="update_review_inbox_count_on_delete",
 )
 
 
-@receiver(post_batch_review, dispatch_uid="update_review_cache_count_on_batch")
-def delete_all_review_cache(sender, user_id, **kwargs):
-    """Delete review count cache after a batch review."""
-    roles = [key for key, value in Review.ROLES]
-    for role in roles:
-        cache_key = "review_step_count_%d_%s" % (user_id, role)
-        cache.delete(cache_key)
+def delete_review_distribution_list_cache(sender, instance, **kwargs):
+    delete_reviews_cache([instance.document_id])
+
 
-    cache_key = "review_step_count_%d_priorities" % (user_id)
-    cache.delete(cache_key)
+post_save.connect(
+    delete_review_distribution_list_cache,
+    sender=Review,
+    dispatch_uid="delete_review_distrib_list_cache_on_save",
+)
+post_delete.connect(
+    delete_review_distribution_list_cache,
+    sender=Review,
+    dispatch_uid="delete_review_distrib_list_cache_on_delete",
+)
 
 
 @receiver(post_save, sender=Document, dispatch_uid="delete_distrib_list_cache")
 def delete_distribution_list_cache(sender, instance, **kwargs):
-    cache_key = "all_reviews_{}".format(instance.id)
-    cache.delete(cache_key)
+    delete_reviews_cache([instance.id])
+
+
+@receiver(m2m_changed, dispatch_uid="delete_reviewers_distrib_list_cache")
+def delete_reviewers_distribution_list_cache(
+    sender, instance, action, reverse, model, pk_set, **kwargs
+):
+    """Reviewers were added to or removed from a revision."""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if isinstance(instance, ReviewMixin):
+        delete_reviews_cache([instance.metadata.document_id])
+    elif issubclass(model, ReviewMixin) and pk_set:
+        document_ids = model.objects.filter(pk__in=pk_set).values_list(
+            "metadata__document_id", flat=True
+        )
+        delete_reviews_cache(document_ids)
+
 
-    cache_key = "dummy_reviews_{}".format(instance.id)
-    cache.delete(cache_key)
+@receiver(documents_batch_updated, dispatch_uid="delete_batch_distrib_list_cache")
+def delete_batch_distribution_list_cache(sender, document_ids, **kwargs):
+    delete_reviews_cache(document_ids)
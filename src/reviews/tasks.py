@@ -1,16 +1,22 @@
+import functools
 import logging
+import operator
+from collections import defaultdict
 
 from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from django.utils.translation import ugettext
 from django.contrib.contenttypes.models import ContentType
 from celery import current_task
 
 from accounts.models import User
 from audit_trail.models import Activity
-from audit_trail.signals import activity_log
+from audit_trail.signals import activity_log, bulk_activity_log
 from core.celery import app
+from documents.signals import documents_batch_updated
 from reviews.signals import pre_batch_review, post_batch_review, batch_item_indexed
-from reviews.models import Review
+from reviews.models import Review, ReviewInboxCount
 from notifications.models import notify
 from discussion.models import Note
 
@@ -25,69 +31,55 @@ def do_batch_import(user_id, category_id, contenttype_id, document_ids, remark=N
     contenttype = ContentType.objects.get_for_id(contenttype_id)
     document_class = contenttype.model_class()
     docs = (
-        document_class.objects.select_related()
+        document_class.objects.select_related(
+            "document__category__organisation",
+            "document__category__category_template",
+            "latest_revision__leader",
+            "latest_revision__approver",
+        )
+        .prefetch_related("latest_revision__reviewers")
         .filter(document__category_id=category_id)
         .filter(document_id__in=document_ids)
     )
 
-    ok = []
-    nok = []
-    count = 0
-    total_docs = docs.count()
-
-    # We compute the progress as the proportion of documents for which the
-    # review has started.
-    # However, after all documents are treated, there is still the
-    # index + refresh step which takes quite some time. So we artificially
-    # increase the document count as a hackish way to never display a 100%
-    # progress bar as long as the task is not truly finished.
-    total_docs += 30
-
     pre_batch_review.send(sender=do_batch_import)
 
-    # Try to start the review for every listed document
+    # Check which documents can be reviewed
+    ok = []
+    nok = []
     for doc in docs:
-        try:
-            if not doc.latest_revision.can_be_reviewed:
-                raise RuntimeError()
-
-            doc.latest_revision.start_review()
-            user = User.objects.get(pk=user_id)
-            activity_log.send(
-                verb=Activity.VERB_STARTED_REVIEW,
-                target=doc.latest_revision,
-                sender=do_batch_import,
-                actor=user,
-            )
-            # In case of batch review start with a remark,
-            # the same remark is added for every review.
-            # Note: using "bulk_create" to create all the discussion
-            # at the end of the task would be much more efficient.
-            # However, by doing so, individual `post_save` signals would not
-            # be fired. Since the request is expected to take some time anyway,
-            # we will let this as is for now.
-            if remark:
-                Note.objects.create(
-                    author_id=user_id,
-                    document_id=doc.document.id,
-                    revision=doc.latest_revision.revision,
-                    body=remark,
-                )
+        # Prevent a query per document to fetch the revision's metadata
+        doc.latest_revision.metadata = doc
+        if doc.latest_revision.can_be_reviewed:
+            ok.append(doc)
+        else:
+            nok.append(doc)
+    current_task.update_state(state="PROGRESS", meta={"progress": 10})
 
+    # Start all the reviews at once
+    if ok:
+        user = User.objects.get(pk=user_id)
+        try:
+            with transaction.atomic():
+                bulk_start_reviews([doc.latest_revision for doc in ok], user, remark)
+        except Exception:
+            # Find out which documents cannot be reviewed. Revisions are
+            # fetched again, since they were updated before the rollback.
+            logger.exception("Batch review start failed, starting reviews one by one")
+            docs = docs.filter(pk__in=[doc.pk for doc in ok])
+            ok, failed = start_reviews_one_by_one(docs, user, remark)
+            nok += failed
+    current_task.update_state(state="PROGRESS", meta={"progress": 90})
+
+    # Serializing revisions is costly, so only do it if someone listens
+    if batch_item_indexed.has_listeners(do_batch_import):
+        for doc in ok:
             batch_item_indexed.send(
                 sender=do_batch_import,
                 document_type=doc.document.document_type(),
                 document_id=doc.id,
                 json=doc.latest_revision.to_json(),
             )
-            ok.append(doc)
-        except:  # noqa
-            nok.append(doc)
-
-        # Update the task progression bar
-        count += 1
-        progress = float(count) / total_docs * 100
-        current_task.update_state(state="PROGRESS", meta={"progress": progress})
 
     post_batch_review.send(sender=do_batch_import, user_id=user_id)
 
@@ -111,67 +103,103 @@ def do_batch_import(user_id, category_id, contenttype_id, document_ids, remark=N
     return "done"
 
 
+def bulk_start_reviews(revisions, user, remark=None):
+    """Start the reviews of several revisions of the same class."""
+    revision_class = type(revisions[0])
+    revision_class.bulk_start_review(revisions)
+    bulk_activity_log(Activity.VERB_STARTED_REVIEW, revisions, user)
+
+    # In case of batch review start with a remark,
+    # the same remark is added for every review.
+    if remark:
+        Note.bulk_post(user, revisions, remark)
+
+
+def start_reviews_one_by_one(docs, user, remark=None):
+    """Start every review on its own, so a failure only affects one document.
+
+    Return the lists of documents which reviews were started or not.
+
+    """
+    ok = []
+    nok = []
+    docs = list(docs)
+    for counter, doc in enumerate(docs, 1):
+        try:
+            with transaction.atomic():
+                doc.latest_revision.start_review()
+                activity_log.send(
+                    verb=Activity.VERB_STARTED_REVIEW,
+                    target=doc.latest_revision,
+                    sender=do_batch_import,
+                    actor=user,
+                )
+                if remark:
+                    Note.objects.create(
+                        author=user,
+                        document_id=doc.document_id,
+                        revision=doc.latest_revision.revision,
+                        body=remark,
+                    )
+            ok.append(doc)
+        except Exception:
+            logger.exception("Cannot start the review of {}".format(doc))
+            nok.append(doc)
+
+        progress = 10 + float(counter) / len(docs) * 80
+        current_task.update_state(state="PROGRESS", meta={"progress": progress})
+    return ok, nok
+
+
 @app.task
 def batch_close_reviews(user_id, review_ids):
     """Close several reviews at once.
 
     Only reviewers can do this.
 
+    Reviews are closed with set based updates, and all revisions which
+    reviewers step is over are moved to the leader step together. If that
+    fails, reviews are closed one by one, so a single failing review does
+    not prevent the others from being closed.
+
     """
     logger.info("Closing several reviews at once: {}".format(", ".join(review_ids)))
 
-    ok = []
-    nok = []
-    nb_reviews = len(review_ids)
-    reviews = (
+    reviews = list(
         Review.objects.filter(reviewer_id=user_id)
         .filter(role=Review.ROLES.reviewer)
         .filter(status=Review.STATUSES.progress)
         .filter(id__in=review_ids)
-        .select_related()
+        .select_related(
+            "document__category__organisation",
+            "document__category__category_template__metadata_model",
+        )
     )
-
-    counter = float(1)
-    comments = None
-    for review in reviews:
-
-        # Update progress counter
-        progress = counter / nb_reviews * 100
-        current_task.update_state(state="PROGRESS", meta={"progress": progress})
-
-        try:
-            with transaction.atomic():
-                # Post an empty review
-                logger.info("Closing review {}".format(review.id))
-                review.post_review(comments, save=True)
-
-                # Check if the review step has ended
-                # TODO This is highly inefficient. Maybe one day
-                # find another way to do it?
-                document = review.document
-                latest_revision = document.get_latest_revision()
-                waiting_reviews = (
-                    Review.objects.filter(document=document)
-                    .filter(revision=review.revision)
-                    .filter(role="reviewer")
-                    .exclude(closed_on=None)
-                )
-                if waiting_reviews.count() == latest_revision.reviewers.count():
-                    logger.info("Closing reviewers step")
-                    latest_revision.end_reviewers_step(save=False)
-                    user = User.objects.get(pk=user_id)
-                    activity_log.send(
-                        verb=Activity.VERB_CLOSED_REVIEWER_STEP,
-                        target=latest_revision,
-                        sender=do_batch_import,
-                        actor=user,
-                    )
-            ok.append(review.document)
-        except:  # noqa
-            nok.append(review.document)
-            pass
-
-        counter += 1
+    user = User.objects.get(pk=user_id)
+    current_task.update_state(state="PROGRESS", meta={"progress": 10})
+
+    try:
+        with transaction.atomic():
+            close_reviews_and_steps(reviews, user)
+        ok = [review.document for review in reviews]
+        nok = []
+    except Exception:
+        logger.exception("Batch review closing failed, closing reviews one by one")
+        ok = []
+        nok = []
+        for counter, review in enumerate(reviews, 1):
+            try:
+                with transaction.atomic():
+                    close_reviews_and_steps([review], user)
+                ok.append(review.document)
+            except Exception:
+                logger.exception("Cannot close review {}".format(review.id))
+                nok.append(review.document)
+
+            progress = float(counter) / len(reviews) * 100
+            current_task.update_state(state="PROGRESS", meta={"progress": progress})
+
+    ReviewInboxCount.refresh([user_id])
 
     if len(ok) > 0:
         ok_message = ugettext("You closed the review for the following documents:")
@@ -192,6 +220,82 @@ def batch_close_reviews(user_id, review_ids):
     return "done"
 
 
+def close_reviews_and_steps(reviews, user):
+    """Close the reviews, and end the reviewers steps that are over."""
+    close_reviews(reviews)
+    revisions = get_revisions_with_ended_reviewers_step(reviews)
+    for revision_class, class_revisions in revisions.items():
+        logger.info(
+            "Closing reviewers step for {} revisions".format(len(class_revisions))
+        )
+        ended_revisions = revision_class.bulk_end_reviewers_step(class_revisions)
+        bulk_activity_log(Activity.VERB_CLOSED_REVIEWER_STEP, ended_revisions, user)
+
+
+def close_reviews(reviews):
+    """Post empty reviews, as `Review.post_review` would do."""
+    now = timezone.now()
+    values = {
+        "comments": None,
+        "return_code": None,
+        "status": Review.STATUSES.reviewed,
+    }
+    closed_ids = [review.id for review in reviews if review.closed_on is None]
+    amended_ids = [review.id for review in reviews if review.closed_on is not None]
+    Review.objects.filter(id__in=closed_ids).update(closed_on=now, **values)
+    if amended_ids:
+        Review.objects.filter(id__in=amended_ids).update(amended_on=now, **values)
+
+    # Reviews were updated without being saved
+    documents_batch_updated.send(
+        sender=close_reviews,
+        document_ids=[review.document_id for review in reviews],
+    )
+
+
+def get_revisions_with_ended_reviewers_step(reviews):
+    """Find revisions which reviewers all posted their review.
+
+    Return a dict of revisions, grouped by revision class.
+
+    """
+    revisions = set((review.document_id, review.revision) for review in reviews)
+    if not revisions:
+        return {}
+
+    # Revisions with reviews still in progress
+    waiting_revisions = set(
+        Review.objects.filter(document_id__in=[doc_id for doc_id, _ in revisions])
+        .filter(role=Review.ROLES.reviewer)
+        .filter(closed_on=None)
+        .values_list("document_id", "revision")
+        .distinct()
+    )
+    ended_revisions = revisions - waiting_revisions
+
+    documents = {review.document_id: review.document for review in reviews}
+    revisions_by_class = defaultdict(list)
+    for doc_id, revision in ended_revisions:
+        revision_class = documents[doc_id].get_revision_class()
+        revisions_by_class[revision_class].append((doc_id, revision))
+
+    results = {}
+    for revision_class, class_revisions in revisions_by_class.items():
+        revisions_q = functools.reduce(
+            operator.or_,
+            (
+                Q(metadata__document_id=doc_id, revision=revision)
+                for doc_id, revision in class_revisions
+            ),
+        )
+        results[revision_class] = list(
+            revision_class.objects.filter(revisions_q).select_related(
+                "metadata__document"
+            )
+        )
+    return results
+
+
 @app.task
 def batch_cancel_reviews(user_id, category_id, contenttype_id, document_ids):
     contenttype = ContentType.objects.get_for_id(contenttype_id)
@@ -1,14 +1,16 @@
 import datetime
+from unittest import mock
 
 from django.test import TestCase
 from django.core.cache import cache
+from django.core.management import call_command
 from django.urls import reverse
 from django.utils import timezone
 
 from categories.factories import CategoryFactory
 from documents.factories import DocumentFactory
 from accounts.factories import UserFactory
-from reviews.models import Review
+from reviews.models import Review, ReviewInboxCount
 
 
 class ContextProcessorTests(TestCase):
@@ -100,3 +102,115 @@ class ContextProcessorTests(TestCase):
 
         res = self.client.get(self.url)
         self.assertContains(res, "Priorities (1)")
+
+    def test_priorities_are_computed_at_read_time(self):
+        doc = DocumentFactory(
+            revision={
+                "leader": self.user,
+                "docclass": 1,
+                "received_date": datetime.date.today(),
+            }
+        )
+        doc.latest_revision.start_review()
+        Review.objects.update(due_date=datetime.date.today() + datetime.timedelta(10))
+        self.assertEqual(ReviewInboxCount.get_counts(self.user)["priorities"], 0)
+
+        # Time passes, but review counts are not refreshed
+        Review.objects.update(due_date=datetime.date.today())
+        self.assertEqual(ReviewInboxCount.get_counts(self.user)["priorities"], 1)
+
+    def test_counts_are_read_from_the_count_table(self):
+        ReviewInboxCount.objects.bulk_create(
+            [
+                ReviewInboxCount(user=self.user, step="reviewer", count=42),
+                ReviewInboxCount(user=self.user, step="leader", count=3),
+            ]
+        )
+        with self.assertNumQueries(2):
+            counts = ReviewInboxCount.get_counts(self.user)
+        self.assertEqual(counts, {"reviewer": 42, "leader": 3, "priorities": 0})
+
+        res = self.client.get(self.url)
+        self.assertContains(res, "Reviewer (42)")
+        self.assertContains(res, "Leader (3)")
+
+
+class ReviewInboxCountTests(TestCase):
+    def setUp(self):
+        self.category = CategoryFactory()
+        self.user = UserFactory(category=self.category)
+        self.other_user = UserFactory(category=self.category)
+        self.approver = UserFactory(category=self.category)
+
+    def create_doc(self, **kwargs):
+        revision = {"received_date": datetime.date.today()}
+        revision.update(kwargs)
+        doc = DocumentFactory(category=self.category, revision=revision)
+        doc.latest_revision.start_review()
+        return doc
+
+    def get_counts(self, user):
+        return dict(
+            ReviewInboxCount.objects.filter(user=user).values_list("step", "count")
+        )
+
+    def test_refresh_counts(self):
+        self.create_doc(reviewers=[self.user], leader=self.other_user, docclass=1)
+        self.create_doc(reviewers=[self.user], leader=self.other_user, docclass=1)
+        self.create_doc(leader=self.user, approver=self.other_user, docclass=3)
+        Review.objects.update(due_date=datetime.date.today())
+
+        counts = ReviewInboxCount.refresh([self.user.id, self.other_user.id])
+        self.assertEqual(
+            counts[self.user.id], {"reviewer": 2, "leader": 1, "approver": 0}
+        )
+        self.assertEqual(
+            counts[self.other_user.id], {"reviewer": 0, "leader": 2, "approver": 1}
+        )
+        self.assertEqual(self.get_counts(self.other_user), counts[self.other_user.id])
+        self.assertEqual(
+            ReviewInboxCount.get_counts(self.other_user)["priorities"], 2
+        )
+
+    def test_counts_follow_the_review_steps(self):
+        doc = self.create_doc(
+            reviewers=[self.user], leader=self.other_user, approver=self.approver
+        )
+        self.assertEqual(self.get_counts(self.user)["reviewer"], 1)
+        self.assertEqual(self.get_counts(self.other_user)["leader"], 1)
+
+        doc.latest_revision.end_reviewers_step()
+        self.assertEqual(self.get_counts(self.user)["reviewer"], 0)
+
+        doc.latest_revision.end_leader_step()
+        self.assertEqual(self.get_counts(self.other_user)["leader"], 0)
+        self.assertEqual(self.get_counts(self.approver)["approver"], 1)
+
+        doc.latest_revision.send_back_to_leader_step()
+        self.assertEqual(self.get_counts(self.other_user)["leader"], 1)
+
+        doc.latest_revision.end_review()
+        self.assertEqual(self.get_counts(self.other_user)["leader"], 0)
+        self.assertEqual(self.get_counts(self.approver)["approver"], 0)
+
+    def test_reassigned_review_updates_both_users(self):
+        doc = self.create_doc(leader=self.user)
+        self.assertEqual(self.get_counts(self.user)["leader"], 1)
+
+        review = Review.objects.get(document=doc)
+        review.reviewer = self.other_user
+        review.save()
+        self.assertEqual(self.get_counts(self.user)["leader"], 0)
+        self.assertEqual(self.get_counts(self.other_user)["leader"], 1)
+
+        review.delete()
+        self.assertEqual(self.get_counts(self.other_user)["leader"], 0)
+
+    def test_reconcile_command(self):
+        self.create_doc(reviewers=[self.user], leader=self.other_user)
+        Review.objects.filter(reviewer=self.user).update(closed_on=timezone.now())
+        self.assertEqual(self.get_counts(self.user)["reviewer"], 1)
+
+        call_command("reconcile_review_counts", stdout=mock.Mock())
+        self.assertEqual(self.get_counts(self.user)["reviewer"], 0)
+        self.assertEqual(self.get_counts(self.other_user)["leader"], 1)
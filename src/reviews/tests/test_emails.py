@@ -57,6 +57,27 @@ class PendingReviewsReminderTests(TestCase):
         call_command("send_review_reminders")
         self.assertEqual(len(mail.outbox), 0)
 
+    def test_send_reminders_to_several_users(self):
+        other_user = UserFactory(email="other@phase.fr", category=self.category)
+        self.doc1.get_latest_revision().start_review()
+        doc = DocumentFactory(
+            category=self.category,
+            revision={
+                "leader": other_user,
+                "reviewers": [self.user],
+                "received_date": datetime.date.today(),
+            },
+        )
+        doc.get_latest_revision().start_review()
+        Review.objects.filter(reviewer=other_user).update(status="progress")
+
+        call_command("send_review_reminders", chunk_size=1)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].to, [self.user.email])
+        self.assertIn(self.doc1.document_key, mail.outbox[0].body)
+        self.assertIn(doc.document_key, mail.outbox[0].body)
+        self.assertEqual(mail.outbox[1].to, [other_user.email])
+
     def test_do_not_send_reminder(self):
         """Reminders are not send to users if their mail config says so."""
         self.doc1.get_latest_revision().start_review()
@@ -1,13 +1,19 @@
 import datetime
 
 from django.conf import settings
+from django.db import connection
+from django.db.models.signals import post_save
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from mock import MagicMock
 
 from categories.factories import CategoryFactory
 from documents.factories import DocumentFactory
 from accounts.factories import UserFactory
-from reviews.models import Review
+from documents.models import Document
+from documents.signals import documents_batch_updated
+from reviews.models import Review, ReviewInboxCount, get_step_filter
 
 
 class ReviewMixinTests(TestCase):
@@ -299,7 +305,7 @@ class ReviewMixinTests(TestCase):
         revision = self.create_reviewable_document()
         today = timezone.now().date()
         yesterday = today - datetime.timedelta(days=1)
-        revision.review_start_date = yesterday
+        revision.start_review(at_date=yesterday)
         revision.end_leader_step()
 
         self.assertSameDay(revision.reviewers_step_closed, today)
@@ -406,6 +412,62 @@ class ReviewMixinTests(TestCase):
         revision.end_review()
         self.assertEqual(revision.current_review_step(), "closed")
 
+    def test_step_filters_match_current_step(self):
+        revision = self.create_reviewable_document()
+        revision_class = revision.__class__
+        steps = ["pending", "reviewer", "leader", "approver", "closed"]
+        transitions = [
+            revision.start_review,
+            revision.end_reviewers_step,
+            revision.end_leader_step,
+            revision.end_review,
+            None,
+        ]
+        for step, transition in zip(steps, transitions):
+            for other_step in steps:
+                qs = revision_class.objects.filter(pk=revision.pk).filter(
+                    get_step_filter(other_step)
+                )
+                self.assertEqual(qs.exists(), other_step == step)
+            if transition:
+                transition()
+
+    def test_concurrent_transitions(self):
+        revision = self.create_reviewable_document()
+        revision.start_review()
+        stale_revision = revision.__class__.objects.get(pk=revision.pk)
+
+        yesterday = timezone.now() - datetime.timedelta(days=1)
+        self.assertTrue(revision.end_reviewers_step(at_date=yesterday))
+
+        # The second request sees an outdated revision
+        self.assertIsNone(stale_revision.reviewers_step_closed)
+        self.assertFalse(stale_revision.end_reviewers_step())
+        self.assertSameDay(stale_revision.reviewers_step_closed, None)
+        stale_revision.refresh_from_db()
+        self.assertSameDay(stale_revision.reviewers_step_closed, yesterday)
+
+        self.assertFalse(revision.send_back_to_leader_step())
+        self.assertTrue(revision.end_review())
+        self.assertFalse(revision.end_leader_step())
+
+    def test_transitions_do_not_save_document(self):
+        revision = self.create_reviewable_document()
+        revision.start_review()
+        document_saved = MagicMock()
+        batch_updated = MagicMock()
+        post_save.connect(document_saved, sender=Document)
+        documents_batch_updated.connect(batch_updated)
+        self.addCleanup(post_save.disconnect, document_saved, sender=Document)
+        self.addCleanup(documents_batch_updated.disconnect, batch_updated)
+
+        revision.end_reviewers_step()
+        self.assertEqual(document_saved.call_count, 0)
+        self.assertEqual(batch_updated.call_count, 1)
+        self.assertEqual(
+            batch_updated.call_args[1]["document_ids"], [revision.metadata.document_id]
+        )
+
     def test_amended_review(self):
         """User can amend their review comments."""
         revision = self.create_reviewable_document()
@@ -426,6 +488,41 @@ class ReviewMixinTests(TestCase):
         self.assertEqual(review.return_code, "2")
 
 
+    def test_trs_import_with_comment_dates_starts_the_review(self):
+        revision = self.create_reviewable_document()
+        leader_date = datetime.date(2020, 1, 3)
+        approver_date = datetime.date(2020, 1, 5)
+        trs_revision = MagicMock(
+            review_leader=None,
+            review_approver=None,
+            review_start_date=None,
+            review_due_date=None,
+            leader_comment_date=leader_date,
+            approver_comment_date=approver_date,
+        )
+        revision.post_trs_import(trs_revision)
+
+        revision.refresh_from_db()
+        self.assertEqual(revision.review_start_date, leader_date)
+        self.assertEqual(revision.leader_step_closed, leader_date)
+        self.assertEqual(revision.review_end_date, approver_date)
+
+    def test_trs_import_logs_ignored_comment_dates(self):
+        revision = self.create_reviewable_document()
+        revision.start_review()
+        revision.end_review()
+        trs_revision = MagicMock(
+            review_leader=None,
+            review_approver=None,
+            review_start_date=None,
+            review_due_date=None,
+            leader_comment_date=datetime.date(2020, 1, 3),
+            approver_comment_date=None,
+        )
+        with self.assertLogs("reviews.models", level="WARNING"):
+            revision.post_trs_import(trs_revision)
+
+
 class ReviewTests(TestCase):
     def setUp(self):
         self.category = CategoryFactory()
@@ -468,3 +565,110 @@ class ReviewTests(TestCase):
         # Review is over, overdue
         review.closed_on = tomorrow
         self.assertEqual(review.days_of_delay(), 1)
+
+
+class BulkSyncReviewsTests(TestCase):
+    def setUp(self):
+        self.category = CategoryFactory()
+        self.users = [UserFactory(category=self.category) for i in range(5)]
+        self.leader, self.approver, self.reviewer1, self.reviewer2, self.other = (
+            self.users
+        )
+
+    def create_revisions(self, number):
+        revisions = []
+        for i in range(number):
+            doc = DocumentFactory(
+                category=self.category,
+                revision={
+                    "reviewers": [self.reviewer1, self.reviewer2],
+                    "leader": self.leader,
+                    "approver": self.approver,
+                    "received_date": datetime.date.today(),
+                },
+            )
+            revision = doc.latest_revision
+            revision.start_review()
+            revisions.append(revision)
+        return revisions
+
+    def get_distribution_list(self, revision):
+        reviews = Review.objects.filter(document=revision.document).filter(
+            revision=revision.revision
+        )
+        return sorted(reviews.values_list("role", "reviewer_id"))
+
+    def test_sync_distribution_lists(self):
+        revisions = self.create_revisions(3)
+        for revision in revisions:
+            revision.leader = self.other
+            revision.approver = None
+            revision.save()
+            revision.reviewers.set([self.reviewer1, self.approver])
+
+        revisions[0].__class__.bulk_sync_reviews(revisions)
+
+        for revision in revisions:
+            self.assertEqual(
+                self.get_distribution_list(revision),
+                sorted(
+                    [
+                        ("leader", self.other.id),
+                        ("reviewer", self.reviewer1.id),
+                        ("reviewer", self.approver.id),
+                    ]
+                ),
+            )
+            revision.refresh_from_db()
+            self.assertIsNone(revision.reviewers_step_closed)
+
+        counts = dict(
+            ReviewInboxCount.objects.filter(user=self.other).values_list(
+                "step", "count"
+            )
+        )
+        self.assertEqual(counts["leader"], 3)
+        counts = dict(
+            ReviewInboxCount.objects.filter(user=self.reviewer2).values_list(
+                "step", "count"
+            )
+        )
+        self.assertEqual(counts["reviewer"], 0)
+
+    def test_removing_reviewers_ends_reviewers_step(self):
+        revisions = self.create_revisions(2)
+        revisions[0].reviewers.clear()
+        revisions[1].reviewers.remove(self.reviewer2)
+
+        revisions[0].__class__.bulk_sync_reviews(revisions)
+
+        revisions[0].refresh_from_db()
+        self.assertIsNotNone(revisions[0].reviewers_step_closed)
+        self.assertEqual(revisions[0].get_leader_review().status, "progress")
+        revisions[1].refresh_from_db()
+        self.assertIsNone(revisions[1].reviewers_step_closed)
+
+    def test_reviews_with_comments_cannot_be_deleted(self):
+        revisions = self.create_revisions(2)
+        revisions[1].get_review(self.reviewer2).post_review(comments=None)
+        for revision in revisions:
+            revision.reviewers.remove(self.reviewer2)
+
+        with self.assertRaises(RuntimeError):
+            revisions[0].__class__.bulk_sync_reviews(revisions)
+
+        # Nothing was deleted
+        self.assertEqual(len(self.get_distribution_list(revisions[0])), 4)
+
+    def test_queries_do_not_depend_on_revisions(self):
+        # Deleted reviews send signals, so only add reviewers here
+        def sync(revisions):
+            for revision in revisions:
+                revision.reviewers.add(self.leader)
+                revision.leader = self.other
+                revision.save()
+            with CaptureQueriesContext(connection) as queries:
+                revisions[0].__class__.bulk_sync_reviews(revisions)
+            return len(queries)
+
+        self.assertEqual(sync(self.create_revisions(2)), sync(self.create_revisions(6)))
@@ -1,10 +1,20 @@
 import datetime
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.contenttypes.models import ContentType
+from mock import MagicMock, patch
 
 from audit_trail.models import Activity
-from reviews.tasks import do_batch_import, batch_cancel_reviews
+from discussion.models import Note
+from discussion.utils import get_discussion_length
+from documents.signals import documents_batch_updated
+from notifications.models import Notification
+from reviews.models import Review
+from reviews.signals import batch_item_indexed
+from reviews import tasks
+from reviews.tasks import do_batch_import, batch_close_reviews, batch_cancel_reviews
 
 from documents.models import Document
 from categories.factories import CategoryFactory
@@ -67,7 +77,7 @@ class BatchReviewTests(TestCase):
         self.assertTrue(doc2.metadata.latest_revision.is_under_review())
 
         # Check audit trail
-        activities = Activity.objects.order_by("created_on")
+        activities = Activity.objects.order_by("target_object_id")
         self.assertEqual(activities[0].verb, Activity.VERB_STARTED_REVIEW)
         self.assertEqual(activities[0].target, self.doc1.metadata.latest_revision)
         self.assertEqual(activities[1].verb, Activity.VERB_STARTED_REVIEW)
@@ -101,6 +111,154 @@ class BatchReviewTests(TestCase):
         doc3 = Document.objects.get(pk=self.doc3.pk)
         self.assertFalse(doc3.metadata.latest_revision.is_under_review())
 
+    def test_batch_review_creates_reviews(self):
+        reviewer = UserFactory(category=self.category)
+        approver = UserFactory(category=self.category)
+        revision = self.doc1.get_latest_revision()
+        revision.reviewers.add(reviewer)
+        revision.approver = approver
+        revision.save()
+
+        do_batch_import.delay(
+            self.user.id,
+            self.category.id,
+            self.content_type.id,
+            [self.doc1.id, self.doc2.id],
+        )
+
+        reviews = Review.objects.filter(document=self.doc1).order_by("id")
+        self.assertEqual(
+            [(review.reviewer, review.role, review.status) for review in reviews],
+            [
+                (reviewer, "reviewer", "progress"),
+                (self.user, "leader", "pending"),
+                (approver, "approver", "pending"),
+            ],
+        )
+        revision = self.doc1.get_latest_revision()
+        self.assertEqual(reviews[0].due_date, revision.review_due_date)
+        self.assertIsNone(revision.reviewers_step_closed)
+
+        # Without reviewers, the reviewers step is closed immediately
+        reviews = Review.objects.filter(document=self.doc2)
+        self.assertEqual([review.status for review in reviews], ["progress"])
+        self.assertIsNotNone(self.doc2.get_latest_revision().reviewers_step_closed)
+
+    def test_batch_review_with_remark(self):
+        mentionned = UserFactory(username="riri", category=self.category)
+        do_batch_import.delay(
+            self.user.id,
+            self.category.id,
+            self.content_type.id,
+            [self.doc1.id, self.doc2.id, self.doc3.id],
+            remark="Hello @riri",
+        )
+
+        notes = Note.objects.order_by("document_id")
+        self.assertEqual(
+            [(note.document, note.body) for note in notes],
+            [(self.doc1, "Hello @riri"), (self.doc2, "Hello @riri")],
+        )
+        revision = self.doc1.get_latest_revision()
+        self.assertEqual(get_discussion_length(revision), 1)
+        self.assertEqual(Notification.objects.filter(user=mentionned).count(), 2)
+
+    def test_batch_review_documents_are_updated_in_batch(self):
+        receiver = MagicMock()
+        documents_batch_updated.connect(receiver)
+        self.addCleanup(documents_batch_updated.disconnect, receiver)
+
+        do_batch_import.delay(
+            self.user.id,
+            self.category.id,
+            self.content_type.id,
+            [self.doc1.id, self.doc2.id, self.doc3.id],
+        )
+        self.assertEqual(receiver.call_count, 1)
+        self.assertEqual(
+            sorted(receiver.call_args[1]["document_ids"]),
+            sorted([self.doc1.id, self.doc2.id]),
+        )
+
+    def test_batch_review_falls_back_to_single_reviews(self):
+        revision_class = type(self.doc1.get_latest_revision())
+        start_review = revision_class.start_review
+
+        def fail_on_doc2(revision, *args, **kwargs):
+            if revision.document == self.doc2:
+                raise RuntimeError("Error")
+            return start_review(revision, *args, **kwargs)
+
+        with patch.object(
+            revision_class, "bulk_start_review", side_effect=RuntimeError("Error")
+        ), patch.object(revision_class, "start_review", fail_on_doc2):
+            do_batch_import.delay(
+                self.user.id,
+                self.category.id,
+                self.content_type.id,
+                [self.doc1.id, self.doc2.id, self.doc3.id],
+                remark="Hello",
+            )
+
+        self.assertTrue(self.doc1.get_latest_revision().is_under_review())
+        self.assertFalse(self.doc2.get_latest_revision().is_under_review())
+        self.assertEqual(
+            [activity.target for activity in Activity.objects.all()],
+            [self.doc1.get_latest_revision()],
+        )
+        self.assertEqual([note.document for note in Note.objects.all()], [self.doc1])
+
+        ok_notif = Notification.objects.get(body__contains=self.ok)
+        self.assertIn(str(self.doc1.metadata), ok_notif.body)
+        self.assertNotIn(str(self.doc2.metadata), ok_notif.body)
+        nok_notif = Notification.objects.get(body__contains=self.nok)
+        self.assertIn(str(self.doc2.metadata), nok_notif.body)
+        self.assertIn(str(self.doc3.metadata), nok_notif.body)
+
+    def test_batch_review_sends_item_indexed_signals(self):
+        receiver = MagicMock()
+        batch_item_indexed.connect(receiver)
+        self.addCleanup(batch_item_indexed.disconnect, receiver)
+
+        do_batch_import.delay(
+            self.user.id,
+            self.category.id,
+            self.content_type.id,
+            [self.doc1.id, self.doc2.id, self.doc3.id],
+        )
+        self.assertEqual(
+            sorted(call[1]["document_id"] for call in receiver.call_args_list),
+            sorted([self.doc1.metadata.id, self.doc2.metadata.id]),
+        )
+
+    def test_batch_review_queries_do_not_depend_on_documents(self):
+        # Activity logging queries content types, warm up the cache
+        ContentType.objects.get_for_model(self.user)
+        ContentType.objects.get_for_model(self.doc1.get_latest_revision())
+
+        def start_reviews(documents):
+            with self.assertNumQueries(23):
+                do_batch_import.delay(
+                    self.user.id,
+                    self.category.id,
+                    self.content_type.id,
+                    [doc.id for doc in documents],
+                    remark="Hello",
+                )
+
+        start_reviews([self.doc1])
+        docs = [
+            DocumentFactory(
+                category=self.category,
+                revision={
+                    "leader": self.user,
+                    "received_date": datetime.date.today(),
+                },
+            )
+            for i in range(5)
+        ]
+        start_reviews(docs)
+
     def test_batch_cancel_review(self):
         self.doc1.get_latest_revision().start_review()
         self.doc2.get_latest_revision().start_review()
@@ -131,3 +289,112 @@ class BatchReviewTests(TestCase):
         for i, doc in enumerate([doc1, doc2]):
             self.assertEqual(activities[i].verb, Activity.VERB_CANCELLED_REVIEW)
             self.assertEqual(activities[i].target, doc.get_latest_revision())
+
+
+class BatchCloseReviewsTests(TestCase):
+    def setUp(self):
+        self.category = CategoryFactory()
+        self.user = UserFactory(category=self.category)
+        self.other_reviewer = UserFactory(category=self.category)
+        self.leader = UserFactory(category=self.category)
+
+    def create_reviewed_documents(self, nb_docs, reviewers=None):
+        """Create documents under review, return the user's reviews ids."""
+        reviewers = reviewers or [self.user]
+        docs = [
+            DocumentFactory(
+                category=self.category,
+                revision={
+                    "reviewers": reviewers,
+                    "leader": self.leader,
+                    "received_date": datetime.date.today(),
+                },
+            )
+            for i in range(nb_docs)
+        ]
+        revisions = [doc.get_latest_revision() for doc in docs]
+        type(revisions[0]).bulk_start_review(revisions)
+        reviews = Review.objects.filter(reviewer=self.user, document__in=docs)
+        return [str(review_id) for review_id in reviews.values_list("id", flat=True)]
+
+    def test_close_reviews_ends_reviewers_step(self):
+        review_ids = self.create_reviewed_documents(2)
+        batch_close_reviews.delay(self.user.id, review_ids)
+
+        reviews = Review.objects.filter(id__in=review_ids)
+        for review in reviews:
+            self.assertEqual(review.status, Review.STATUSES.reviewed)
+            self.assertIsNotNone(review.closed_on)
+
+            revision = review.document.get_latest_revision()
+            self.assertIsNotNone(revision.reviewers_step_closed)
+            self.assertEqual(revision.get_leader_review().status, "progress")
+
+        activities = Activity.objects.filter(
+            verb=Activity.VERB_CLOSED_REVIEWER_STEP
+        )
+        self.assertEqual(activities.count(), 2)
+
+    def test_close_reviews_waits_for_other_reviewers(self):
+        review_ids = self.create_reviewed_documents(
+            1, reviewers=[self.user, self.other_reviewer]
+        )
+        batch_close_reviews.delay(self.user.id, review_ids)
+
+        review = Review.objects.get(id=review_ids[0])
+        self.assertEqual(review.status, Review.STATUSES.reviewed)
+
+        revision = review.document.get_latest_revision()
+        self.assertIsNone(revision.reviewers_step_closed)
+        self.assertEqual(revision.get_leader_review().status, "pending")
+        self.assertEqual(Activity.objects.count(), 0)
+
+    def test_close_reviews_falls_back_to_single_reviews(self):
+        review_ids = self.create_reviewed_documents(3)
+        failing_review = Review.objects.get(id=review_ids[1])
+        close_reviews = tasks.close_reviews
+
+        def fail_on_review(reviews):
+            if failing_review in reviews:
+                raise RuntimeError("Error")
+            return close_reviews(reviews)
+
+        with patch("reviews.tasks.close_reviews", side_effect=fail_on_review):
+            batch_close_reviews.delay(self.user.id, review_ids)
+
+        reviews = Review.objects.filter(id__in=review_ids)
+        statuses = dict(reviews.values_list("id", "status"))
+        self.assertEqual(
+            statuses,
+            {
+                int(review_ids[0]): Review.STATUSES.reviewed,
+                failing_review.id: Review.STATUSES.progress,
+                int(review_ids[2]): Review.STATUSES.reviewed,
+            },
+        )
+        self.assertEqual(
+            Activity.objects.filter(verb=Activity.VERB_CLOSED_REVIEWER_STEP).count(), 2
+        )
+        nok_notif = Notification.objects.get(body__contains="We failed to close")
+        self.assertIn(str(failing_review.document), nok_notif.body)
+
+    def test_close_reviews_benchmark(self):
+        """Closing hundreds of reviews runs a constant number of queries."""
+
+        def close_reviews(review_ids):
+            with CaptureQueriesContext(connection) as context:
+                batch_close_reviews.delay(self.user.id, review_ids)
+
+            # Some backends split bulk inserts in several queries
+            return [
+                query["sql"]
+                for query in context.captured_queries
+                if not query["sql"].startswith("INSERT")
+            ]
+
+        queries = close_reviews(self.create_reviewed_documents(2))
+        batch_queries = close_reviews(self.create_reviewed_documents(200))
+        self.assertEqual(len(batch_queries), len(queries))
+        self.assertEqual(
+            Review.objects.filter(status=Review.STATUSES.reviewed).count(), 202
+        )
@@ -0,0 +1,144 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.factories import UserFactory
+from categories.factories import CategoryFactory
+from documents.factories import DocumentFactory
+from reviews.models import Review
+from reviews.utils import (
+    get_cached_reviews,
+    get_documents_reviews,
+    get_overdue_reviews,
+    get_pending_reviews,
+    iter_reviews_by_reviewer,
+)
+
+
+class CachedReviewsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = CategoryFactory()
+        self.leader = UserFactory(name="Leader", category=self.category)
+        self.reviewer = UserFactory(name="Reviewer", category=self.category)
+        self.other = UserFactory(name="Other", category=self.category)
+
+    def create_revision(self):
+        doc = DocumentFactory(
+            category=self.category,
+            revision={
+                "reviewers": [self.reviewer],
+                "leader": self.leader,
+                "received_date": datetime.date.today(),
+            },
+        )
+        return doc.latest_revision
+
+    def get_statuses(self, revision):
+        return [
+            (review.role, review.reviewer_name, review.status)
+            for review in get_cached_reviews(revision)
+        ]
+
+    def test_dummy_reviews(self):
+        revision = self.create_revision()
+        reviews = get_cached_reviews(revision)
+        self.assertEqual(
+            self.get_statuses(revision),
+            [("reviewer", "Reviewer", "void"), ("leader", "Leader", "void")],
+        )
+        self.assertIsNone(reviews[0].id)
+        self.assertEqual(reviews[0].get_role_display(), "Reviewer")
+
+    def test_reviews(self):
+        revision = self.create_revision()
+        revision.start_review()
+        reviews = get_cached_reviews(revision)
+        self.assertEqual(
+            self.get_statuses(revision),
+            [("reviewer", "Reviewer", "progress"), ("leader", "Leader", "pending")],
+        )
+        self.assertIsNotNone(reviews[0].id)
+        self.assertEqual(reviews[0].get_status_display(), "In progress")
+
+    def test_cache_is_cleared_on_review_updates(self):
+        revision = self.create_revision()
+        self.get_statuses(revision)
+
+        revision.reviewers.add(self.other)
+        self.assertIn(("reviewer", "Other", "void"), self.get_statuses(revision))
+
+        revision.start_review()
+        self.assertIn(("reviewer", "Other", "progress"), self.get_statuses(revision))
+
+        revision.get_review(self.reviewer).post_review(comments=None)
+        self.assertIn(("reviewer", "Reviewer", "reviewed"), self.get_statuses(revision))
+
+        # Reviews are updated in bulk
+        revision.end_reviewers_step(save=False)
+        self.assertIn(
+            ("reviewer", "Other", "not_reviewed"), self.get_statuses(revision)
+        )
+        self.assertIn(("leader", "Leader", "progress"), self.get_statuses(revision))
+
+    def test_batch_fetch(self):
+        revisions = [self.create_revision() for i in range(3)]
+        revisions[0].start_review()
+        revision_class = revisions[0].__class__
+        document_ids = [revision.metadata.document_id for revision in revisions]
+
+        with self.assertNumQueries(3):
+            reviews = get_documents_reviews(revision_class, document_ids)
+
+        self.assertEqual(len(reviews), 3)
+        self.assertEqual(reviews[document_ids[0]][1][0].status, "progress")
+        self.assertEqual(reviews[document_ids[1]][1][0].status, "void")
+
+        # Everything is cached now
+        with self.assertNumQueries(0):
+            cached_reviews = get_documents_reviews(revision_class, document_ids)
+        self.assertEqual(
+            cached_reviews[document_ids[2]][1][1].reviewer_id, self.leader.id
+        )
+
+
+class ReviewsByReviewerTests(TestCase):
+    def setUp(self):
+        self.category = CategoryFactory()
+        self.users = [UserFactory(category=self.category) for i in range(5)]
+        self.leader = UserFactory(category=self.category)
+        for user in self.users:
+            for i in range(2):
+                doc = DocumentFactory(
+                    category=self.category,
+                    revision={
+                        "reviewers": [user],
+                        "leader": self.leader,
+                        "received_date": datetime.date.today(),
+                    },
+                )
+                doc.latest_revision.start_review()
+
+    def test_iter_reviews_by_reviewer(self):
+        results = list(iter_reviews_by_reviewer(get_pending_reviews(), chunk_size=2))
+        self.assertEqual([user for user, reviews in results], self.users)
+        self.assertEqual([len(reviews) for user, reviews in results], [2] * 5)
+
+    def test_queries_do_not_depend_on_reviews(self):
+        # Two queries per chunk, and a last one to find there is nothing left
+        with self.assertNumQueries(7):
+            list(iter_reviews_by_reviewer(get_pending_reviews(), chunk_size=2))
+
+    def test_overdue_reviews(self):
+        self.assertEqual(get_overdue_reviews().count(), 0)
+
+        reviewer = self.users[2]
+        Review.objects.filter(reviewer=reviewer).update(
+            due_date=timezone.now().date() - datetime.timedelta(days=1)
+        )
+        results = list(iter_reviews_by_reviewer(get_overdue_reviews()))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0][0], reviewer)
+        self.assertEqual(len(results[0][1]), 2)
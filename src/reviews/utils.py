@@ -1,113 +1,245 @@
 from itertools import groupby
+from operator import attrgetter
 
+from django.conf import settings
 from django.core.cache import cache
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
 
+from metadata.fields import get_choices_from_list
 from reviews.models import Review, ReviewMixin
 
 
+class CachedReview:
+    """Lightweight, read only version of a `Review` used for display.
+
+    Reviews are cached as tuples, which are much faster to (un)pickle than
+    model instances, and wrapped into this class when read.
+
+    Reviews built from the distribution list of revisions which review was
+    never started have no id and a `void` status.
+
+    """
+
+    __slots__ = (
+        "id",
+        "document_id",
+        "document_key",
+        "revision",
+        "role",
+        "status",
+        "reviewer_id",
+        "reviewer_name",
+        "return_code",
+        "closed_on",
+        "comments",
+    )
+
+    def __init__(self, *values):
+        for attr, value in zip(self.__slots__, values):
+            setattr(self, attr, value)
+
+    def get_role_display(self):
+        return dict(Review.ROLES).get(self.role, self.role)
+
+    def get_status_display(self):
+        return dict(Review.STATUSES).get(self.status, self.status)
+
+    def get_return_code_display(self):
+        return_codes = dict(get_choices_from_list("REVIEW_RETURN_CODES"))
+        return return_codes.get(self.return_code, self.return_code)
+
+    def get_comments_url(self):
+        return reverse(
+            "download_review_comments",
+            args=[self.document_key, self.revision, self.id],
+        )
+
+
+def get_reviews_cache_key(document_id):
+    return "document_reviews_{}".format(document_id)
+
+
+def delete_reviews_cache(document_ids):
+    """Invalidate the cached distribution lists of the given documents.
+
+    The cache is also cleared when the current transaction is committed,
+    in case it was filled with stale data by a concurrent request in the
+    meantime.
+
+    """
+    cache_keys = [get_reviews_cache_key(document_id) for document_id in document_ids]
+    cache.delete_many(cache_keys)
+    transaction.on_commit(lambda: cache.delete_many(cache_keys))
+
+
 def get_cached_reviews(revision):
     """Get all reviews for the given revision.
 
     This method is intended to be used when one want to fetch all reviews for
     all the document's revisions successively.
 
-    All the reviews will be fetched in a single query and cached.
-
     Also, for revision which review was never started, there is no review
     objects to fetch, so we need to create some dummy ones for display purpose.
 
     See https://trello.com/c/CdZF9eAG/174-afficher-la-liste-de-distribution-d-un-document
 
-    Note that this cache is cleared in a signal of the same module.
+    Note that this cache is cleared in signals of the same app.
 
     """
-    reviews = get_all_reviews(revision.document)
-    if revision.revision in reviews:
-        revision_reviews = reviews[revision.revision]
-    else:
-        dummy_reviews = get_dummy_reviews(revision)
-        if revision.revision in dummy_reviews:
-            revision_reviews = dummy_reviews[revision.revision]
-        else:
-            revision_reviews = []
-    return revision_reviews
-
-
-def get_all_reviews(document):
-    """Return a dictionnary of revision indexed reviews."""
-    cache_key = "all_reviews_{}".format(document.id)
-    all_reviews = cache.get(cache_key, None)
-
-    if all_reviews is None:
-        qs = (
-            Review.objects.filter(document=document)
-            .order_by("revision", "id")
-            .select_related("reviewer")
-        )
+    document_id = revision.metadata.document_id
+    reviews = get_documents_reviews(revision.__class__, [document_id])[document_id]
+    return reviews.get(revision.revision, [])
+
 
-        all_reviews = {}
-        for revision_id, reviews in groupby(qs, lambda obj: obj.revision):
-            all_reviews[revision_id] = list(reviews)
+def get_documents_reviews(revision_class, document_ids):
+    """Return the reviews of several documents at once.
 
-        cache.set(cache_key, all_reviews, 5)
+    Reviews are returned as `CachedReview` lists, indexed by document id
+    then by revision. Documents missing from the cache are fetched
+    together with a constant number of queries.
+
+    """
+    cache_keys = {
+        get_reviews_cache_key(document_id): document_id for document_id in document_ids
+    }
+    cached = cache.get_many(list(cache_keys))
+    all_reviews = {cache_keys[key]: value for key, value in cached.items()}
+
+    missing_ids = [
+        document_id for document_id in document_ids if document_id not in all_reviews
+    ]
+    if missing_ids:
+        fetched = fetch_documents_reviews(revision_class, missing_ids)
+        cache.set_many(
+            {
+                get_reviews_cache_key(document_id): reviews
+                for document_id, reviews in fetched.items()
+            },
+            settings.REVIEWS_CACHE_TIMEOUT,
+        )
+        all_reviews.update(fetched)
+
+    return {
+        document_id: {
+            revision: [CachedReview(*values) for values in reviews]
+            for revision, reviews in all_reviews[document_id].items()
+        }
+        for document_id in document_ids
+    }
+
+
+def fetch_documents_reviews(revision_class, document_ids):
+    """Load the reviews of the given documents as tuples."""
+    all_reviews = {document_id: {} for document_id in document_ids}
+
+    # Revisions which review was started
+    reviews = (
+        Review.objects.filter(document_id__in=document_ids)
+        .order_by("document_id", "revision", "id")
+        .values_list(
+            "id",
+            "document_id",
+            "document__document_key",
+            "revision",
+            "role",
+            "status",
+            "reviewer_id",
+            "reviewer__name",
+            "return_code",
+            "closed_on",
+            "comments",
+        )
+    )
+    for values in reviews:
+        document_reviews = all_reviews[values[1]]
+        document_reviews.setdefault(values[3], []).append(values)
+
+    # Revisions which review was never started
+    revisions = (
+        revision_class.objects.filter(metadata__document_id__in=document_ids)
+        .filter(review_start_date=None)
+        .select_related("metadata__document", "leader", "approver")
+        .prefetch_related("reviewers")
+    )
+    for revision in revisions:
+        document_reviews = all_reviews[revision.metadata.document_id]
+        if revision.revision in document_reviews:
+            continue
+
+        distribution_list = [
+            (Review.ROLES.reviewer, reviewer) for reviewer in revision.reviewers.all()
+        ]
+        if revision.leader:
+            distribution_list.append((Review.ROLES.leader, revision.leader))
+        if revision.approver:
+            distribution_list.append((Review.ROLES.approver, revision.approver))
+
+        document_reviews[revision.revision] = [
+            (
+                None,
+                revision.metadata.document_id,
+                revision.metadata.document.document_key,
+                revision.revision,
+                role,
+                Review.STATUSES.void,
+                user.id,
+                user.name,
+                None,
+                None,
+                None,
+            )
+            for role, user in distribution_list
+        ]
 
     return all_reviews
 
 
-def get_dummy_reviews(revision):
-    """Return a dictionary of Review objects for."""
-    cache_key = "dummy_reviews_{}".format(revision.metadata.document_id)
-    dummy_reviews = cache.get(cache_key, None)
+def get_pending_reviews():
+    """Return reviews waiting for their reviewer."""
+    return Review.objects.filter(status=Review.STATUSES.progress)
+
+
+def get_overdue_reviews(at_date=None):
+    """Return ongoing reviews which due date is past."""
+    today = at_date or timezone.now().date()
+    return Review.objects.filter(closed_on=None).filter(due_date__lt=today)
+
 
-    if dummy_reviews is None:
+def iter_reviews_by_reviewer(reviews, chunk_size=500):
+    """Stream reviews grouped by reviewer.
 
-        revisions = (
-            revision.__class__.objects.filter(metadata__document=revision.document)
-            .filter(review_start_date=None)
-            .select_related("leader", "approver")
-            .prefetch_related("reviewers")
+    Yield `(reviewer, reviews)` tuples, ordered by reviewer.
+
+    Reviewers are paginated by id (keyset pagination), and reviews of
+    `chunk_size` reviewers are streamed from the db at once, so memory
+    usage does not depend on the size of the review table.
+
+    """
+    reviewer_ids = (
+        reviews.order_by("reviewer_id").values_list("reviewer_id", flat=True).distinct()
+    )
+    last_reviewer_id = None
+    while True:
+        if last_reviewer_id is not None:
+            reviewer_ids = reviewer_ids.filter(reviewer_id__gt=last_reviewer_id)
+        chunk = list(reviewer_ids[:chunk_size])
+        if not chunk:
+            break
+
+        chunk_reviews = (
+            reviews.filter(reviewer_id__in=chunk)
+            .select_related("document", "reviewer")
+            .order_by("reviewer_id", "role", "id")
         )
+        for reviewer, reviewer_reviews in groupby(
+            chunk_reviews.iterator(), attrgetter("reviewer")
+        ):
+            yield reviewer, list(reviewer_reviews)
 
-        dummy_reviews = {}
-        for revision in revisions:
-            revision_reviews = []
-
-            for reviewer in revision.reviewers.all():
-                revision_reviews.append(
-                    Review(
-                        role="reviewer",
-                        status=Review.STATUSES.void,
-                        reviewer=reviewer,
-                        document_id=revision.metadata.document_id,
-                    )
-                )
-
-            if revision.leader:
-                revision_reviews.append(
-                    Review(
-                        role="leader",
-                        status=Review.STATUSES.void,
-                        reviewer=revision.leader,
-                        document_id=revision.metadata.document_id,
-                    )
-                )
-
-            if revision.approver:
-                revision_reviews.append(
-                    Review(
-                        role="approver",
-                        status=Review.STATUSES.void,
-                        reviewer=revision.approver,
-                        document_id=revision.metadata.document_id,
-                    )
-                )
-
-            dummy_reviews[revision.revision] = revision_reviews
-
-        cache.set(cache_key, dummy_reviews, 5)
-
-    return dummy_reviews
+        last_reviewer_id = chunk[-1]
 
 
 def get_all_reviewable_types():
@@ -18,7 +18,6 @@ from django.forms.models import modelform_factory
 from django.utils import timezone
 
 from braces.views import LoginRequiredMixin, PermissionRequiredMixin
-from zipview.views import BaseZipView
 
 from audit_trail.models import Activity
 from audit_trail.signals import activity_log
@@ -29,7 +28,7 @@ from notifications.models import notify
 from reviews.models import Review
 from reviews.tasks import do_batch_import, batch_close_reviews, batch_cancel_reviews
 from reviews.forms import BasePostReviewForm, ReviewSearchForm
-from privatemedia.views import serve_model_file_field
+from privatemedia.views import serve_model_file_field, StreamingZipView
 
 
 class ReviewHome(LoginRequiredMixin, TemplateView):
@@ -535,22 +534,23 @@ class ReviewFormView(LoginRequiredMixin, UpdateView):
             self.revision.leader,
             self.revision.approver,
         ):
-            self.revision.end_reviewers_step()
-            verb = Activity.VERB_CLOSED_REVIEWER_STEP
+            if self.revision.end_reviewers_step():
+                verb = Activity.VERB_CLOSED_REVIEWER_STEP
 
         if "close_leader_step" in self.request.POST and user == self.revision.approver:
-            self.revision.end_leader_step()
-            verb = Activity.VERB_CLOSED_LEADER_STEP
+            if self.revision.end_leader_step():
+                verb = Activity.VERB_CLOSED_LEADER_STEP
 
         if (
             "back_to_leader_step" in self.request.POST
             and user == self.revision.approver
         ):
-            self.revision.send_back_to_leader_step()
+            sent_back = self.revision.send_back_to_leader_step()
             body = self.request.POST.get("body", None)
-            verb = Activity.VERB_SENT_BACK_TO_LEADER_STEP
+            if sent_back:
+                verb = Activity.VERB_SENT_BACK_TO_LEADER_STEP
 
-            if body:
+            if sent_back and body:
                 Note.objects.create(
                     author=user,
                     document=self.document,
@@ -580,6 +580,7 @@ class ReviewFormView(LoginRequiredMixin, UpdateView):
         self.object.post_review(comments_file, return_code=return_code)
         if return_code:
             self.revision.return_code = return_code
+            self.revision.save(update_fields=["return_code"])
 
         verb = None
         # If every reviewer has posted comments, close the reviewers step
@@ -591,20 +592,20 @@ class ReviewFormView(LoginRequiredMixin, UpdateView):
                 .exclude(closed_on=None)
             )
             if qs.count() == self.revision.reviewers.count():
-                self.revision.end_reviewers_step(save=False)
-                verb = Activity.VERB_CLOSED_REVIEWER_STEP
+                if self.revision.end_reviewers_step(save=False):
+                    verb = Activity.VERB_CLOSED_REVIEWER_STEP
 
         # If leader, end leader step
         elif self.object.role == "leader":
-            self.revision.end_leader_step(save=False)
-            verb = Activity.VERB_CLOSED_LEADER_STEP
+            if self.revision.end_leader_step(save=False):
+                verb = Activity.VERB_CLOSED_LEADER_STEP
 
         # If approver, end approver step
         elif self.object.role == "approver":
-            self.revision.end_review(save=False)
-            verb = Activity.VERB_CLOSED_APPROVER_STEP
+            if self.revision.end_review(save=False):
+                verb = Activity.VERB_CLOSED_APPROVER_STEP
 
-        self.revision.save(update_document=True)
+        self.revision.post_review_update()
 
         if verb:
             activity_log.send(
@@ -643,7 +644,7 @@ class CommentsDownload(LoginRequiredMixin, DetailView):
         return serve_model_file_field(review, "comments")
 
 
-class CommentsArchiveDownload(LoginRequiredMixin, BaseZipView):
+class CommentsArchiveDownload(LoginRequiredMixin, StreamingZipView):
     """Download at once all comments for a review."""
 
     zipfile_name = "comments.zip"
@@ -657,4 +658,4 @@ class CommentsArchiveDownload(LoginRequiredMixin, BaseZipView):
             .exclude(comments__isnull=True)
         )
 
-        return [review.comments.file for review in reviews if review.comments.name]
+        return [review.comments for review in reviews if review.comments.name]
@@ -1,3 +1,8 @@
+import base64
+import binascii
+import hashlib
+import json
+
 from django.conf import settings
 from django.forms import ModelChoiceField
 from django.db import models
@@ -6,6 +11,7 @@ from elasticsearch_dsl import Search
 
 from documents.forms.filters import filterform_factory
 from search import elastic
+from search.utils import close_point_in_time, get_index_generation
 
 
 class SearchBuilder(object):
@@ -17,7 +23,9 @@ class SearchBuilder(object):
 
     """
 
-    def __init__(self, category, filters=None, filter_on_entities=None):
+    def __init__(
+        self, category, filters=None, filter_on_entities=None, use_cursor=False
+    ):
         if filters is None:
             filters = {}
         self.category = category
@@ -33,6 +41,16 @@ class SearchBuilder(object):
         # the list
         self.filter_on_entities = filter_on_entities
 
+        # In cursor mode, results are paginated with `search_after` instead
+        # of `from` / `size`, so fetching the next page costs the same
+        # whatever the depth. See `get_cursor`.
+        #
+        # The first page is a regular search. A point in time is only opened
+        # when the next pages are fetched, so results do not shift while the
+        # user scrolls.
+        self.use_cursor = use_cursor
+        self.pit_id = None
+
     def init_filters(self, filters):
         DocumentModel = self.category.document_class()
         FilterForm = filterform_factory(DocumentModel)
@@ -63,7 +81,10 @@ class SearchBuilder(object):
         s = self._add_search_query(s)
         s = self._add_filter_on_entities(s)
         s = self._add_sort(s)
-        s = self._add_pagination(s)
+        if self.use_cursor:
+            s = self._add_cursor_pagination(s)
+        else:
+            s = self._add_pagination(s)
         if fields:
             s = self._limit_fields(s, fields)
         return s
@@ -109,6 +130,32 @@ class SearchBuilder(object):
 
         return s
 
+    def get_aggregations_cache_key(self, only_latest_revisions=True):
+        """Cache key for the aggregations of the current search.
+
+        Aggregations only depend on the search filters, not on pagination
+        or sorting. The key contains the index generation, so cached
+        aggregations are invalidated everytime the index is updated.
+
+        """
+        ignored = ("start", "size", "cursor", "sort_by")
+        filters = sorted(
+            (key, value.pk if isinstance(value, models.Model) else value)
+            for key, value in self.filters.items()
+            if key not in ignored
+        )
+        filters_hash = hashlib.md5(
+            json.dumps(
+                [filters, self.filter_on_entities, only_latest_revisions],
+                default=str,
+            ).encode()
+        ).hexdigest()
+
+        index_name = self.category.get_index_name()
+        return "search_aggregations_{}_{}_{}".format(
+            index_name, get_index_generation(index_name), filters_hash
+        )
+
     def _add_search_query(self, s):
         """Add the full text search to the query."""
         search_terms = self.filters.get("search_terms", None)
@@ -133,7 +180,13 @@ class SearchBuilder(object):
             sort_direction = "desc"
         else:
             sort_direction = "asc"
-        s = s.sort({sort_field: {"order": sort_direction, "unmapped_type": "String"}})
+        sort = [{sort_field: {"order": sort_direction, "unmapped_type": "String"}}]
+
+        # `search_after` requires a unique sort order
+        if self.use_cursor and sort_field != "document_key.raw":
+            sort.append({"document_key.raw": {"order": "asc"}})
+
+        s = s.sort(*sort)
         return s
 
     def _add_pagination(self, s):
@@ -143,6 +196,83 @@ class SearchBuilder(object):
         )
         return s
 
+    def _add_cursor_pagination(self, s):
+        cursor = self.decode_cursor(self.filters.get("cursor"))
+        s = s.extra(size=self.filters.get("size") or settings.PAGINATE_BY)
+        search_after = cursor.get("search_after")
+        if search_after:
+            self.pit_id = cursor.get("pit") or self.open_point_in_time()
+            s = self._set_point_in_time(s)
+            s = s.extra(search_after=search_after)
+        return s
+
+    def _set_point_in_time(self, s):
+        # Point in time searches are bound to the index the pit was opened on
+        return s.index().extra(
+            pit={"id": self.pit_id, "keep_alive": settings.ELASTIC_PIT_KEEP_ALIVE}
+        )
+
+    def open_point_in_time(self):
+        pit = elastic.open_point_in_time(
+            index=self.category.get_index_name(),
+            keep_alive=settings.ELASTIC_PIT_KEEP_ALIVE,
+        )
+        return pit["id"]
+
+    def renew_point_in_time(self, s):
+        """Continue the pagination of a query from a new point in time.
+
+        This is used when the point in time of a cursor has expired. The
+        `search_after` values do not depend on the point in time, so the
+        pagination goes on where it stopped.
+
+        """
+        self.pit_id = self.open_point_in_time()
+        return self._set_point_in_time(s)
+
+    def close_cursor(self, token):
+        """Release the point in time of a cursor that won't be used anymore."""
+        try:
+            cursor = self.decode_cursor(token)
+        except RuntimeError:
+            return
+
+        pit_id = cursor.get("pit")
+        if pit_id:
+            close_point_in_time(pit_id)
+
+    def decode_cursor(self, token):
+        if not token:
+            return {}
+
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(token.encode()))
+        except (binascii.Error, ValueError):
+            raise RuntimeError("Search cursor is invalid")
+
+        if not isinstance(cursor, dict):
+            raise RuntimeError("Search cursor is invalid")
+        return cursor
+
+    def get_cursor(self, response):
+        """Return the opaque token used to fetch the next page of results.
+
+        Returns None if the last page was reached.
+
+        """
+        size = self.filters.get("size") or settings.PAGINATE_BY
+        hits = response.hits
+        pit_id = response.pit_id if self.pit_id else None
+        if len(hits) < size:
+            if pit_id:
+                close_point_in_time(pit_id)
+            return None
+
+        cursor = {"search_after": list(hits[-1].meta.sort)}
+        if pit_id:
+            cursor["pit"] = pit_id
+        return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
     def _limit_fields(self, s, fields):
         """Set the list of returned fields."""
         s = s.source(fields)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from elasticsearch.exceptions import ConnectionError
+
+from search.utils import process_index_queue, get_index_queue_stats
+
+
+class Command(BaseCommand):
+    help = "Index the documents waiting in the index queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            dest="stats",
+            default=False,
+            help="Only display the queue depth and indexing lag.",
+        )
+
+    def handle(self, *args, **options):
+        stats = get_index_queue_stats()
+        self.stdout.write("Queue depth: {depth} documents".format(**stats))
+        self.stdout.write("Indexing lag: {lag:.1f} seconds".format(**stats))
+        if options.get("stats"):
+            return
+
+        try:
+            process_index_queue()
+        except ConnectionError:
+            raise CommandError("Elasticsearch cannot be found")
@@ -23,19 +23,30 @@
 import logging
 import datetime
 import sys
+import time
 
-from elasticsearch.helpers import bulk
+from elasticsearch.helpers import parallel_bulk, streaming_bulk
 
 from django.core.management.base import BaseCommand
-from django.core.management import call_command
 
+from categories.models import Category
 from documents.utils import get_all_revision_classes
 from search import elastic
-from search.utils import build_index_data
+from search.utils import (
+    iter_index_data,
+    create_reindexing_index,
+    put_category_mapping,
+    swap_index,
+    delete_reindexing_index,
+    refresh_index,
+)
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# Log the progress every PROGRESS_STEP indexed documents
+PROGRESS_STEP = 10000
+
 
 class Command(BaseCommand):
     def add_arguments(self, parser):
@@ -47,14 +58,28 @@ class Command(BaseCommand):
             default=True,
             help="Tells Django to NOT prompt the user for input of any kind.",
         )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            dest="threads",
+            default=4,
+            help="Number of threads sending bulk requests to Elasticsearch.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            dest="chunk_size",
+            default=settings.ELASTIC_BULK_SIZE,
+            help="Number of documents per database query and bulk request.",
+        )
 
     def handle(self, *args, **options):
         interactive = options.get("interactive")
         if interactive:
             confirm = input(
                 """
-You have requested a flush of the search index.
-This will IRREVERSIBLY DESTROY all data currently indexed by Elasticsearch.
+You have requested a full rebuild of the search index.
+New indexes will be filled, then replace the current ones.
 Are you sure you want to do this?
 
 Type 'yes' to continue, or 'no' to cancel: """
@@ -68,33 +93,92 @@ Type 'yes' to continue, or 'no' to cancel: """
         start_reindex = datetime.datetime.now()
         logger.info("Reindex starting at %s" % start_reindex)
 
-        call_command("delete_index")
-        call_command("create_index")
-        call_command("set_mappings")
+        threads = options.get("threads")
+        chunk_size = options.get("chunk_size")
 
-        logger.info("Preparing index data")
+        # Map each category alias to the new index being filled
+        categories = Category.objects.select_related(
+            "organisation", "category_template"
+        )
+        new_indices = {}
+        swapped = set()
+        try:
+            for category in categories:
+                alias = category.get_index_name()
+                new_index = create_reindexing_index(alias)
+                new_indices[alias] = new_index
+                put_category_mapping(category.id, new_index)
+                logger.info(f"Creating index {new_index} for {alias}")
+
+            classes = get_all_revision_classes()
+            for class_ in classes:
+                revisions = class_.objects.filter(
+                    metadata__document__is_indexable=True
+                )
+                self.index_revisions(
+                    class_, revisions, new_indices, threads, chunk_size
+                )
 
-        classes = get_all_revision_classes()
-        for class_ in classes:
-            revisions = class_.objects.filter(
-                metadata__document__is_indexable=True
-            ).select_related()
+            for alias, new_index in new_indices.items():
+                logger.info(f"Swapping index {alias} to {new_index}")
+                refresh_index(new_index)
+                swap_index(alias, new_index)
+                swapped.add(alias)
+        except Exception:
+            logger.exception("Reindex failed, the current indexes are kept")
+            raise
+        finally:
+            # Leave the live indexes untouched, and stop writing live
+            # updates into the new indexes that will never be used
+            for alias, new_index in new_indices.items():
+                if alias not in swapped:
+                    delete_reindexing_index(alias, new_index)
 
-            actions = []
-            logger.info(
-                "Starting gathering data for documents of type {}".format(
-                    class_.__name__
-                )
-            )
-            for revision in revisions:
-                actions.append(build_index_data(revision))
+        end_reindex = datetime.datetime.now()
+        logger.info("Reindex ending at %s" % end_reindex)
+
+    def index_revisions(self, class_, revisions, new_indices, threads, chunk_size):
+        """Stream the revisions into the index.
 
-            bulk(
+        Revisions are fetched from the db and sent to ES chunk by chunk, so
+        the memory usage does not depend on the number of documents.
+
+        """
+        total = revisions.count()
+        logger.info(
+            "Indexing {} documents of type {}".format(total, class_.__name__)
+        )
+
+        actions = iter_index_data(revisions, chunk_size, new_indices)
+        if threads > 1:
+            results = parallel_bulk(
+                elastic,
+                actions,
+                thread_count=threads,
+                chunk_size=chunk_size,
+                request_timeout=600,
+            )
+        else:
+            results = streaming_bulk(
                 elastic,
                 actions,
-                chunk_size=settings.ELASTIC_BULK_SIZE,
+                chunk_size=chunk_size,
                 request_timeout=600,
             )
 
-        end_reindex = datetime.datetime.now()
-        logger.info("Reindex ending at %s" % end_reindex)
+        start = time.time()
+        indexed = 0
+        for _ok, _item in results:
+            indexed += 1
+            if indexed % PROGRESS_STEP == 0:
+                self.log_progress(class_, indexed, total, start)
+        self.log_progress(class_, indexed, total, start)
+
+    def log_progress(self, class_, indexed, total, start):
+        elapsed = time.time() - start
+        throughput = indexed / elapsed if elapsed else 0
+        logger.info(
+            "{}: {}/{} documents indexed ({:.0f} docs/s)".format(
+                class_.__name__, indexed, total, throughput
+            )
+        )
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('documents', '0008_auto_20160607_1650'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingIndexUpdate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('queued_on', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Queued on')),
+                ('last_queued_on', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Last queued on')),
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='documents.document', verbose_name='Document')),
+            ],
+            options={
+                'verbose_name': 'Pending index update',
+                'verbose_name_plural': 'Pending index updates',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+
+class PendingIndexUpdate(models.Model):
+    """A document waiting to be reindexed.
+
+    Document updates are not indexed synchronously. They are queued, and
+    a celery task indexes them in bulk. Several updates of the same
+    document are coalesced into a single entry.
+
+    """
+
+    document = models.OneToOneField(
+        "documents.Document",
+        on_delete=models.CASCADE,
+        verbose_name=_("Document"),
+    )
+    queued_on = models.DateTimeField(_("Queued on"), default=timezone.now)
+    last_queued_on = models.DateTimeField(_("Last queued on"), default=timezone.now)
+
+    class Meta:
+        verbose_name = _("Pending index update")
+        verbose_name_plural = _("Pending index updates")
+
+    def __str__(self):
+        return str(self.document_id)
@@ -0,0 +1,175 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.urls import reverse
+
+from documents.models import Document
+
+
+# Placeholder used to build document urls without calling `reverse` for
+# every single indexed revision.
+DOCUMENT_KEY_PLACEHOLDER = "__document_key__"
+
+REVISION = "revision"
+METADATA = "metadata"
+DOCUMENT = "document"
+
+
+def get_fields_to_index(metadata_class):
+    """Return the names of the fields to index for a document class."""
+    config = metadata_class.PhaseConfig
+    filter_fields = list(config.filter_fields)
+    column_fields = list(dict(config.column_fields).values())
+    indexable_fields = getattr(config, "indexable_fields", [])
+    return set(filter_fields + column_fields + indexable_fields)
+
+
+def get_relation(model, field_name):
+    """Return the field if it's a relation, None otherwise."""
+    try:
+        field = model._meta.get_field(field_name)
+    except FieldDoesNotExist:
+        return None
+    return field if field.is_relation else None
+
+
+@lru_cache(maxsize=None)
+def get_index_serializer(revision_class):
+    """Return the (cached) serializer for the given revision class."""
+    return IndexSerializer(revision_class)
+
+
+class IndexSerializer:
+    """Converts revisions of a single class into ES documents.
+
+    Finding where indexed fields live (revision, metadata or document) and
+    what related objects must be loaded is done once per revision class.
+
+    Querysets passed through `prepare` are configured so serializing a
+    whole chunk of revisions requires a constant number of queries.
+
+    """
+
+    def __init__(self, revision_class):
+        self.revision_class = revision_class
+        self.metadata_class = revision_class._meta.get_field(
+            "metadata"
+        ).remote_field.model
+        self.fields = get_fields_to_index(self.metadata_class)
+        self.plan = [(field, self.get_owner(field)) for field in self.fields]
+        self._url_templates = {}
+
+    def get_owner(self, field_name):
+        """Search `field_name` in the revision, metadata and document."""
+        owners = (
+            (REVISION, self.revision_class),
+            (METADATA, self.metadata_class),
+            (DOCUMENT, Document),
+        )
+        for owner, model in owners:
+            if hasattr(model, field_name):
+                return owner
+
+        error = "Cannot find field {} in doc type {}".format(
+            field_name, self.metadata_class.__name__
+        )
+        raise RuntimeError(error)
+
+    def get_select_related(self):
+        select_related = {
+            "metadata__latest_revision",
+            "metadata__document__category__organisation",
+            "metadata__document__category__category_template",
+        }
+        prefixes = {
+            REVISION: ("", self.revision_class),
+            METADATA: ("metadata__", self.metadata_class),
+            DOCUMENT: ("metadata__document__", Document),
+        }
+        for field_name, owner in self.plan:
+            prefix, model = prefixes[owner]
+            relation = get_relation(model, field_name)
+            if relation and not relation.many_to_many:
+                select_related.add(prefix + field_name)
+
+            # Metadata properties usually are shortcuts to the latest
+            # revision fields
+            elif owner == METADATA and relation is None:
+                relation = get_relation(self.revision_class, field_name)
+                if relation and not relation.many_to_many:
+                    select_related.add("metadata__latest_revision__" + field_name)
+
+        return sorted(select_related)
+
+    def get_prefetch_related(self):
+        prefetch_related = set(self.revision_class.get_index_prefetch_related())
+        for field_name, owner in self.plan:
+            if owner == REVISION:
+                relation = get_relation(self.revision_class, field_name)
+                if relation and relation.many_to_many:
+                    prefetch_related.add(field_name)
+
+        return sorted(prefetch_related)
+
+    def prepare(self, revisions):
+        """Load everything required to serialize the revisions."""
+        return revisions.select_related(*self.get_select_related()).prefetch_related(
+            *self.get_prefetch_related()
+        )
+
+    def get_url(self, document):
+        category = document.category
+        if category.pk not in self._url_templates:
+            self._url_templates[category.pk] = reverse(
+                "document_detail",
+                args=[
+                    category.organisation.slug,
+                    category.slug,
+                    DOCUMENT_KEY_PLACEHOLDER,
+                ],
+            )
+        return self._url_templates[category.pk].replace(
+            DOCUMENT_KEY_PLACEHOLDER, document.document_key
+        )
+
+    def serialize(self, revision):
+        """Converts the revision to a json representation.
+
+        If a value is a Model instance (e.g a foreign key), we return both it's
+        unicode and id values.
+
+        """
+        metadata = revision.metadata
+        document = metadata.document
+        owners = {
+            REVISION: revision,
+            METADATA: metadata,
+            DOCUMENT: document,
+        }
+
+        fields_infos = {}
+        for field_name, owner in self.plan:
+            value = getattr(owners[owner], field_name)
+            if callable(value):
+                value = value()
+
+            if isinstance(value, models.Model):
+                fields_infos[field_name] = str(value)
+                fields_infos["%s_id" % field_name] = value.pk
+            else:
+                fields_infos[field_name] = value
+
+        fields_infos.update(
+            {
+                "url": self.get_url(document),
+                "document_key": document.document_key,
+                "document_number": document.document_number,
+                "document_pk": document.pk,
+                "metadata_pk": metadata.pk,
+                "pk": revision.pk,
+                "revision": revision.revision,
+                "is_latest_revision": document.current_revision == revision.revision,
+            }
+        )
+        return fields_infos
@@ -1,17 +1,48 @@
+import threading
+from contextlib import contextmanager
+
 from django.db.models.signals import post_save, pre_delete
 from django.conf import settings
 
 
 from categories.models import Category
 from search.utils import (
-    index_document,
+    queue_document_index,
+    queue_documents_index,
     unindex_document,
     put_category_mapping,
-    refresh_index,
     create_index,
 )
 from documents.models import Document
-from documents.signals import document_form_saved
+from documents.signals import document_form_saved, documents_batch_updated
+
+
+_batch = threading.local()
+
+
+@contextmanager
+def batch_indexing():
+    """Index updated documents all at once.
+
+    Inside this block, documents updated one by one are not queued for
+    indexing anymore. Instead, they are queued together when leaving the
+    block, with a single `documents_batch_updated` signal.
+
+    """
+    if getattr(_batch, "document_ids", None) is not None:
+        # Nested blocks are merged with the outer one
+        yield
+        return
+
+    _batch.document_ids = set()
+    try:
+        yield
+        document_ids = _batch.document_ids
+    finally:
+        _batch.document_ids = None
+
+    if document_ids:
+        documents_batch_updated.send(sender=Document, document_ids=list(document_ids))
 
 
 def update_index(**kwargs):
@@ -27,13 +58,19 @@ def update_index(**kwargs):
     # metadata and revision does not exist yet
     created = kwargs.pop("created", False)
     if not created and doc.is_indexable:
-        index_document(doc.pk)
-    refresh_index(doc.category.get_index_name())
+        document_ids = getattr(_batch, "document_ids", None)
+        if document_ids is not None:
+            document_ids.add(doc.pk)
+        else:
+            queue_document_index(doc.pk)
+
+
+def update_index_batch(sender, document_ids, **kwargs):
+    queue_documents_index(document_ids)
 
 
 def remove_from_index(sender, instance, **kwargs):
     unindex_document(instance.pk)
-    refresh_index(instance.category.get_index_name())
 
 
 def save_mapping(sender, instance, **kwargs):
@@ -49,6 +86,9 @@ def connect_signals():
         update_index, sender=Document, dispatch_uid="update_index"
     )
     post_save.connect(update_index, sender=Document, dispatch_uid="update_index")
+    documents_batch_updated.connect(
+        update_index_batch, dispatch_uid="update_index_batch"
+    )
     pre_delete.connect(
         remove_from_index, sender=Document, dispatch_uid="remove_from_index"
     )
@@ -62,6 +102,9 @@ def disconnect_signals():
         update_index, sender=Document, dispatch_uid="update_index"
     )
     post_save.disconnect(update_index, sender=Document, dispatch_uid="update_index")
+    documents_batch_updated.disconnect(
+        update_index_batch, dispatch_uid="update_index_batch"
+    )
     pre_delete.disconnect(
         remove_from_index, sender=Document, dispatch_uid="remove_from_index"
     )
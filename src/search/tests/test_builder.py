@@ -0,0 +1,104 @@
+import base64
+import json
+
+from django.test import TestCase
+
+from mock import patch
+
+from categories.factories import CategoryFactory
+from search.builder import SearchBuilder
+from search.utils import bump_index_generation
+
+
+def encode_cursor(cursor):
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.category = CategoryFactory()
+
+    def test_default_pagination(self):
+        builder = SearchBuilder(self.category, {"start": 50})
+        query = builder.build_query().to_dict()
+        self.assertEqual(query["from"], 50)
+        self.assertNotIn("pit", query)
+
+    @patch("search.builder.elastic.open_point_in_time")
+    def test_first_page_does_not_open_a_point_in_time(self, pit_mock):
+        builder = SearchBuilder(self.category, {"cursor": ""}, use_cursor=True)
+        query = builder.build_query()
+
+        self.assertEqual(pit_mock.call_count, 0)
+        self.assertEqual(query._index, [self.category.get_index_name()])
+        query = query.to_dict()
+        self.assertNotIn("pit", query)
+        self.assertNotIn("from", query)
+        self.assertNotIn("search_after", query)
+
+    @patch("search.builder.elastic.open_point_in_time")
+    def test_second_page_opens_a_point_in_time(self, pit_mock):
+        pit_mock.return_value = {"id": "pit_id"}
+        cursor = encode_cursor({"search_after": ["doc-1"]})
+        builder = SearchBuilder(self.category, {"cursor": cursor}, use_cursor=True)
+        query = builder.build_query()
+
+        self.assertEqual(pit_mock.call_count, 1)
+        self.assertIsNone(query._index)
+        query = query.to_dict()
+        self.assertEqual(query["pit"]["id"], "pit_id")
+        self.assertEqual(query["search_after"], ["doc-1"])
+
+    @patch("search.builder.elastic.open_point_in_time")
+    def test_next_page_uses_search_after(self, pit_mock):
+        cursor = encode_cursor({"pit": "pit_id", "search_after": ["doc-1", 12]})
+        builder = SearchBuilder(
+            self.category, {"cursor": cursor, "sort_by": "title"}, use_cursor=True
+        )
+        query = builder.build_query().to_dict()
+
+        self.assertEqual(pit_mock.call_count, 0)
+        self.assertEqual(query["pit"]["id"], "pit_id")
+        self.assertEqual(query["search_after"], ["doc-1", 12])
+        sort_fields = [list(sort.keys())[0] for sort in query["sort"]]
+        self.assertEqual(sort_fields, ["title.raw", "document_key.raw"])
+
+    def test_invalid_cursor(self):
+        builder = SearchBuilder(self.category, {"cursor": "wrong"}, use_cursor=True)
+        with self.assertRaises(RuntimeError):
+            builder.build_query()
+
+    @patch("search.utils.elastic.close_point_in_time")
+    def test_close_cursor(self, close_mock):
+        builder = SearchBuilder(self.category, {}, use_cursor=True)
+        builder.close_cursor(encode_cursor({"search_after": ["doc-1"]}))
+        builder.close_cursor("wrong")
+        self.assertEqual(close_mock.call_count, 0)
+
+        builder.close_cursor(encode_cursor({"pit": "pit_id", "search_after": [1]}))
+        close_mock.assert_called_once_with(body={"id": "pit_id"}, ignore=404)
+
+
+class AggregationsCacheKeyTests(TestCase):
+    def setUp(self):
+        self.category = CategoryFactory()
+
+    def get_key(self, filters):
+        return SearchBuilder(self.category, filters).get_aggregations_cache_key()
+
+    def test_key_ignores_pagination_and_sort(self):
+        self.assertEqual(
+            self.get_key({"status": "STD"}),
+            self.get_key({"status": "STD", "start": 100, "sort_by": "title"}),
+        )
+
+    def test_key_depends_on_filters(self):
+        self.assertNotEqual(
+            self.get_key({"status": "STD"}),
+            self.get_key({"status": "IFA"}),
+        )
+
+    def test_key_changes_when_index_is_updated(self):
+        key = self.get_key({"status": "STD"})
+        bump_index_generation(self.category.get_index_name())
+        self.assertNotEqual(key, self.get_key({"status": "STD"}))
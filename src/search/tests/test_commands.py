@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.test import TestCase
+from django.core.management import call_command
+
+from mock import patch
+
+from categories.factories import CategoryFactory
+
+
+COMMAND_MODULE = "search.management.commands.reindex_all"
+
+
+@patch(COMMAND_MODULE + ".refresh_index")
+@patch(COMMAND_MODULE + ".put_category_mapping")
+@patch(COMMAND_MODULE + ".delete_reindexing_index")
+@patch(COMMAND_MODULE + ".swap_index")
+@patch(COMMAND_MODULE + ".create_reindexing_index")
+class ReindexAllTests(TestCase):
+    def setUp(self):
+        self.category = CategoryFactory()
+        self.alias = self.category.get_index_name()
+
+    def test_new_indexes_are_swapped(
+        self, create_mock, swap_mock, delete_mock, *mocks
+    ):
+        create_mock.return_value = "new_index"
+        with patch(COMMAND_MODULE + ".Command.index_revisions"):
+            call_command("reindex_all", interactive=False)
+
+        swap_mock.assert_called_once_with(self.alias, "new_index")
+        self.assertEqual(delete_mock.call_count, 0)
+
+    def test_new_indexes_are_deleted_on_errors(
+        self, create_mock, swap_mock, delete_mock, *mocks
+    ):
+        create_mock.return_value = "new_index"
+        with patch(COMMAND_MODULE + ".Command.index_revisions") as index_mock:
+            index_mock.side_effect = ValueError()
+            with self.assertRaises(ValueError):
+                call_command("reindex_all", interactive=False)
+
+        self.assertEqual(swap_mock.call_count, 0)
+        delete_mock.assert_called_once_with(self.alias, "new_index")
+
+    def test_new_indexes_are_deleted_on_interruption(
+        self, create_mock, swap_mock, delete_mock, *mocks
+    ):
+        create_mock.return_value = "new_index"
+        with patch(COMMAND_MODULE + ".Command.index_revisions") as index_mock:
+            index_mock.side_effect = KeyboardInterrupt()
+            with self.assertRaises(KeyboardInterrupt):
+                call_command("reindex_all", interactive=False)
+
+        delete_mock.assert_called_once_with(self.alias, "new_index")
+
+
+class ProcessIndexQueueTests(TestCase):
+    def test_stats_are_displayed_on_two_lines(self):
+        stdout = StringIO()
+        call_command("process_index_queue", stats=True, stdout=stdout)
+        self.assertEqual(
+            stdout.getvalue().splitlines(),
+            ["Queue depth: 0 documents", "Indexing lag: 0.0 seconds"],
+        )
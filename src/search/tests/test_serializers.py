@@ -0,0 +1,52 @@
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+
+from accounts.factories import UserFactory
+from categories.factories import CategoryFactory
+from documents.factories import DocumentFactory
+from default_documents.models import (
+    ContractorDeliverable,
+    ContractorDeliverableRevision,
+)
+from default_documents.factories import (
+    ContractorDeliverableFactory,
+    ContractorDeliverableRevisionFactory,
+)
+from search.serializers import get_index_serializer
+
+
+class IndexSerializerTests(TestCase):
+    def setUp(self):
+        Model = ContentType.objects.get_for_model(ContractorDeliverable)
+        self.category = CategoryFactory(category_template__metadata_model=Model)
+        self.serializer = get_index_serializer(ContractorDeliverableRevision)
+
+    def create_documents(self, nb_docs):
+        for _ in range(nb_docs):
+            DocumentFactory(
+                category=self.category,
+                metadata_factory_class=ContractorDeliverableFactory,
+                revision_factory_class=ContractorDeliverableRevisionFactory,
+                revision={"leader": UserFactory()},
+            )
+
+    def serialize_all(self):
+        revisions = self.serializer.prepare(ContractorDeliverableRevision.objects.all())
+        return [self.serializer.serialize(revision) for revision in revisions]
+
+    def test_serialize_matches_to_json(self):
+        self.create_documents(2)
+        revisions = ContractorDeliverableRevision.objects.all()
+        self.assertEqual(
+            self.serialize_all(),
+            [revision.to_json() for revision in revisions],
+        )
+
+    def test_query_count_does_not_depend_on_revision_number(self):
+        self.create_documents(2)
+        with self.assertNumQueries(2):
+            self.serialize_all()
+
+        self.create_documents(8)
+        with self.assertNumQueries(2):
+            self.serialize_all()
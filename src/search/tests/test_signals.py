@@ -6,7 +6,7 @@ from mock import patch
 from accounts.factories import UserFactory
 from categories.factories import CategoryFactory
 from documents.utils import save_document_forms
-from search.signals import connect_signals, disconnect_signals
+from search.signals import batch_indexing, connect_signals, disconnect_signals
 from search.utils import create_index, put_category_mapping, delete_index
 from default_documents.forms import DemoMetadataForm, DemoMetadataRevisionForm
 
@@ -38,7 +38,7 @@ class SignalTests(TestCase):
         CategoryFactory()
         self.assertEqual(index_mock.call_count, 1)
 
-    @patch("search.signals.index_document")
+    @patch("search.signals.queue_document_index")
     def test_created_document_is_indexed(self, index_mock):
         form = DemoMetadataForm(
             {
@@ -57,7 +57,7 @@ class SignalTests(TestCase):
         save_document_forms(form, rev_form, self.category)
         self.assertEqual(index_mock.call_count, 1)
 
-    @patch("search.signals.index_document")
+    @patch("search.signals.queue_document_index")
     @patch("search.signals.unindex_document")
     def test_deleted_document_is_unindexed(self, index_mock, unindex_mock):
         form = DemoMetadataForm(
@@ -78,7 +78,7 @@ class SignalTests(TestCase):
         doc.delete()
         self.assertEqual(unindex_mock.call_count, 1)
 
-    @patch("search.signals.index_document")
+    @patch("search.signals.queue_document_index")
     def test_updated_document_is_indexed(self, index_mock):
         form = DemoMetadataForm(
             {
@@ -99,7 +99,7 @@ class SignalTests(TestCase):
         doc.save()
         self.assertEqual(index_mock.call_count, 2)
 
-    @patch("search.signals.index_document")
+    @patch("search.signals.queue_document_index")
     def test_revised_document_is_indexed(self, index_mock):
         form = DemoMetadataForm(
             {
@@ -121,3 +121,54 @@ class SignalTests(TestCase):
         revision.save()
         doc.save()
         self.assertEqual(index_mock.call_count, 2)
+
+
+@override_settings(ELASTIC_AUTOINDEX=True)
+class BatchIndexingTests(TestCase):
+    def setUp(self):
+        self.category = CategoryFactory()
+        connect_signals()
+
+    def tearDown(self):
+        disconnect_signals()
+
+    def create_document(self, title):
+        form = DemoMetadataForm({"title": title}, category=self.category)
+        rev_form = DemoMetadataRevisionForm(
+            {
+                "docclass": "1",
+                "received_date": "2015-01-01",
+                "created_on": "2015-01-01",
+            },
+            category=self.category,
+        )
+        doc, meta, rev = save_document_forms(form, rev_form, self.category)
+        return doc
+
+    @patch("search.signals.queue_documents_index")
+    @patch("search.signals.queue_document_index")
+    def test_documents_are_indexed_at_once(self, index_mock, batch_index_mock):
+        with batch_indexing():
+            with batch_indexing():
+                doc1 = self.create_document("Title 1")
+            doc2 = self.create_document("Title 2")
+            doc1.save()
+
+        self.assertEqual(index_mock.call_count, 0)
+        self.assertEqual(batch_index_mock.call_count, 1)
+        document_ids = batch_index_mock.call_args[0][0]
+        self.assertEqual(sorted(document_ids), [doc1.pk, doc2.pk])
+
+    @patch("search.signals.queue_documents_index")
+    @patch("search.signals.queue_document_index")
+    def test_nothing_is_indexed_on_errors(self, index_mock, batch_index_mock):
+        with self.assertRaises(ValueError):
+            with batch_indexing():
+                self.create_document("Title")
+                raise ValueError()
+
+        self.assertEqual(index_mock.call_count, 0)
+        self.assertEqual(batch_index_mock.call_count, 0)
+
+        self.create_document("Other title")
+        self.assertEqual(index_mock.call_count, 1)
@@ -0,0 +1,166 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from elasticsearch.exceptions import ConnectionError
+from mock import MagicMock, call, patch
+
+from categories.factories import CategoryFactory
+from documents.factories import DocumentFactory
+from default_documents.models import DemoMetadataRevision
+from search.models import PendingIndexUpdate
+from search.utils import (
+    iter_revisions,
+    with_reindexing_indices,
+    queue_document_index,
+    process_index_queue,
+    bulk_index,
+    index_revision,
+    INDEX_QUEUE_SCHEDULED_KEY,
+)
+
+
+class IterRevisionsTests(TestCase):
+    def setUp(self):
+        category = CategoryFactory()
+        self.docs = [DocumentFactory(category=category) for _ in range(7)]
+
+    def test_all_revisions_are_iterated_in_pk_order(self):
+        revisions = DemoMetadataRevision.objects.all()
+        iterated = list(iter_revisions(revisions, chunk_size=3))
+        expected = list(revisions.order_by("pk"))
+        self.assertEqual(iterated, expected)
+
+    def test_one_query_per_chunk(self):
+        revisions = DemoMetadataRevision.objects.all()
+        # 7 revisions in chunks of 3 -> 3 chunks + the final empty one
+        with self.assertNumQueries(4):
+            list(iter_revisions(revisions, chunk_size=3))
+
+
+class ReindexingIndicesTests(TestCase):
+    @patch("search.utils.get_reindexing_indices")
+    def test_actions_are_duplicated_during_reindex(self, reindexing_mock):
+        reindexing_mock.side_effect = lambda alias: {
+            "org_cat": ["org_cat_v2"],
+        }.get(alias, [])
+        actions = [
+            {"_index": "org_cat", "_id": 1},
+            {"_index": "org_other", "_id": 2},
+            {"_index": "org_cat", "_id": 3},
+        ]
+        self.assertEqual(
+            list(with_reindexing_indices(actions)),
+            [
+                {"_index": "org_cat", "_id": 1},
+                {"_index": "org_cat_v2", "_id": 1},
+                {"_index": "org_other", "_id": 2},
+                {"_index": "org_cat", "_id": 3},
+                {"_index": "org_cat_v2", "_id": 3},
+            ],
+        )
+        # Aliases are only resolved once per index
+        self.assertEqual(reindexing_mock.call_count, 2)
+
+
+@patch("search.utils.get_reindexing_indices", return_value=[])
+class BulkIndexTests(TestCase):
+    def setUp(self):
+        self.actions = [{"_index": "org_cat", "_id": "doc_1", "_source": {}}]
+
+    def test_generation_is_bumped_after_the_refresh(self, reindexing_mock):
+        calls = MagicMock()
+        calls.bulk.side_effect = lambda client, actions, **kwargs: list(actions)
+        with patch("search.utils.bulk", calls.bulk), patch(
+            "search.utils.bump_index_generation", calls.bump
+        ):
+            bulk_index(self.actions)
+
+        self.assertEqual(
+            [name for name, args, kwargs in calls.mock_calls], ["bulk", "bump"]
+        )
+        self.assertEqual(calls.bulk.call_args[1]["refresh"], "wait_for")
+        self.assertEqual(calls.bump.call_args, call("org_cat"))
+
+    @patch("search.utils.bulk")
+    def test_explicit_refresh_is_kept(self, bulk_mock, reindexing_mock):
+        bulk_index(self.actions, refresh=True)
+        self.assertEqual(bulk_mock.call_args[1]["refresh"], True)
+
+
+@patch("search.utils.bump_index_generation")
+@patch("search.utils.elastic")
+class IndexRevisionTests(TestCase):
+    def setUp(self):
+        self.revision = DocumentFactory().latest_revision
+
+    def test_generation_is_bumped_after_indexing(self, elastic_mock, bump_mock):
+        index_revision(self.revision)
+        self.assertEqual(elastic_mock.index.call_args[1]["refresh"], "wait_for")
+        self.assertEqual(bump_mock.call_count, 1)
+
+    def test_connection_errors_are_logged(self, elastic_mock, bump_mock):
+        elastic_mock.index.side_effect = ConnectionError()
+        with self.assertLogs("search.utils", level="ERROR"):
+            index_revision(self.revision)
+        self.assertEqual(bump_mock.call_count, 0)
+
+
+class IndexQueueTests(TestCase):
+    def setUp(self):
+        category = CategoryFactory()
+        self.doc1 = DocumentFactory(category=category)
+        self.doc2 = DocumentFactory(category=category)
+
+    def test_updates_are_coalesced(self):
+        queue_document_index(self.doc1.pk)
+        queue_document_index(self.doc1.pk)
+        queue_document_index(self.doc2.pk)
+        self.assertEqual(PendingIndexUpdate.objects.count(), 2)
+
+    @patch("search.utils.index_documents")
+    def test_queue_is_indexed_in_bulk(self, index_mock):
+        queue_document_index(self.doc1.pk)
+        queue_document_index(self.doc2.pk)
+        process_index_queue()
+
+        self.assertEqual(index_mock.call_count, 1)
+        self.assertEqual(
+            set(index_mock.call_args[0][0]), set([self.doc1.pk, self.doc2.pk])
+        )
+        self.assertEqual(PendingIndexUpdate.objects.count(), 0)
+
+    @patch("search.utils.process_index_queue.apply_async")
+    @patch("search.utils.index_documents")
+    def test_processing_allows_new_schedules(self, index_mock, schedule_mock):
+        cache.add(INDEX_QUEUE_SCHEDULED_KEY, True)
+        process_index_queue()
+        self.assertIsNone(cache.get(INDEX_QUEUE_SCHEDULED_KEY))
+        self.assertEqual(schedule_mock.call_count, 0)
+
+    @patch("search.utils.process_index_queue.apply_async")
+    @patch("search.utils.index_documents")
+    def test_documents_queued_during_processing_are_scheduled(
+        self, index_mock, schedule_mock
+    ):
+        cache.delete(INDEX_QUEUE_SCHEDULED_KEY)
+        queue_document_index(self.doc1.pk)
+        # The document is queued again while it's being indexed
+        index_mock.side_effect = lambda *args, **kwargs: queue_document_index(
+            self.doc1.pk
+        )
+        process_index_queue()
+
+        self.assertEqual(PendingIndexUpdate.objects.count(), 1)
+        self.assertEqual(schedule_mock.call_count, 1)
+
+    @patch("search.utils.process_index_queue.apply_async")
+    @patch("search.utils.index_documents")
+    def test_failed_processing_is_scheduled_again(self, index_mock, schedule_mock):
+        cache.delete(INDEX_QUEUE_SCHEDULED_KEY)
+        queue_document_index(self.doc1.pk)
+        index_mock.side_effect = ConnectionError()
+        with self.assertRaises(ConnectionError):
+            process_index_queue()
+
+        self.assertEqual(PendingIndexUpdate.objects.count(), 1)
+        self.assertEqual(schedule_mock.call_count, 1)
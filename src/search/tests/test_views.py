@@ -0,0 +1,101 @@
+import base64
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+from elasticsearch.exceptions import NotFoundError
+from elasticsearch_dsl.response import Response
+
+from mock import patch
+
+from accounts.factories import UserFactory
+from categories.factories import CategoryFactory
+
+
+def encode_cursor(cursor):
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+
+class SearchDocumentsTests(TestCase):
+    def setUp(self):
+        self.category = CategoryFactory()
+        self.user = UserFactory(
+            email="testadmin@phase.fr", password="pass", category=self.category
+        )
+        self.client.login(email=self.user.email, password="pass")
+        self.url = reverse(
+            "search_documents",
+            args=[self.category.organisation.slug, self.category.slug],
+        )
+
+    def build_response(self, search, nb_hits, pit_id=None):
+        data = {
+            "hits": {
+                "total": {"value": 100},
+                "hits": [
+                    {"_source": {"document_key": "doc-{}".format(i)}, "sort": [i]}
+                    for i in range(nb_hits)
+                ],
+            }
+        }
+        if pit_id:
+            data["pit_id"] = pit_id
+        return Response(search, data)
+
+    def search(self, params, responses):
+        """Perform a search, the ES responses being built by the given func."""
+        with patch("elasticsearch_dsl.Search.execute", autospec=True) as execute:
+            execute.side_effect = responses
+            res = self.client.get(self.url, dict(params, skip_aggregations=1))
+        return res
+
+    @patch("search.builder.elastic.open_point_in_time")
+    def test_first_page_returns_a_cursor(self, pit_mock):
+        res = self.search(
+            {"cursor": "", "size": 2},
+            lambda search: self.build_response(search, 2),
+        )
+        data = json.loads(res.content)
+        self.assertEqual(len(data["data"]), 2)
+        self.assertIsNotNone(data["cursor"])
+        self.assertEqual(pit_mock.call_count, 0)
+
+    @patch("search.utils.elastic.close_point_in_time")
+    def test_point_in_time_is_closed_on_last_page(self, close_mock):
+        cursor = encode_cursor({"pit": "pit_id", "search_after": [1]})
+        res = self.search(
+            {"cursor": cursor, "size": 2},
+            lambda search: self.build_response(search, 1, pit_id="pit_id"),
+        )
+        self.assertIsNone(json.loads(res.content)["cursor"])
+        close_mock.assert_called_once_with(body={"id": "pit_id"}, ignore=404)
+
+    @patch("search.utils.elastic.close_point_in_time")
+    def test_previous_cursor_is_closed(self, close_mock):
+        previous_cursor = encode_cursor({"pit": "old_pit", "search_after": [1]})
+        self.search(
+            {"cursor": "", "close_cursor": previous_cursor, "size": 2},
+            lambda search: self.build_response(search, 2),
+        )
+        close_mock.assert_called_once_with(body={"id": "old_pit"}, ignore=404)
+
+    @patch("search.builder.elastic.open_point_in_time")
+    def test_expired_point_in_time_is_renewed(self, pit_mock):
+        pit_mock.return_value = {"id": "new_pit"}
+        cursor = encode_cursor({"pit": "expired_pit", "search_after": [1]})
+
+        def execute(search):
+            if search.to_dict()["pit"]["id"] == "expired_pit":
+                raise NotFoundError(404, "search_context_missing_exception")
+            return self.build_response(search, 2, pit_id="new_pit")
+
+        res = self.search({"cursor": cursor, "size": 2}, execute)
+        self.assertEqual(res.status_code, 200)
+        next_cursor = json.loads(res.content)["cursor"]
+        next_cursor = json.loads(base64.urlsafe_b64decode(next_cursor.encode()))
+        self.assertEqual(next_cursor, {"search_after": [1], "pit": "new_pit"})
+
+    def test_invalid_cursor(self):
+        res = self.search({"cursor": "wrong"}, lambda search: None)
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("error", json.loads(res.content))
@@ -1,15 +1,23 @@
 import logging
+import time
+from collections import defaultdict
 
+from django.core.cache import cache
 from django.core.exceptions import FieldDoesNotExist
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Min
+from django.db.models.query import QuerySet
+from django.utils import timezone
 
 from elasticsearch.helpers import bulk
-from elasticsearch.exceptions import ConnectionError
+from elasticsearch.exceptions import ConnectionError, NotFoundError
 
 from core.celery import app
 from categories.models import Category
 from search import elastic, INDEX_SETTINGS
 from documents.models import Document
+from search.models import PendingIndexUpdate
+from search.serializers import get_index_serializer
 from django.conf import settings
 
 
@@ -21,14 +29,198 @@ def refresh_index(index):
     elastic.indices.refresh(index=index)
 
 
+# Physical indexes are versioned, and the index name returned by
+# `Category.get_index_name` is an alias pointing to the current version.
+# This allows to fill a brand new index in the background, and atomically
+# swap the alias when it's ready, so readers never see an empty index.
+#
+# While a new index is being filled, it is also pointed to by a
+# "reindexing" alias, so that live updates are written to both the old
+# and new indexes.
+
+
+def get_versioned_index_name(alias, version):
+    return f"{alias}_v{version}"
+
+
+def get_reindexing_alias(alias):
+    return f"{alias}_reindexing"
+
+
+def get_aliased_indices(alias):
+    """Return the physical indexes an alias points to."""
+    try:
+        indices = elastic.indices.get_alias(name=alias)
+    except NotFoundError:
+        indices = {}
+    return list(indices.keys())
+
+
+def get_reindexing_indices(alias):
+    """Return the indexes being rebuilt for the given alias."""
+    return get_aliased_indices(get_reindexing_alias(alias))
+
+
+def get_next_index_version(alias):
+    """Return the first unused version number for an alias."""
+    prefix = get_versioned_index_name(alias, "")
+    indices = elastic.indices.get(index=f"{prefix}*", ignore=404)
+    versions = [
+        int(index[len(prefix):])
+        for index in indices
+        if index[len(prefix):].isdigit()
+    ]
+    return max(versions, default=0) + 1
+
+
 def create_index(index):
-    """Create all needed indexes."""
-    elastic.indices.create(index=index, ignore=400, body=INDEX_SETTINGS)
+    """Create the first version of an index and the alias pointing to it.
+
+    Nothing happens if the index already exists.
+
+    """
+    if elastic.indices.exists(index=index):
+        return
+
+    body = dict(INDEX_SETTINGS, aliases={index: {}})
+    elastic.indices.create(
+        index=get_versioned_index_name(index, 1), ignore=400, body=body
+    )
+
+
+def create_reindexing_index(alias):
+    """Create a new physical index to be swapped with the current one.
+
+    Until `swap_index` is called, the new index is pointed to by the
+    "reindexing" alias, so live updates are written into it.
+
+    """
+    new_index = get_versioned_index_name(alias, get_next_index_version(alias))
+    body = dict(INDEX_SETTINGS, aliases={get_reindexing_alias(alias): {}})
+    elastic.indices.create(index=new_index, body=body)
+    return new_index
+
+
+def swap_index(alias, new_index):
+    """Atomically points the alias to the new index, and drop the old ones."""
+    old_indices = get_aliased_indices(alias)
+    actions = [
+        {"add": {"index": new_index, "alias": alias}},
+        {"remove": {"index": new_index, "alias": get_reindexing_alias(alias)}},
+    ]
+
+    # Before indexes were versioned, a concrete index was named
+    # after the alias. It must be removed in the same atomic operation.
+    if not old_indices and elastic.indices.exists(index=alias):
+        actions.append({"remove_index": {"index": alias}})
+
+    for index in old_indices:
+        actions.append({"remove": {"index": index, "alias": alias}})
+
+    elastic.indices.update_aliases(body={"actions": actions})
+    bump_index_generation(alias)
+    for index in old_indices:
+        elastic.indices.delete(index=index, ignore=404)
+
+
+def delete_reindexing_index(alias, new_index):
+    """Drop an index created by `create_reindexing_index` without using it.
+
+    The "reindexing" alias is removed first, so live updates immediately
+    stop being written into the index.
+
+    """
+    elastic.indices.delete_alias(
+        index=new_index, name=get_reindexing_alias(alias), ignore=404
+    )
+    elastic.indices.delete(index=new_index, ignore=404)
 
 
 def delete_index(index):
     """Delete existing ES indexes."""
-    elastic.indices.delete(index=index, ignore=404)
+    indices = get_aliased_indices(index) + get_reindexing_indices(index)
+    for physical_index in indices:
+        elastic.indices.delete(index=physical_index, ignore=404)
+
+    # Legacy non-aliased index
+    if elastic.indices.exists(index=index):
+        elastic.indices.delete(index=index, ignore=404)
+
+
+def close_point_in_time(pit_id):
+    """Release a point in time. Expired ones are ignored."""
+    elastic.close_point_in_time(body={"id": pit_id}, ignore=404)
+
+
+def get_index_generation(index):
+    """Return a value that changes every time the index is updated.
+
+    It's used to invalidate data cached from search results.
+
+    """
+    cache_key = "search_index_generation_{}".format(index)
+    generation = cache.get(cache_key)
+    if generation is None:
+        # Start from a timestamp so an evicted generation cannot be reused
+        generation = int(time.time() * 1000)
+        cache.add(cache_key, generation, None)
+    return generation
+
+
+def bump_index_generation(index):
+    cache_key = "search_index_generation_{}".format(index)
+    try:
+        cache.incr(cache_key)
+    except ValueError:
+        cache.set(cache_key, int(time.time() * 1000), None)
+
+
+def bulk_index(actions, **kwargs):
+    """Send bulk actions to ES and invalidate data cached for the indexes.
+
+    Actions are also written to the indexes being rebuilt, if any.
+
+    Cached data must only be invalidated once the changes are visible,
+    otherwise searches running in between would cache stale data again.
+    Hence, the request waits for the next index refresh if no explicit
+    refresh is requested.
+
+    """
+    indices = set()
+
+    def track_indices(actions):
+        for action in actions:
+            indices.add(action["_index"])
+            yield action
+
+    kwargs.setdefault("chunk_size", settings.ELASTIC_BULK_SIZE)
+    kwargs.setdefault("request_timeout", 60)
+    if not kwargs.get("refresh"):
+        kwargs["refresh"] = "wait_for"
+    result = bulk(elastic, track_indices(with_reindexing_indices(actions)), **kwargs)
+
+    for index in indices:
+        bump_index_generation(index)
+    return result
+
+
+def with_reindexing_indices(actions):
+    """Duplicate bulk actions for indexes being rebuilt.
+
+    During a reindex, updates must be written to both the live and the
+    new indexes, otherwise they would be lost when the alias is swapped.
+
+    """
+    reindexing = {}
+    for action in actions:
+        yield action
+
+        index_name = action["_index"]
+        if index_name not in reindexing:
+            reindexing[index_name] = get_reindexing_indices(index_name)
+
+        for index in reindexing[index_name]:
+            yield dict(action, _index=index)
 
 
 def index_revision(revision):
@@ -36,38 +228,190 @@ def index_revision(revision):
     document = revision.document
     es_key = "{}_{}".format(document.document_key, revision.revision)
     index_name = revision.document.category.get_index_name()
+    indices = [index_name] + get_reindexing_indices(index_name)
+    body = revision.to_json()
     try:
-        elastic.index(
-            index=index_name,
-            id=es_key,
-            body=revision.to_json(),
-        )
+        for index in indices:
+            # Changes must be visible before cached data is invalidated
+            elastic.index(
+                index=index,
+                id=es_key,
+                body=body,
+                refresh="wait_for",
+            )
     except ConnectionError:
-        logger.error("Error connecting to ES. The doc %d will no be indexed" % es_key)
+        logger.error("Error connecting to ES. The doc %s will no be indexed" % es_key)
+    else:
+        bump_index_generation(index_name)
 
 
 @app.task
 def index_document(document_id):
     """Index all revisions for a document"""
     document = Document.objects.select_related().get(pk=document_id)
-    revisions = document.get_all_revisions()
-    actions = list(map(build_index_data, revisions))
+    revision_class = document.get_revision_class()
+    revisions = get_index_serializer(revision_class).prepare(
+        revision_class.objects.filter(metadata__document=document)
+    )
+    bulk_index(map(build_index_data, revisions))
+
+
+def index_documents(document_ids, refresh=False):
+    """Index all revisions of several documents in a single bulk request."""
+    documents = Document.objects.filter(
+        pk__in=document_ids, is_indexable=True
+    ).select_related("category__category_template__metadata_model")
+
+    documents_by_class = defaultdict(list)
+    for document in documents:
+        documents_by_class[document.get_revision_class()].append(document.pk)
+
+    actions = []
+    for revision_class, ids in documents_by_class.items():
+        revisions = get_index_serializer(revision_class).prepare(
+            revision_class.objects.filter(metadata__document_id__in=ids)
+        )
+        actions += map(build_index_data, revisions)
+
+    bulk_index(actions, refresh=refresh)
 
-    bulk(elastic, actions, chunk_size=settings.ELASTIC_BULK_SIZE, request_timeout=60)
+
+# Indexing documents synchronously after each edition is costly, especially
+# since the index needs to be refreshed for the changes to be visible.
+# Instead, updated documents are queued, and the queue is processed by a
+# celery task a few seconds later. Multiple updates of a single document
+# are coalesced, and all the queued documents are indexed in bulk.
+
+INDEX_QUEUE_SCHEDULED_KEY = "search_index_queue_scheduled"
+
+
+def queue_document_index(document_id):
+    """Queue a document for indexing."""
+    queue_documents_index([document_id])
+
+
+def queue_documents_index(document_ids):
+    """Queue several documents for indexing."""
+    now = timezone.now()
+    document_ids = set(document_ids)
+    updated = PendingIndexUpdate.objects.filter(document_id__in=document_ids).update(
+        last_queued_on=now
+    )
+    if updated < len(document_ids):
+        # Already queued documents are ignored
+        PendingIndexUpdate.objects.bulk_create(
+            [
+                PendingIndexUpdate(
+                    document_id=document_id, queued_on=now, last_queued_on=now
+                )
+                for document_id in document_ids
+            ],
+            ignore_conflicts=True,
+        )
+    transaction.on_commit(schedule_index_queue)
+
+
+def schedule_index_queue():
+    """Plan the queue processing, unless it's already planned."""
+    delay = settings.ELASTIC_INDEX_QUEUE_DELAY
+    if cache.add(INDEX_QUEUE_SCHEDULED_KEY, True, delay):
+        process_index_queue.apply_async(countdown=delay)
+
+
+@app.task
+def process_index_queue():
+    """Index all queued documents."""
+    # Documents queued from now on must schedule a new processing, since
+    # they may not be part of this one
+    cache.delete(INDEX_QUEUE_SCHEDULED_KEY)
+
+    stats = get_index_queue_stats()
+    logger.info(
+        "Processing index queue: {depth} documents, {lag:.1f}s lag".format(**stats)
+    )
+
+    # Documents queued again during the processing must stay in the queue
+    start = timezone.now()
+    entries = (
+        PendingIndexUpdate.objects.filter(last_queued_on__lte=start)
+        .order_by("id")
+        .values_list("id", "document_id")
+    )
+    last_id = 0
+    try:
+        while True:
+            chunk = list(entries.filter(id__gt=last_id)[: settings.ELASTIC_BULK_SIZE])
+            if not chunk:
+                break
+
+            ids, document_ids = zip(*chunk)
+            index_documents(document_ids, refresh="wait_for")
+            PendingIndexUpdate.objects.filter(
+                id__in=ids, last_queued_on__lte=start
+            ).delete()
+            last_id = ids[-1]
+    finally:
+        # Documents queued again during the processing, or left in the queue
+        # because indexing failed, e.g if Elasticsearch cannot be reached
+        if PendingIndexUpdate.objects.exists():
+            schedule_index_queue()
+
+
+def get_index_queue_stats():
+    """Return the queue depth, and the age of the oldest entry (seconds)."""
+    stats = PendingIndexUpdate.objects.aggregate(
+        depth=Count("id"), oldest=Min("queued_on")
+    )
+    oldest = stats["oldest"]
+    lag = (timezone.now() - oldest).total_seconds() if oldest else 0
+    return {"depth": stats["depth"], "lag": lag}
 
 
 def index_revisions(revisions):
     """Index a bunch of revisions."""
-    actions = list(map(build_index_data, revisions))
-    bulk(elastic, actions, chunk_size=settings.ELASTIC_BULK_SIZE, request_timeout=60)
-
-    indices = set([a['_index'] for a in actions])
-    for index in indices:
-        refresh_index(index)
+    if isinstance(revisions, QuerySet):
+        revisions = get_index_serializer(revisions.model).prepare(revisions)
+    bulk_index(map(build_index_data, revisions), refresh=True)
 
 
 def bulk_actions(actions):
-    bulk(elastic, actions, chunk_size=settings.ELASTIC_BULK_SIZE, request_timeout=60)
+    bulk_index(actions)
+
+
+def iter_revisions(revisions, chunk_size=None):
+    """Iterate over a revision queryset with keyset pagination.
+
+    Revisions are fetched by chunks ordered by pk, so only `chunk_size`
+    objects are held in memory at any time, whatever the size of the
+    queryset.
+
+    """
+    chunk_size = chunk_size or settings.ELASTIC_BULK_SIZE
+    revisions = revisions.order_by("pk")
+    last_pk = None
+    while True:
+        qs = revisions if last_pk is None else revisions.filter(pk__gt=last_pk)
+        chunk = list(qs[:chunk_size])
+        if not chunk:
+            break
+
+        yield from chunk
+        last_pk = chunk[-1].pk
+
+
+def iter_index_data(revisions, chunk_size=None, index_names=None):
+    """Lazily generates the bulk actions to index a revision queryset.
+
+    `index_names` is an optional mapping used to redirect the actions
+    to other indexes than the ones used by default.
+
+    """
+    revisions = get_index_serializer(revisions.model).prepare(revisions)
+    index_names = index_names or {}
+    for revision in iter_revisions(revisions, chunk_size):
+        action = build_index_data(revision)
+        action["_index"] = index_names.get(action["_index"], action["_index"])
+        yield action
 
 
 def build_index_data(revision):
@@ -93,13 +437,7 @@ def unindex_document(document_id):
         for revision in revisions
     ]
 
-    bulk(
-        elastic,
-        actions,
-        raise_on_error=False,
-        chunk_size=settings.ELASTIC_BULK_SIZE,
-        request_timeout=60,
-    )
+    bulk_index(actions, raise_on_error=False, refresh="wait_for")
 
 
 TYPE_MAPPING = [
@@ -130,12 +468,12 @@ TYPE_MAPPING = [
 
 
 @app.task
-def put_category_mapping(category_id):
+def put_category_mapping(category_id, index_name=None):
     category = Category.objects.select_related(
         "organisation", "category_template__metadata_model"
     ).get(pk=category_id)
 
-    index_name = category.get_index_name()
+    index_name = index_name or category.get_index_name()
     doc_class = category.document_class()
     mapping = get_mapping(doc_class)
     elastic.indices.put_mapping(
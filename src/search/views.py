@@ -1,4 +1,6 @@
 from braces.views import JSONResponseMixin
+from django.core.cache import cache
+from elasticsearch.exceptions import NotFoundError
 
 from search.builder import SearchBuilder
 from documents.views import BaseDocumentList
@@ -6,8 +8,27 @@ from django.conf import settings
 
 
 class SearchDocuments(JSONResponseMixin, BaseDocumentList):
+    """Search documents in the category index.
+
+    Aggregations (facets) are cached until the index is updated. Clients
+    that already have them can skip them with the `skip_aggregations`
+    parameter.
+
+    When a new search replaces a paginated one, clients send the last
+    cursor they received in the `close_cursor` parameter, so its point in
+    time can be released.
+
+    """
+
     http_method_names = ["get"]
 
+    def get(self, request, *args, **kwargs):
+        try:
+            return super(SearchDocuments, self).get(request, *args, **kwargs)
+        except RuntimeError as e:
+            # Invalid search filters or cursor
+            return self.render_json_response({"error": str(e)}, status=400)
+
     def get_queryset(self):
         """Given DataTables' GET parameters, filter the initial queryset."""
         super(SearchDocuments, self).get_queryset()
@@ -15,15 +36,34 @@ class SearchDocuments(JSONResponseMixin, BaseDocumentList):
             entities = self.get_external_filtering()
         else:
             entities = None
+
+        self.aggregations = None
+        self.aggregations_cache_key = None
+        builder = SearchBuilder(
+            self.category,
+            self.request.GET,
+            filter_on_entities=entities,
+            use_cursor="cursor" in self.request.GET,
+        )
+        self.builder = builder
+        if self.request.GET.get("close_cursor"):
+            builder.close_cursor(self.request.GET["close_cursor"])
+
+        query = builder.build_query()
+        if "skip_aggregations" not in self.request.GET:
+            self.aggregations_cache_key = builder.get_aggregations_cache_key()
+            self.aggregations = cache.get(self.aggregations_cache_key)
+            if self.aggregations is None:
+                query = builder.add_aggregations(query)
+
         try:
-            builder = SearchBuilder(
-                self.category, self.request.GET, filter_on_entities=entities
-            )
-            query = builder.build_query()
-            query = builder.add_aggregations(query)
             results = query.execute()
-        except RuntimeError:
-            results = []
+        except NotFoundError:
+            if not builder.pit_id:
+                raise
+            # The point in time of the cursor has expired
+            query = builder.renew_point_in_time(query)
+            results = query.execute()
 
         return results
 
@@ -31,20 +71,34 @@ class SearchDocuments(JSONResponseMixin, BaseDocumentList):
         return self.render_json_response(context, **response_kwargs)
 
     def get_context_data(self, **kwargs):
-        response = self.get_queryset()
+        response = self.object_list
         start = int(self.request.GET.get("start", 0))
         end = start + int(self.request.GET.get("length", settings.PAGINATE_BY))
         total = response.hits.total.value
         display = min(end, total)
         search_data = [hit._d_ for hit in response.hits]
-        aggregations = self.format_aggregations(response.aggregations)
 
-        return {
+        context = {
             "total": total,
             "display": display,
             "data": search_data,
-            "aggregations": aggregations,
         }
+        if self.aggregations_cache_key:
+            context["aggregations"] = self.get_aggregations(response)
+        if self.builder.use_cursor:
+            context["cursor"] = self.builder.get_cursor(response)
+
+        return context
+
+    def get_aggregations(self, response):
+        if self.aggregations is None:
+            self.aggregations = self.format_aggregations(response.aggregations)
+            cache.set(
+                self.aggregations_cache_key,
+                self.aggregations,
+                settings.CACHE_TIMEOUT_SECONDS,
+            )
+        return self.aggregations
 
     def format_aggregations(self, aggregations):
         """Transfroms the ES "aggregations" response into something we can use.
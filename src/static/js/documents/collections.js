@@ -10,7 +10,11 @@ var Phase = Phase || {};
         url: Phase.Config.searchUrl,
         parse: function(response) {
             this.total = response.total;
-            this.aggregations = response.aggregations;
+            // Aggregations are not sent back when fetching the next pages
+            if (response.aggregations) {
+                this.aggregations = response.aggregations;
+            }
+            this.cursor = response.cursor;
             return response.data;
         }
     });
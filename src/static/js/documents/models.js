@@ -21,7 +21,9 @@ var Phase = Phase || {};
                 search_terms: '',
                 sort_by: 'document_number',
                 start: 0,
-                size: Phase.Config.paginateBy
+                size: Phase.Config.paginateBy,
+                cursor: '',
+                close_cursor: ''
             };
             return defaults;
         },
@@ -40,23 +42,35 @@ var Phase = Phase || {};
          * Since we don't want to replace the currently displayed results,
          * we don't trigger the "change" event, and let the calling object
          * be responsible of triggering the actual search query.
+         *
+         * The cursor is the opaque token returned by the previous search
+         * query, that lets the server fetch the next page efficiently.
          */
-        nextPage: function() {
+        nextPage: function(cursor) {
             var start = this.get('start');
             var size = this.get('size');
-            this.set('start', start + size, {silent: true});
+            this.set({
+                'start': start + size,
+                'cursor': cursor,
+                'close_cursor': ''
+            }, {silent: true});
         },
         /**
          * Set the pagination params to fetch the first results.
          *
          * Don't trigger the "change" event, so we let the calling object be
          * responsible of triggering the actual search query.
+         *
+         * The last cursor of the previous search is sent along with the
+         * query, so the server can release it.
          */
-        firstPage: function() {
+        firstPage: function(previousCursor) {
             var defaults = this.defaults();
             this.set({
                 'start': defaults.start,
-                'size': defaults.size
+                'size': defaults.size,
+                'cursor': defaults.cursor,
+                'close_cursor': previousCursor || defaults.close_cursor
             }, {silent: true});
         }
     });
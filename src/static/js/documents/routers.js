@@ -83,6 +83,8 @@ var Phase = Phase || {};
             // because it breaks… stuff.
             delete searchParams.size;
             delete searchParams.start;
+            delete searchParams.cursor;
+            delete searchParams.close_cursor;
 
             return searchParams;
         },
@@ -92,14 +94,22 @@ var Phase = Phase || {};
          */
         resetPagination: function() {
             this.tableContainer.scrollTop(0);
-            this.search.firstPage();
+            this.search.firstPage(this.documentsCollection.cursor);
         },
         /**
          * Call the API to get actual search results.
          */
         fetchDocuments: function(reset) {
+            var data = _.clone(this.search.attributes);
+
+            // Aggregations only depend on the search filters, so there is
+            // no need to compute them again for the next pages
+            if (this.search.get('start') > 0) {
+                data.skip_aggregations = 1;
+            }
+
             this.documentsCollection.fetch({
-                data: this.search.attributes,
+                data: data,
                 remove: false,
                 reset: reset,
                 success: this.onDocumentsFetched
@@ -124,7 +134,12 @@ var Phase = Phase || {};
          * download more search results.
          */
         onMoreDocumentsRequested: function() {
-            this.search.nextPage();
+            // No cursor means the last page was already fetched
+            var cursor = this.documentsCollection.cursor;
+            if (!cursor) {
+                return;
+            }
+            this.search.nextPage(cursor);
             this.fetchDocuments(false);
         },
         /**
@@ -172,6 +187,8 @@ var Phase = Phase || {};
             // Pagination params should not make it to the url
             delete attributes.start;
             delete attributes.size;
+            delete attributes.cursor;
+            delete attributes.close_cursor;
 
             // Let's remove attributes with empty values, so the search
             // url only contains meaningful parameters
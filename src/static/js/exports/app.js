@@ -0,0 +1,7 @@
+var Phase = Phase || {};
+
+jQuery(function($) {
+    $('.export-progress[data-poll-url]').each(function(index, element) {
+        new Phase.Views.ExportProgressView({el: element});
+    });
+});
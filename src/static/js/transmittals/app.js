@@ -3,4 +3,8 @@ var Phase = Phase || {};
 jQuery(function($) {
     var tableView = new Phase.Views.TableView();
     var downoadFormView = new Phase.Views.DownloadFormView();
+
+    $('.transmittal-progress[data-poll-url]').each(function(index, element) {
+        new Phase.Views.TransmittalProgressView({el: element});
+    });
 });
@@ -69,4 +69,31 @@ var Phase = Phase || {};
         }
     });
 
+
+    /**
+     * Display the progress of an ongoing transmittal import.
+     */
+    Phase.Views.TransmittalProgressView = Backbone.View.extend({
+        initialize: function() {
+            _.bindAll(this, 'poll', 'pollSuccess');
+
+            this.pollUrl = this.$el.data('poll-url');
+            this.progressBar = this.$el.find('.progress-bar');
+            this.pollId = setInterval(this.poll, 2000);
+        },
+        poll: function() {
+            $.get(this.pollUrl, this.pollSuccess);
+        },
+        pollSuccess: function(data) {
+            var progress = Math.round(data.progress);
+            this.progressBar.attr('aria-valuenow', progress);
+            this.progressBar.css('width', progress + '%');
+            this.progressBar.text(progress + '%');
+            if (data.done) {
+                clearInterval(this.pollId);
+                location.reload();
+            }
+        }
+    });
+
 })(this, Phase, Backbone, _);
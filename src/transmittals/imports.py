@@ -1,15 +1,15 @@
 import os
 import csv
+import errno
+import copy
 import shutil
 import logging
-import glob
 import datetime
+from collections import defaultdict
 
 from django.db import transaction
 from django.core.files import File
 
-from annoying.functions import get_object_or_None
-
 from documents.models import Document
 from documents.utils import save_document_forms
 from transmittals.validation import TrsValidator, CSVLineValidator, RevisionsValidator
@@ -55,16 +55,39 @@ class TrsImport(object):
         self.TrsValidator = trs_validator or TrsValidator
         self.CSVLineValidator = csv_line_validator or CSVLineValidator
 
+        # Transmittals of the same batch which are imported before this one
+        self.pending_imports = set()
+        # Sequential number validator that must run again once the previous
+        # transmittal of the batch is imported
+        self.deferred_sequence_validator = None
+
         self._errors = None
         self._csv_cols = None
         self._csv_lines = None
-        self._pdf_names = None
-        self._native_names = None
+        self._lines = None
+        self._lookup = None
+        self._dir_index = None
 
     def __iter__(self):
-        for line in self.csv_lines():
-            import_line = TrsImportLine(line, self)
-            yield import_line
+        return iter(self.lines())
+
+    def lines(self):
+        """Returns the list of import lines.
+
+        Lines are only built once, so they can cache their own data (e.g bound
+        forms) between validation and saving.
+
+        """
+        if self._lines is None:
+            self._lines = [TrsImportLine(line, self) for line in self.csv_lines()]
+        return self._lines
+
+    @property
+    def lookup(self):
+        """Database objects referenced by the csv lines."""
+        if self._lookup is None:
+            self._lookup = TrsLookup(self.csv_lines())
+        return self._lookup
 
     def do_import(self):
         logger.info("Starting import of transmittals %s" % self.basename)
@@ -76,6 +99,17 @@ class TrsImport(object):
             self.save()
             self.move_to_tobechecked()
 
+    def release(self):
+        """Drop the data loaded for validation and import.
+
+        Errors are kept, so they can still be reported.
+
+        """
+        self._csv_lines = None
+        self._lines = None
+        self._lookup = None
+        self._dir_index = None
+
     def move_to_rejected(self):
         """Move the imported transmittals directory to rejected."""
         new_path = os.path.join(self.rejected_dir, self.basename)
@@ -172,23 +206,20 @@ class TrsImport(object):
             self._csv_lines = lines
         return self._csv_lines
 
+    @property
+    def dir_index(self):
+        """Files of the transmittal directory."""
+        if self._dir_index is None:
+            self._dir_index = TrsDirIndex(self.trs_dir, self.csv_basename)
+        return self._dir_index
+
     def pdf_names(self):
         """Returns the list of pdf files."""
-        if not self._pdf_names:
-            files = os.listdir(self.trs_dir)
-            self._pdf_names = [f for f in files if f.endswith("pdf")]
-
-        return self._pdf_names
+        return self.dir_index.pdf_names
 
     def native_names(self):
         """Returns the list of native files."""
-        if not self._native_names:
-            files = os.listdir(self.trs_dir)
-            self._native_names = [
-                f for f in files if (not f.endswith("pdf")) and f != self.csv_basename
-            ]
-
-        return self._native_names
+        return self.dir_index.native_names
 
     @property
     def errors(self):
@@ -268,14 +299,7 @@ class TrsImport(object):
         from transmittals.forms import TransmittalForm, TransmittalRevisionForm
 
         # Build the list of related documents
-        keys = []
-        for line in self:
-            key = line.csv_data["document_key"]
-            if key not in keys:
-                keys.append(key)
-        related_documents = Document.objects.filter(document_key__in=keys).values_list(
-            "id", flat=True
-        )
+        related_documents = self.lookup.get_document_ids()
 
         data = {
             "contractor": self.contractor,
@@ -287,7 +311,7 @@ class TrsImport(object):
             "recipient": self.recipient,
             "sequential_number": self.sequential_number,
             "status": "tobechecked",
-            "related_documents": list(related_documents),
+            "related_documents": related_documents,
             "revision_date": datetime.date.today(),
             "received_date": datetime.date.today(),
             "created_on": datetime.date.today(),
@@ -310,8 +334,8 @@ class TrsImport(object):
 
         native_file.close()
 
-        nb_line = 0
-        for line in self:
+        trs_revisions = []
+        for nb_line, line in enumerate(self):
             data = line.cleaned_data
             metadata = line.get_metadata()
             document = getattr(metadata, "document", None)
@@ -328,28 +352,201 @@ class TrsImport(object):
                 latest_revision = metadata.latest_revision.revision
                 is_new_revision = bool(int(data["revision"]) > latest_revision)
 
-            pdf_file = File(open(line.pdf_fullname, "rb"))
-            native_file = line.native_fullname
-            if native_file:
-                native_file = File(open(native_file, "rb"))
-
             data.update(
                 {
                     "transmittal": transmittal,
                     "document": document,
                     "is_new_revision": is_new_revision,
                     "category": self.doc_category,
-                    "pdf_file": pdf_file,
-                    "native_file": native_file,
                     "sequential_number": line.sequential_number,  # XXX Hack
                 }
             )
-            TrsRevision.objects.create(**data)
-            nb_line += 1
+            trs_revision = TrsRevision(**data)
+            trs_revision.pdf_file = store_file(
+                trs_revision, "pdf_file", line.pdf_fullname
+            )
+            native_file = line.native_fullname
+            if native_file:
+                trs_revision.native_file = store_file(
+                    trs_revision, "native_file", native_file
+                )
+            trs_revisions.append(trs_revision)
+
+        TrsRevision.objects.bulk_create(trs_revisions, batch_size=500)
+
+
+# Errors meaning that a file cannot be hard linked to its destination, e.g
+# because it's on another filesystem
+LINK_ERRORS = (
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EACCES,
+    errno.EMLINK,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+)
+
+
+def store_file(instance, field_name, path):
+    """Store a file in the field's storage without copying it, if possible.
+
+    The file is hard linked to its destination, and copied if it cannot be
+    linked, e.g if it's not on the same filesystem. Existing files are never
+    overwritten. Return the stored file name.
+
+    """
+    field = instance._meta.get_field(field_name)
+    storage = field.storage
+    name = field.generate_filename(instance, path)
+    name = storage.get_available_name(name, max_length=field.max_length)
+    link = True
+    while True:
+        destination = storage.path(name)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        try:
+            if link:
+                os.link(path, destination)
+            else:
+                with open(path, "rb") as src, open(destination, "xb") as dst:
+                    shutil.copyfileobj(src, dst)
+            return name
+        except FileExistsError:
+            # Another file was stored with the same name in the meantime. The
+            # storage's `get_available_name` would delete it, so pick another
+            # name directly.
+            root, ext = os.path.splitext(name)
+            name = storage.get_alternative_name(root, ext)
+        except OSError as e:
+            if not link or e.errno not in LINK_ERRORS:
+                raise
+            link = False
+
+
+class TrsDirIndex(object):
+    """Files of a transmittal directory.
+
+    The directory is only listed once, and files are indexed by name without
+    extension, so finding a line's files does not require any more syscall.
+
+    """
+
+    def __init__(self, trs_dir, csv_basename):
+        self.names = set()
+        self.pdf_names = []
+        self.native_names = []
+        self.by_stem = defaultdict(list)
 
-            pdf_file.close()
-            if hasattr(native_file, "close"):
-                native_file.close()
+        with os.scandir(trs_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                self.names.add(name)
+                if name.endswith("pdf"):
+                    self.pdf_names.append(name)
+                elif name != csv_basename:
+                    self.native_names.append(name)
+                stem, ext = os.path.splitext(name)
+                self.by_stem[stem].append(name)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def get_files(self, stem):
+        """Returns the files with the given name, whatever the extension."""
+        return self.by_stem.get(stem, [])
+
+
+def get_m2m_names(model):
+    """Many to many fields are needed to build the model's forms."""
+    return [field.name for field in model._meta.many_to_many]
+
+
+class TrsLookup(object):
+    """Documents, metadata and revisions referenced by a transmittal csv.
+
+    Everything is loaded with a few queries per transmittal, instead of
+    fetching objects again for every single csv line.
+
+    """
+
+    def __init__(self, csv_lines):
+        keys = {line.get("document_key") for line in csv_lines}
+        keys.discard(None)
+        trigrams = {line.get("originator") for line in csv_lines}
+        trigrams.discard(None)
+
+        documents = Document.objects.select_related(
+            "category__category_template"
+        ).filter(document_key__in=keys)
+        self.documents = {document.document_key: document for document in documents}
+        self.metadata = self.fetch_metadata(list(self.documents.values()))
+        self.revisions = self.fetch_revisions(list(self.metadata.values()), csv_lines)
+        self.entities = dict(
+            Entity.objects.filter(trigram__in=trigrams).values_list("trigram", "id")
+        )
+
+    def fetch_metadata(self, documents):
+        """Load metadata, with one query per document category."""
+        documents_by_category = defaultdict(list)
+        for document in documents:
+            documents_by_category[document.category].append(document)
+
+        metadata = {}
+        for category, category_documents in documents_by_category.items():
+            Metadata = category.document_class()
+            qs = (
+                Metadata.objects.select_related(
+                    "latest_revision", "document__category__category_template"
+                )
+                .prefetch_related(*get_m2m_names(Metadata))
+                .filter(document__in=category_documents)
+            )
+            metadata.update({item.document_id: item for item in qs})
+        return metadata
+
+    def fetch_revisions(self, metadata, csv_lines):
+        """Load the revisions which number appear in the csv."""
+        numbers = set()
+        for line in csv_lines:
+            try:
+                numbers.add(int(line.get("revision")))
+            except (TypeError, ValueError):
+                pass
+
+        metadata_by_class = defaultdict(list)
+        for item in metadata:
+            metadata_by_class[item.get_revision_class()].append(item)
+
+        revisions = {}
+        for Revision, class_metadata in metadata_by_class.items():
+            by_id = {item.id: item for item in class_metadata}
+            qs = (
+                Revision.objects.prefetch_related(*get_m2m_names(Revision))
+                .filter(metadata__in=class_metadata)
+                .filter(revision__in=numbers)
+            )
+            for revision in qs:
+                revision.metadata = by_id[revision.metadata_id]
+                revisions[(revision.metadata_id, revision.revision)] = revision
+        return revisions
+
+    def get_document_ids(self):
+        return [document.id for document in self.documents.values()]
+
+    def get_document(self, document_key):
+        return self.documents.get(document_key)
+
+    def get_metadata(self, document):
+        return self.metadata.get(document.id)
+
+    def get_revision(self, metadata, revision_num):
+        try:
+            revision_num = int(revision_num)
+        except (TypeError, ValueError):
+            return None
+        return self.revisions.get((metadata.id, revision_num))
+
+    def get_entity_id(self, trigram):
+        return self.entities.get(trigram)
 
 
 class TrsImportLine(object):
@@ -361,8 +558,7 @@ class TrsImportLine(object):
         self.trs_dir = trs_import.trs_dir
 
         self._errors = None
-        self._document = None
-        self._metadata = None
+        self._forms = None
 
     @property
     def form_data(self):
@@ -380,12 +576,7 @@ class TrsImportLine(object):
         return self._form_data
 
     def clean_originator(self, value):
-        try:
-            originator = Entity.objects.get(trigram=value)
-        except:  # noqa
-            return None
-
-        return originator.id
+        return self.trs_import.lookup.get_entity_id(value)
 
     @property
     def errors(self):
@@ -410,11 +601,10 @@ class TrsImportLine(object):
     @property
     def native_fullname(self):
         """Get the fullname of the native file or None if there isn't one."""
-        # Since we don't know the native file extension, we have to perform
-        # a search using the `glob` module.
-        pdf = self.pdf_fullname
-        stripped_name = pdf[0:-4]
-        natives = glob.glob("{}*".format(stripped_name))
+        # Since we don't know the native file extension, we have to search
+        # files with the same name as the pdf.
+        stripped_name = self.pdf_basename[0:-4]
+        natives = self.trs_import.dir_index.get_files(stripped_name)
 
         if len(natives) < 1 or len(natives) > 2:
             raise RuntimeError("Oops. Wrong number of files here.")
@@ -427,30 +617,23 @@ class TrsImportLine(object):
             # We found the pdf and the native
             first_extension = natives[0].split(".")[-1]
             if first_extension == "pdf":
-                return natives[1]
+                native = natives[1]
             else:
-                return natives[0]
+                native = natives[0]
+            return os.path.join(self.trs_dir, native)
 
     @property
     def sequential_number(self):
         return self.csv_data["document_key"].split("-")[5]
 
     def get_document(self):
-        if self._document is None:
-            qs = Document.objects.select_related("category__category_template")
-            self._document = get_object_or_None(
-                qs, document_key=self.csv_data["document_key"]
-            )
-
-        return self._document
+        return self.trs_import.lookup.get_document(self.csv_data["document_key"])
 
     def get_metadata(self):
-        if self._metadata is None:
-            doc = self.get_document()
-            if doc is not None:
-                self._metadata = doc.metadata
-
-        return self._metadata
+        doc = self.get_document()
+        if doc is None:
+            return None
+        return self.trs_import.lookup.get_metadata(doc)
 
     def get_metadata_form_class(self):
         return self.trs_import.doc_category.get_metadata_form_class()
@@ -461,25 +644,32 @@ class TrsImportLine(object):
     def get_forms(self):
         """Returns the bound forms.
 
-        The document MUST exist in the database.
+        Forms are only built once, so they are only validated once too.
 
         """
-        metadata = self.get_metadata()
-
-        MetadataForm = self.get_metadata_form_class()
-        metadata_form = MetadataForm(
-            self.form_data, instance=metadata, category=self.trs_import.doc_category
-        )
-
-        revision_num = self.csv_data["revision"]
-        revision = metadata.get_revision(revision_num) if metadata else None
+        if self._forms is None:
+            lookup = self.trs_import.lookup
+            metadata = self.get_metadata()
+            revision_num = self.csv_data["revision"]
+            revision = lookup.get_revision(metadata, revision_num) if metadata else None
+
+            # Instances are shared between lines of the same document, and
+            # validating a form updates its instance.
+            metadata = copy.copy(metadata)
+            revision = copy.copy(revision)
+
+            MetadataForm = self.get_metadata_form_class()
+            metadata_form = MetadataForm(
+                self.form_data, instance=metadata, category=self.trs_import.doc_category
+            )
 
-        RevisionForm = self.get_revision_form_class()
-        revision_form = RevisionForm(
-            self.form_data, instance=revision, category=self.trs_import.doc_category
-        )
+            RevisionForm = self.get_revision_form_class()
+            revision_form = RevisionForm(
+                self.form_data, instance=revision, category=self.trs_import.doc_category
+            )
+            self._forms = metadata_form, revision_form
 
-        return metadata_form, revision_form
+        return self._forms
 
     @property
     def cleaned_data(self):
@@ -9,6 +9,7 @@ from annoying.functions import get_object_or_None
 
 from categories.models import Category
 from transmittals.imports import TrsImport
+from transmittals.scheduler import TrsImportScheduler
 from transmittals.validation import Validator
 
 
@@ -41,6 +42,13 @@ class Command(BaseCommand):
             default=False,
             help="Choose a custom single csv line validator class",
         )
+        parser.add_argument(
+            "--workers",
+            dest="workers",
+            type=int,
+            default=settings.TRS_IMPORTS_WORKERS,
+            help="Number of transmittals validated concurrently",
+        )
 
     def handle(self, *args, **options):
         from transmittals.models import Transmittal
@@ -91,10 +99,9 @@ class Command(BaseCommand):
         # Start import
         incoming_dir = ctr_config["INCOMING_DIR"]
         dir_content = sorted(os.listdir(incoming_dir))
-        for incoming in dir_content:
-            fullname = os.path.join(incoming_dir, incoming)
-            self.import_dir(
-                fullname,
+        trs_imports = [
+            self.get_import(
+                os.path.join(incoming_dir, incoming),
                 ctr_config,
                 contractor_id,
                 doc_category,
@@ -102,6 +109,16 @@ class Command(BaseCommand):
                 TrsValidator,
                 CsvLineValidator,
             )
+            for incoming in dir_content
+        ]
+        scheduler = TrsImportScheduler(trs_imports, workers=options["workers"])
+        timings = scheduler.run()
+        for basename, timing in timings.items():
+            logger.info(
+                "Transmittal {}: validation {:.2f}s, import {:.2f}s".format(
+                    basename, timing.get("validation", 0), timing.get("import", 0)
+                )
+            )
 
     def get_category(self, path):
         """Takes a string "organisation_slug/category_slug" and returns a category."""
@@ -126,7 +143,7 @@ class Command(BaseCommand):
             error = 'The directory "%s" is not writeable.' % path
             raise CommandError(error)
 
-    def import_dir(
+    def get_import(
         self,
         directory,
         config,
@@ -136,10 +153,8 @@ class Command(BaseCommand):
         TrsValidator,
         CsvLineValidator,
     ):
-        """Start the import task for a single directory."""
-        logger.info("Starting import of trs in %s" % directory)
-
-        trsImport = TrsImport(
+        """Build the import of a single directory."""
+        return TrsImport(
             directory,
             tobechecked_dir=config["TO_BE_CHECKED_DIR"],
             accepted_dir=config["ACCEPTED_DIR"],
@@ -151,7 +166,6 @@ class Command(BaseCommand):
             trs_validator=TrsValidator,
             csv_line_validator=CsvLineValidator,
         )
-        trsImport.do_import()
 
     def import_validator(self, validator_path):
         """Import a validator class from it's path."""
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transmittals', '0060_auto_20210701_1521'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transmittal',
+            name='task_id',
+            field=models.CharField(blank=True, default='', help_text='The id of the celery task importing the transmittal', max_length=50, verbose_name='Task id'),
+        ),
+        migrations.AddField(
+            model_name='trsrevision',
+            name='processed_date',
+            field=models.DateTimeField(blank=True, help_text='When the line was saved to the document', null=True, verbose_name='Processed date'),
+        ),
+    ]
@@ -20,6 +20,7 @@ from documents.utils import save_document_forms
 from documents.models import Document, Metadata, MetadataRevision, MetadataRevisionBase
 from documents.templatetags.documents import MenuItem
 from reviews.models import CLASSES, ReviewMixin
+from schedules.handlers import update_schedule_section
 from search.utils import build_index_data, bulk_actions
 from metadata.fields import ConfigurableChoiceField
 from default_documents.validators import StringNumberValidator
@@ -30,6 +31,7 @@ from transmittals.fields import (
     ClientCommentsFileField,
 )
 from transmittals.fileutils import file_transmitted_file_path
+from transmittals.imports import TrsLookup
 from transmittals.pdf import transmittal_to_pdf
 
 
@@ -100,6 +102,13 @@ class Transmittal(Metadata):
     tobechecked_dir = models.CharField(max_length=255, null=True, blank=True)
     accepted_dir = models.CharField(max_length=255, null=True, blank=True)
     rejected_dir = models.CharField(max_length=255, null=True, blank=True)
+    task_id = models.CharField(
+        _("Task id"),
+        max_length=50,
+        blank=True,
+        default="",
+        help_text=_("The id of the celery task importing the transmittal"),
+    )
 
     class Meta:
         app_label = "transmittals"
@@ -167,6 +176,20 @@ class Transmittal(Metadata):
     def title(self):
         return self.document_key
 
+    def get_progress(self):
+        """Return the percentage of imported lines."""
+        if self.status == self.STATUSES.accepted:
+            return 100.0
+        revisions = self.trsrevision_set.all()
+        total = revisions.count()
+        if not total:
+            return 0.0
+        processed = revisions.exclude(processed_date=None).count()
+        return float(processed) / total * 100
+
+    def get_poll_url(self):
+        return reverse("task_poll", args=[self.task_id]) if self.task_id else ""
+
     @transaction.atomic
     def reject(self):
         """Mark the transmittal as rejected.
@@ -187,6 +210,14 @@ class Transmittal(Metadata):
             )
             raise RuntimeError(error_msg)
 
+        # Documents of a partially imported transmittal were already updated
+        if self.trsrevision_set.exclude(processed_date=None).exists():
+            error_msg = (
+                "The transmittal {} cannot be rejected "
+                "since its import was started".format(self.document_key)
+            )
+            raise RuntimeError(error_msg)
+
         # If an existing version already exists in rejected, we delete it before
         if os.path.exists(self.full_rejected_name):
             # Let's hope we got correct data and the process does not run
@@ -236,10 +267,13 @@ class Transmittal(Metadata):
             )
             raise RuntimeError(error_msg)
 
+        # The task id is known beforehand, so the progress can be polled
+        # as soon as the import is started
         self.status = "processing"
+        self.task_id = str(uuid.uuid4())
         self.save()
 
-        process_transmittal.delay(self.pk)
+        process_transmittal.apply_async((self.pk,), task_id=self.task_id)
 
 
 class TransmittalRevision(MetadataRevision):
@@ -275,6 +309,12 @@ class TrsRevision(models.Model):
     accepted = models.BooleanField(verbose_name=_("Accepted?"), null=True)
     comment = models.TextField(verbose_name=_("Comment"), null=True, blank=True)
     is_new_revision = models.BooleanField(_("Is new revision?"))
+    processed_date = models.DateTimeField(
+        _("Processed date"),
+        null=True,
+        blank=True,
+        help_text=_("When the line was saved to the document"),
+    )
 
     # We'll keep it for a while.
     # Those are fields that will one day be configurable
@@ -414,36 +454,101 @@ class TrsRevision(models.Model):
 
         return fields_dict, files_dict
 
-    def save_to_document(self):
-        """Use self data to create / update the corresponding revision."""
+    def save_to_document(self, metadata=None, revision=None, rewrite_schedule=True):
+        """Use self data to create / update the corresponding revision.
+
+        The existing metadata and revision are fetched from the db, unless
+        they are given, e.g by `bulk_save_to_documents`.
+
+        """
 
         fields, files = self.get_document_fields()
         kwargs = {"category": self.category, "data": fields, "files": files}
 
-        # The document was created earlier during
-        # the batch import
-        if self.document is None and self.revision > 0:
-            self.document = Document.objects.get(document_key=self.document_key)
+        if metadata is None:
+            # The document was created earlier during
+            # the batch import
+            if self.document is None and self.revision > 0:
+                self.document = Document.objects.get(document_key=self.document_key)
+
+            metadata = getattr(self.document, "metadata", None)
+
+            # If there is no such revision, the method will return None
+            # which is fine.
+            revision = metadata.get_revision(self.revision) if metadata else None
 
-        metadata = getattr(self.document, "metadata", None)
         kwargs.update({"instance": metadata})
         Form = self.category.get_metadata_form_class()
         metadata_form = Form(**kwargs)
 
-        # If there is no such revision, the method will return None
-        # which is fine.
-        revision = metadata.get_revision(self.revision) if metadata else None
-
         kwargs.update({"instance": revision})
         RevisionForm = self.category.get_revision_form_class()
         revision_form = RevisionForm(**kwargs)
 
         doc, meta, rev = save_document_forms(
-            metadata_form, revision_form, self.category
+            metadata_form,
+            revision_form,
+            self.category,
+            rewrite_schedule=rewrite_schedule,
         )
 
         # Performs custom import action
         rev.post_trs_import(self)
+        return doc, meta, rev
+
+    @classmethod
+    def bulk_save_to_documents(cls, trs_revisions):
+        """Call `save_to_document` on several revisions.
+
+        Existing documents, metadata and revisions are fetched with a few
+        queries for all the given revisions, instead of for each of them.
+
+        Revisions must be ordered like in `process_transmittal`, so documents
+        are created before their next revisions are saved.
+
+        Saved revisions are marked as processed, so an interrupted import
+        can be resumed.
+
+        The schedule section of a document depends on all its revisions, so
+        it is only updated once per document, after its last revision is
+        saved.
+
+        """
+        lookup = TrsLookup(
+            [
+                {"document_key": trs_rev.document_key, "revision": trs_rev.revision}
+                for trs_rev in trs_revisions
+            ]
+        )
+
+        # Document, metadata and revision saved last for each document key
+        saved = {}
+        for trs_revision in trs_revisions:
+            key = trs_revision.document_key
+            metadata = saved[key][1] if key in saved else None
+            if metadata is None:
+                document = lookup.get_document(key)
+                metadata = lookup.get_metadata(document) if document else None
+
+            revision = None
+            if metadata is not None:
+                trs_revision.document = metadata.document
+                revision = lookup.get_revision(metadata, trs_revision.revision)
+                if revision is not None:
+                    revision.metadata = metadata
+
+            doc, meta, rev = trs_revision.save_to_document(
+                metadata, revision, rewrite_schedule=False
+            )
+            saved[key] = (doc, meta, rev)
+
+            trs_revision.document = doc
+            trs_revision.processed_date = timezone.now()
+
+        for doc, meta, rev in saved.values():
+            update_schedule_section(doc, meta, rev)
+
+        cls.objects.bulk_update(trs_revisions, ["document", "processed_date"])
 
 
 class OutgoingTransmittal(Metadata):
@@ -875,6 +980,13 @@ class TransmittableMixin(ReviewMixin):
     class Meta:
         abstract = True
 
+    @classmethod
+    def get_index_prefetch_related(cls):
+        # Required by `can_be_transmitted`
+        return super(TransmittableMixin, cls).get_index_prefetch_related() + [
+            "transmittals"
+        ]
+
     def get_final_return_code(self):
         """Returns the latest available return code."""
         if hasattr(self, "return_code"):
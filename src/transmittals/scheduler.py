@@ -0,0 +1,106 @@
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+
+logger = logging.getLogger(__name__)
+
+
+class TrsImportScheduler(object):
+    """Imports a batch of transmittals from the same contractor.
+
+    Transmittal directories are independent, so they are validated
+    concurrently. Validated transmittals are then saved one after another,
+    in the order they were given, as soon as they and all the previous ones
+    are validated. Only `workers` transmittals are validated ahead of the one
+    being imported, and data of imported transmittals is released, so
+    memory usage does not grow with the batch size.
+
+    A transmittal can only be imported if the previous one in the sequence
+    was accepted. When the previous transmittal is part of the same batch,
+    this check is delayed until the previous one is imported.
+
+    """
+
+    def __init__(self, trs_imports, workers=1):
+        self.trs_imports = list(trs_imports)
+        self.workers = workers
+        self.timings = {}
+
+    def run(self):
+        self.defer_sequence_checks()
+
+        if self.workers > 1:
+            self.run_in_threads()
+        else:
+            for trs_import in self.trs_imports:
+                self.validate(trs_import)
+                self.do_import(trs_import)
+
+        return self.timings
+
+    def run_in_threads(self):
+        trs_imports = iter(self.trs_imports)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            validations = deque()
+
+            def validate_next():
+                trs_import = next(trs_imports, None)
+                if trs_import is not None:
+                    future = executor.submit(self.validate_in_thread, trs_import)
+                    validations.append((trs_import, future))
+
+            for _ in range(self.workers):
+                validate_next()
+
+            while validations:
+                trs_import, future = validations.popleft()
+                future.result()
+                validate_next()
+                self.do_import(trs_import)
+
+    def defer_sequence_checks(self):
+        pending_imports = set()
+        for trs_import in self.trs_imports:
+            trs_import.pending_imports = set(pending_imports)
+            pending_imports.add(trs_import.basename)
+
+    def validate(self, trs_import):
+        start = time.time()
+        trs_import.is_valid()
+        self.set_timing(trs_import, "validation", start)
+
+    def validate_in_thread(self, trs_import):
+        try:
+            self.validate(trs_import)
+        finally:
+            # Every thread has its own db connection
+            connection.close()
+
+    def do_import(self, trs_import):
+        start = time.time()
+        if trs_import.deferred_sequence_validator:
+            self.check_sequence(trs_import)
+        trs_import.do_import()
+        trs_import.release()
+        self.set_timing(trs_import, "import", start)
+
+    def check_sequence(self, trs_import):
+        """Performs the delayed sequential number check."""
+        validator = trs_import.deferred_sequence_validator
+        trs_import.pending_imports = set()
+        trs_import.deferred_sequence_validator = None
+        error = validator.validate(trs_import)
+        if error:
+            error_key = trs_import.TrsValidator.error_key
+            trs_import.errors.setdefault(error_key, {}).update(error)
+
+    def set_timing(self, trs_import, step, start):
+        duration = time.time() - start
+        logger.info(
+            "Transmittal {} {} took {:.2f}s".format(trs_import.basename, step, duration)
+        )
+        self.timings.setdefault(trs_import.basename, {})[step] = duration
@@ -1,6 +1,7 @@
 import logging
 import os
 
+from django.conf import settings
 from django.db import transaction
 
 from celery import current_task
@@ -12,6 +13,7 @@ from accounts.models import Entity, User
 from categories.models import Category
 from documents.models import Document
 from notifications.models import notify
+from search.signals import batch_indexing
 from transmittals.models import (
     Transmittal,
     TrsRevision,
@@ -99,7 +101,15 @@ def do_create_transmittal(
     return "done"
 
 
-@app.task
+def report_progress(progress):
+    # There is no task state to update when the task is called directly
+    if current_task.request.id:
+        current_task.update_state(state="PROGRESS", meta={"progress": progress})
+
+
+# Since processed lines are recorded, a task interrupted by a worker crash
+# is redelivered and resumes where it stopped
+@app.task(acks_late=True, reject_on_worker_lost=True)
 def process_transmittal(transmittal_id):
     """Processing the transmittal requires the following steps:
 
@@ -110,27 +120,43 @@ def process_transmittal(transmittal_id):
     - Move files into the 'accepted' directory
     - Update the Transmittal object status
 
+    Lines are saved and committed by chunks. Lines that were already
+    processed are skipped, so a failed import can be accepted again to
+    resume it.
+
     """
     logger.info("Starting to process transmittal {}".format(transmittal_id))
 
     transmittal = Transmittal.objects.get(pk=transmittal_id)
-    revisions = (
-        TrsRevision.objects.filter(transmittal=transmittal)
-        .order_by("revision")
+    if transmittal.status == "accepted":
+        return
+
+    all_revisions = TrsRevision.objects.filter(transmittal=transmittal)
+    total = all_revisions.count()
+    revisions = list(
+        all_revisions.filter(processed_date=None)
+        .order_by("revision", "id")
         .select_related()
     )
+    processed = total - len(revisions)
+    if processed:
+        logger.info(
+            "Resuming transmittal {} from line {}".format(transmittal, processed + 1)
+        )
 
+    chunk_size = settings.TRS_PROCESS_CHUNK_SIZE
     try:
-        # Update / create documents in db
-        with transaction.atomic():
-            line = 1
-            for trs_revision in revisions:
-                trs_revision.save_to_document()
-                if line % 100 == 0:
-                    logger.info("Importing line {}".format(line))
-
-                line += 1
+        # Update / create documents in db. Every chunk is committed on its
+        # own, and its documents are queued for indexing at once.
+        for chunk_start in range(0, len(revisions), chunk_size):
+            chunk = revisions[chunk_start : chunk_start + chunk_size]
+            logger.info("Importing line {}".format(processed + 1))
+            with transaction.atomic(), batch_indexing():
+                TrsRevision.bulk_save_to_documents(chunk)
+            processed += len(chunk)
+            report_progress(float(processed) / total * 100)
 
+        with transaction.atomic():
             transmittal.status = "accepted"
             transmittal.save()
 
@@ -159,8 +185,8 @@ def process_transmittal(transmittal_id):
         #
         # Revert the transmittal status back, and log the error is all
         # we can do now.
-        error_msg = "Error processing revision {} of transmittal {} ({})".format(
-            trs_revision, transmittal, e
+        error_msg = "Error processing transmittal {} from line {} ({})".format(
+            transmittal, processed + 1, e
         )
         logger.error(error_msg)
 
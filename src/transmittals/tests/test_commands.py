@@ -169,8 +169,8 @@ class ImportCommandTests(TestCase):
         error = 'The directory "/tmp/test_ctr_clt/rejected" is not writeable.'
         self.assertEqual(str(cm.exception), error)
 
-    @patch("transmittals.management.commands.import_transmittals.Command.import_dir")
-    def test_calling_import_method(self, import_dir):
+    @patch("transmittals.imports.TrsImport.do_import")
+    def test_calling_import_method(self, do_import):
         """When a directory is found, the import method must be fired"""
         f = StringIO()
         self.prepare_import_dir("empty_dirs")
@@ -185,7 +185,7 @@ class ImportCommandTests(TestCase):
             self.trs_category_path,
             stderr=f,
         )
-        self.assertEqual(import_dir.call_count, 3)
+        self.assertEqual(do_import.call_count, 3)
 
     def test_incorrect_trs_validator_option(self):
         f = StringIO()
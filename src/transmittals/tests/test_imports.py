@@ -1,3 +1,5 @@
+import errno
+import filecmp
 import os
 from os.path import join
 import tempfile
@@ -5,6 +7,7 @@ from shutil import rmtree, copytree
 
 from django.test import TestCase
 from django.contrib.contenttypes.models import ContentType
+from mock import patch
 
 from documents.models import Document
 from categories.factories import CategoryFactory
@@ -116,6 +119,62 @@ class TestImports(TestCase):
         self.assertEqual(revision.revision, 1)
         self.assertEqual(revision.status, "SPD")
 
+    def test_files_are_linked_to_the_storage(self):
+        trs_import = self.prepare_fixtures(
+            "single_correct_trs", "FAC10005-CTR-CLT-TRS-00001"
+        )
+        trs_import.save()
+
+        revision = TrsRevision.objects.order_by("revision")[0]
+        source = join(trs_import.trs_dir, "FAC10005-CTR-000-EXP-LAY-4891_01.pdf")
+        self.assertTrue(os.path.samefile(revision.pdf_file.path, source))
+
+    def test_files_are_copied_when_they_cannot_be_linked(self):
+        trs_import = self.prepare_fixtures(
+            "single_correct_trs", "FAC10005-CTR-CLT-TRS-00001"
+        )
+        error = OSError(errno.EACCES, "Permission denied")
+        with patch("transmittals.imports.os.link", side_effect=error):
+            trs_import.save()
+
+        revision = TrsRevision.objects.order_by("revision")[0]
+        source = join(trs_import.trs_dir, "FAC10005-CTR-000-EXP-LAY-4891_01.pdf")
+        self.assertFalse(os.path.samefile(revision.pdf_file.path, source))
+        self.assertTrue(filecmp.cmp(revision.pdf_file.path, source, shallow=False))
+
+    def test_existing_files_are_not_overwritten(self):
+        trs_import = self.prepare_fixtures(
+            "single_correct_trs", "FAC10005-CTR-CLT-TRS-00001"
+        )
+        link = os.link
+        other_files = []
+
+        def link_after_another_import(src, dst):
+            # Another import stores a file with the same name first
+            if not other_files:
+                with open(dst, "w") as f:
+                    f.write("other")
+                other_files.append(dst)
+                raise FileExistsError(errno.EEXIST, "File exists")
+            link(src, dst)
+
+        with patch("transmittals.imports.os.link", link_after_another_import):
+            trs_import.save()
+
+        with open(other_files[0]) as f:
+            self.assertEqual(f.read(), "other")
+        stored = [revision.pdf_file.path for revision in TrsRevision.objects.all()]
+        self.assertNotIn(other_files[0], stored)
+
+    def test_unexpected_link_errors_are_raised(self):
+        trs_import = self.prepare_fixtures(
+            "single_correct_trs", "FAC10005-CTR-CLT-TRS-00001"
+        )
+        error = OSError(errno.EIO, "Input/output error")
+        with patch("transmittals.imports.os.link", side_effect=error):
+            with self.assertRaises(OSError):
+                trs_import.save()
+
     def test_new_or_updated_revisions(self):
         trs_import = self.prepare_fixtures(
             "single_correct_trs", "FAC10005-CTR-CLT-TRS-00001"
@@ -127,3 +186,52 @@ class TestImports(TestCase):
 
         new_revisions = TrsRevision.objects.filter(is_new_revision=True)
         self.assertEqual(new_revisions.count(), 2)
+
+    def test_lines_are_validated_once(self):
+        trs_import = self.prepare_fixtures(
+            "single_correct_trs", "FAC10005-CTR-CLT-TRS-00001"
+        )
+        self.assertTrue(trs_import.is_valid())
+
+        line = trs_import.lines()[0]
+        self.assertIs(line.get_forms(), trs_import.lines()[0].get_forms())
+        self.assertEqual(
+            line.get_metadata().document.document_key, line.csv_data["document_key"]
+        )
+
+    def test_lookup_queries(self):
+        trs_import = self.prepare_fixtures(
+            "single_correct_trs", "FAC10005-CTR-CLT-TRS-00001"
+        )
+        trs_import.csv_lines()
+        with self.assertNumQueries(8):
+            trs_import.lookup
+
+        revisions = []
+        with self.assertNumQueries(0):
+            for line in trs_import:
+                metadata = line.get_metadata()
+                revision = trs_import.lookup.get_revision(
+                    metadata, line.csv_data["revision"]
+                )
+                revisions.append(revision.revision if revision else None)
+                line.form_data
+
+        # Revisions 03 and 04 are new ones
+        self.assertEqual(revisions, [1, 2, None, None])
+
+    def test_directory_index(self):
+        trs_import = self.prepare_fixtures(
+            "single_correct_trs", "FAC10005-CTR-CLT-TRS-00001"
+        )
+        self.assertEqual(len(trs_import.pdf_names()), 4)
+        self.assertEqual(
+            trs_import.native_names(), ["FAC10005-CTR-000-EXP-LAY-4891_04.doc"]
+        )
+
+        lines = trs_import.lines()
+        self.assertIsNone(lines[0].native_fullname)
+        self.assertEqual(
+            lines[3].native_fullname,
+            join(trs_import.trs_dir, "FAC10005-CTR-000-EXP-LAY-4891_04.doc"),
+        )
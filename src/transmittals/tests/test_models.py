@@ -4,6 +4,7 @@ import tempfile
 from shutil import rmtree, copytree
 
 from django.test import TestCase
+from django.urls import reverse
 from django.utils import timezone
 
 from accounts.factories import UserFactory
@@ -98,6 +99,10 @@ class TransmittalModelTests(TestCase):
     def test_accept(self):
         self.transmittal.accept()
         self.assertEqual(self.transmittal.status, "processing")
+        self.assertEqual(
+            self.transmittal.get_poll_url(),
+            reverse("task_poll", args=[self.transmittal.task_id]),
+        )
 
 
 class OutgoingTransmittalModelTests(TestCase):
@@ -0,0 +1,194 @@
+import os
+from os.path import join
+import tempfile
+from shutil import rmtree, copytree
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.contrib.contenttypes.models import ContentType
+
+from documents.models import Document
+from categories.factories import CategoryFactory
+from transmittals.imports import TrsImport
+from transmittals.models import Transmittal
+from transmittals.scheduler import TrsImportScheduler
+from transmittals.validation import TrsSequentialNumberValidator, TrsValidator
+
+
+class NoSequenceTrsValidator(TrsValidator):
+    """A global validator without any sequential number check."""
+
+    VALIDATORS = tuple(
+        validator
+        for validator in TrsValidator.VALIDATORS
+        if not isinstance(validator, TrsSequentialNumberValidator)
+    )
+
+
+FIXTURE_DIR = "FAC10005-CTR-CLT-TRS-00001"
+
+
+class SchedulerTestMixin(object):
+    fixtures = [
+        "initial_categories",
+        "initial_values_lists",
+        "initial_accounts",
+        "initial_documents",
+        "initial_entities",
+    ]
+
+    def setUp(self):
+        document = Document.objects.get(document_key="FAC10005-CTR-000-EXP-LAY-4891")
+        self.doc_category = document.category
+
+        trs_content_type = ContentType.objects.get_for_model(Transmittal)
+        self.trs_category = CategoryFactory(
+            category_template__metadata_model=trs_content_type
+        )
+
+        self.tmpdir = tempfile.mkdtemp(prefix="phasetest_", suffix="_trs")
+        self.incoming = join(self.tmpdir, "incoming")
+        self.tobechecked = join(self.tmpdir, "tobechecked")
+        self.accepted = join(self.tmpdir, "accepted")
+        self.rejected = join(self.tmpdir, "rejected")
+
+        os.mkdir(self.incoming)
+        os.mkdir(self.accepted)
+        os.mkdir(self.rejected)
+        os.mkdir(self.tobechecked)
+
+    def tearDown(self):
+        if os.path.exists(self.tmpdir):
+            rmtree(self.tmpdir)
+
+    def prepare_import(self, trs_dir, **kwargs):
+        """Copy the correct transmittal fixture under another name."""
+        src = os.path.join(
+            os.path.dirname(__file__), "fixtures", "single_correct_trs", FIXTURE_DIR
+        )
+        dest = join(self.incoming, trs_dir)
+        copytree(src, dest)
+        os.rename(
+            join(dest, "{}.csv".format(FIXTURE_DIR)),
+            join(dest, "{}.csv".format(trs_dir)),
+        )
+        return TrsImport(
+            dest,
+            tobechecked_dir=self.tobechecked,
+            accepted_dir=self.accepted,
+            rejected_dir=self.rejected,
+            email_list=["test@phase.fr"],
+            contractor="test",
+            doc_category=self.doc_category,
+            trs_category=self.trs_category,
+            **kwargs
+        )
+
+
+class TrsImportSchedulerTests(SchedulerTestMixin, TestCase):
+    def test_following_transmittals(self):
+        trs_imports = [
+            self.prepare_import("FAC10005-CTR-CLT-TRS-00001"),
+            self.prepare_import("FAC10005-CTR-CLT-TRS-00002"),
+        ]
+        timings = TrsImportScheduler(trs_imports).run()
+
+        self.assertEqual(
+            sorted(os.listdir(self.tobechecked)),
+            ["FAC10005-CTR-CLT-TRS-00001", "FAC10005-CTR-CLT-TRS-00002"],
+        )
+        self.assertEqual(Transmittal.objects.count(), 2)
+        self.assertEqual(
+            set(timings["FAC10005-CTR-CLT-TRS-00002"].keys()), {"validation", "import"}
+        )
+
+    def test_previous_transmittal_is_rejected(self):
+        trs_imports = [
+            self.prepare_import("FAC10005-CTR-CLT-TRS-00001"),
+            self.prepare_import("FAC10005-CTR-CLT-TRS-00002"),
+        ]
+        os.remove(
+            join(trs_imports[0].trs_dir, "FAC10005-CTR-000-EXP-LAY-4891_01.pdf")
+        )
+        TrsImportScheduler(trs_imports).run()
+
+        self.assertEqual(
+            sorted(os.listdir(self.rejected)),
+            ["FAC10005-CTR-CLT-TRS-00001", "FAC10005-CTR-CLT-TRS-00002"],
+        )
+        self.assertIn(
+            "wrong_sequential_number", trs_imports[1].errors["global_errors"]
+        )
+
+    def test_sequence_is_only_checked_again_if_it_was_deferred(self):
+        trs_imports = [
+            self.prepare_import(
+                "FAC10005-CTR-CLT-TRS-00001", trs_validator=NoSequenceTrsValidator
+            ),
+            self.prepare_import(
+                "FAC10005-CTR-CLT-TRS-00002", trs_validator=NoSequenceTrsValidator
+            ),
+        ]
+        os.remove(
+            join(trs_imports[0].trs_dir, "FAC10005-CTR-000-EXP-LAY-4891_01.pdf")
+        )
+        TrsImportScheduler(trs_imports).run()
+
+        self.assertEqual(os.listdir(self.rejected), ["FAC10005-CTR-CLT-TRS-00001"])
+        self.assertEqual(os.listdir(self.tobechecked), ["FAC10005-CTR-CLT-TRS-00002"])
+
+    def test_sequence_is_checked_outside_the_batch(self):
+        trs_import = self.prepare_import("FAC10005-CTR-CLT-TRS-00002")
+        TrsImportScheduler([trs_import]).run()
+
+        self.assertIn("wrong_sequential_number", trs_import.errors["global_errors"])
+        self.assertEqual(os.listdir(self.rejected), ["FAC10005-CTR-CLT-TRS-00002"])
+
+
+class ThreadedTrsImportSchedulerTests(SchedulerTestMixin, TransactionTestCase):
+    """Transmittals are validated in other threads, with their own connection."""
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("In-memory sqlite tables are locked during writes")
+        super(ThreadedTrsImportSchedulerTests, self).setUp()
+
+    def test_following_transmittals(self):
+        trs_imports = [
+            self.prepare_import("FAC10005-CTR-CLT-TRS-00001"),
+            self.prepare_import("FAC10005-CTR-CLT-TRS-00002"),
+            self.prepare_import("FAC10005-CTR-CLT-TRS-00003"),
+        ]
+        timings = TrsImportScheduler(trs_imports, workers=2).run()
+
+        self.assertEqual(
+            sorted(os.listdir(self.tobechecked)),
+            [
+                "FAC10005-CTR-CLT-TRS-00001",
+                "FAC10005-CTR-CLT-TRS-00002",
+                "FAC10005-CTR-CLT-TRS-00003",
+            ],
+        )
+        self.assertEqual(Transmittal.objects.count(), 3)
+        self.assertEqual(len(timings), 3)
+
+        # Imported transmittals do not keep their lines in memory
+        self.assertIsNone(trs_imports[0]._lines)
+        self.assertIsNone(trs_imports[0]._lookup)
+
+    def test_previous_transmittal_is_rejected(self):
+        trs_imports = [
+            self.prepare_import("FAC10005-CTR-CLT-TRS-00001"),
+            self.prepare_import("FAC10005-CTR-CLT-TRS-00002"),
+            self.prepare_import("FAC10005-CTR-CLT-TRS-00003"),
+        ]
+        os.remove(
+            join(trs_imports[1].trs_dir, "FAC10005-CTR-000-EXP-LAY-4891_01.pdf")
+        )
+        TrsImportScheduler(trs_imports, workers=2).run()
+
+        self.assertEqual(os.listdir(self.tobechecked), ["FAC10005-CTR-CLT-TRS-00001"])
+        self.assertEqual(
+            sorted(os.listdir(self.rejected)),
+            ["FAC10005-CTR-CLT-TRS-00002", "FAC10005-CTR-CLT-TRS-00003"],
+        )
@@ -3,8 +3,10 @@ from os.path import join
 import tempfile
 
 from django.test import TestCase
+from django.test.utils import override_settings
 from django.contrib.contenttypes.models import ContentType
 from django.core.files.uploadedfile import SimpleUploadedFile
+from mock import patch
 
 from accounts.factories import UserFactory
 from documents.factories import DocumentFactory
@@ -20,7 +22,8 @@ from default_documents.factories import (
 from default_documents.models import ContractorDeliverable
 from accounts.factories import EntityFactory
 from notifications.models import Notification
-from transmittals.models import OutgoingTransmittal
+from schedules.handlers import update_schedule_section
+from transmittals.models import OutgoingTransmittal, TrsRevision
 from transmittals.factories import TransmittalFactory, TrsRevisionFactory
 from transmittals.tasks import process_transmittal, do_create_transmittal
 
@@ -160,6 +163,75 @@ class ProcessTransmittalTests(TestCase):
         self.assertTrue(rev.pdf_file)
         self.assertTrue(rev.native_file)
 
+    @override_settings(TRS_PROCESS_CHUNK_SIZE=1)
+    def test_process_in_several_chunks(self):
+        process_transmittal(self.transmittal.pk)
+
+        self.transmittal.refresh_from_db()
+        self.assertEqual(self.transmittal.status, "accepted")
+        self.assertEqual(self.document.metadata.get_revision(2).status, "IFA")
+        self.assertEqual(self.document.metadata.get_revision(4).status, "FIN")
+        self.assertEqual(self.document.metadata.latest_revision.revision, 4)
+
+    def test_processed_lines_are_recorded(self):
+        process_transmittal(self.transmittal.pk)
+
+        revisions = self.transmittal.trsrevision_set.all()
+        self.assertFalse(revisions.filter(processed_date=None).exists())
+        self.assertFalse(revisions.exclude(document=self.document).exists())
+        self.assertEqual(self.transmittal.get_progress(), 100.0)
+
+    @override_settings(TRS_PROCESS_CHUNK_SIZE=2)
+    def test_failed_process_can_be_resumed(self):
+        save_to_document = TrsRevision.save_to_document
+        calls = []
+
+        def fail_on_third_line(trs_revision, *args, **kwargs):
+            calls.append(trs_revision.revision)
+            if len(calls) == 3:
+                raise RuntimeError("Crash")
+            return save_to_document(trs_revision, *args, **kwargs)
+
+        with patch.object(TrsRevision, "save_to_document", fail_on_third_line):
+            process_transmittal(self.transmittal.pk)
+
+        # The first chunk was committed
+        self.transmittal.refresh_from_db()
+        self.assertEqual(self.transmittal.status, "tobechecked")
+        self.assertEqual(self.transmittal.get_progress(), 50.0)
+        self.assertEqual(self.document.metadata.get_revision(2).status, "IFA")
+        self.assertIsNone(self.document.metadata.get_revision(3))
+        with self.assertRaises(RuntimeError):
+            self.transmittal.reject()
+
+        with patch.object(TrsRevision, "save_to_document", fail_on_third_line):
+            process_transmittal(self.transmittal.pk)
+
+        # Only the remaining lines were processed
+        self.assertEqual(calls, [1, 2, 3, 3, 4])
+        self.transmittal.refresh_from_db()
+        self.assertEqual(self.transmittal.status, "accepted")
+        self.assertEqual(self.document.metadata.get_revision(4).status, "FIN")
+
+    def test_schedule_is_updated_once_per_document(self):
+        with patch(
+            "transmittals.models.update_schedule_section",
+            wraps=update_schedule_section,
+        ) as update_mock:
+            process_transmittal(self.transmittal.pk)
+
+        self.assertEqual(update_mock.call_count, 1)
+        self.metadata.refresh_from_db()
+        self.assertIsNotNone(self.metadata.status_ifa_actual_date)
+
+    @override_settings(TRS_PROCESS_CHUNK_SIZE=3)
+    @patch("transmittals.tasks.report_progress")
+    def test_process_reports_progress(self, report_progress_mock):
+        process_transmittal(self.transmittal.pk)
+        self.assertEqual(
+            [call[0][0] for call in report_progress_mock.call_args_list], [75.0, 100.0]
+        )
+
     def test_successfull_process_moves_files_to_accepted_dir(self):
         tobechecked_file = join(self.transmittal.full_tobechecked_name, "toto.csv")
         accepted_file = join(self.transmittal.full_accepted_name, "toto.csv")
@@ -117,6 +117,14 @@ class TrsSequentialNumberValidator(Validator):
         if seq_number == 1:
             return True
 
+        # The previous transmittal is about to be imported in the same batch,
+        # this test will be performed again after it is
+        previous_number = str(seq_number - 1).zfill(len(split[4]))
+        previous_name = "-".join(split[:4] + [previous_number])
+        if previous_name in trs_import.pending_imports:
+            trs_import.deferred_sequence_validator = self
+            return True
+
         qs = (
             Transmittal.objects.filter(contract_number=contract_number)
             .filter(originator=originator)
@@ -177,7 +185,7 @@ class NativeFileValidator(Validator):
 
         """
         native_files = trs_import.native_names()
-        pdf_files = trs_import.pdf_names()
+        pdf_files = set(trs_import.pdf_names())
         errors = dict()
 
         for filename in native_files:
@@ -199,7 +207,7 @@ class PdfFilenameValidator(Validator):
     error_key = "missing_pdf"
 
     def test(self, import_line):
-        return os.path.exists(import_line.pdf_fullname)
+        return import_line.pdf_basename in import_line.trs_import.dir_index
 
 
 class MissingDataValidator(Validator):
@@ -8,7 +8,6 @@ from django.utils import timezone
 from django.shortcuts import get_object_or_404
 
 from braces.views import LoginRequiredMixin, PermissionRequiredMixin
-from zipview.views import BaseZipView
 from annoying.functions import get_object_or_None
 
 from categories.models import Category
@@ -20,7 +19,7 @@ from transmittals.tasks import do_create_transmittal
 from search.utils import index_revisions
 from documents.views import DocumentListMixin
 from accounts.models import get_entities
-from privatemedia.views import serve_model_file_field
+from privatemedia.views import serve_model_file_field, StreamingZipView
 from django.conf import settings
 
 
@@ -265,7 +264,9 @@ class TransmittalRevisionDiff(LoginRequiredMixin, PermissionRequiredMixin, Detai
         )
 
 
-class TransmittalDownload(LoginRequiredMixin, PermissionRequiredMixin, BaseZipView):
+class TransmittalDownload(
+    LoginRequiredMixin, PermissionRequiredMixin, StreamingZipView
+):
     zipfile_name = "transmittal_documents.zip"
     permission_required = "documents.can_control_document"
 
@@ -287,10 +288,10 @@ class TransmittalDownload(LoginRequiredMixin, PermissionRequiredMixin, BaseZipVi
         files = []
         for revision in revisions:
             if file_format in ("pdf", "both") and revision.pdf_file.name:
-                files.append(revision.pdf_file.file)
+                files.append(revision.pdf_file)
 
             if file_format in ("native", "both") and revision.native_file.name:
-                files.append(revision.native_file.file)
+                files.append(revision.native_file)
 
         return files
 